@@ -17,15 +17,20 @@
 A utility module for converting state data from CSV to JSON format,
 with a focus on secure file handling.
 
-This module contains two primary functions: `sanitize_filename` and `read_states_csv_to_json`. 
+This module contains two primary functions: `sanitize_filename` and `read_states_csv_to_json`.
 `sanitize_filename` ensures filename safety by removing directory components and blocking access
 to protected directories and hidden files, thus mitigating file path traversal vulnerabilities.
 `read_states_csv_to_json` reads state data from a given CSV file and converts it into a structured
-JSON format.
+JSON format, using `commons_upload_url` to turn Wikipedia file page links into direct image URLs.
 
 It processes and organizes information such as state codes, capitals, populations, state flowers,
 and associated image URLs.
 
+For large reference CSVs, `stream_states_csv_to_json` reads the rows lazily with `iter_states_csv`
+and writes each one as soon as it is converted, either as the same JSON object or as NDJSON (one
+object per line), optionally compact, so memory use does not grow with the input. It reports rows
+and bytes per second.
+
 The module is designed for use as a command-line tool.
 It requires two arguments: the source CSV filename and the target JSON filename.
 Its implementation emphasizes secure practices in file handling and efficient data
@@ -33,13 +38,24 @@ transformation between popular data formats.
 
 Usage:
     Run the script from the command line with the CSV and JSON filenames as arguments.
-    Example: python script.py <csv_filename> <json_filename>
+    Example: python csv2dict.py <csv_filename> <json_filename>
+             python csv2dict.py --stream [--ndjson] [--compact] <csv_filename> <json_filename>
 """
 
+import argparse
 import csv
+import hashlib
 import json
 import os
 import sys
+import tempfile
+import time
+from functools import lru_cache
+from urllib.parse import quote, unquote
+
+WIKIPEDIA_FILE_PREFIX = "https://en.wikipedia.org/wiki/File:"
+COMMONS_UPLOAD_PREFIX = "https://upload.wikimedia.org/wikipedia/commons/"
+BUFFER_SIZE = 1024 * 1024
 
 
 def sanitize_filename(filename):
@@ -67,6 +83,103 @@ def sanitize_filename(filename):
     return sanitized
 
 
+@lru_cache(maxsize=4096)
+def commons_upload_url(url):
+    """
+    Convert a Wikipedia file page URL into the direct URL of the image.
+
+    Wikimedia Commons stores each file under two directories named after the
+    first one and two hex digits of the MD5 digest of its file name, for
+    example ``/commons/9/96/Camellia_japonica_flower_2.jpg``. Results are
+    cached, as reference CSVs tend to repeat the same images.
+
+    Args:
+        url (str): A ``https://en.wikipedia.org/wiki/File:...`` URL.
+
+    Returns:
+        str: The upload.wikimedia.org URL of the image, or ``url`` unchanged
+        if it is not a Wikipedia file page URL.
+    """
+    if not url.startswith(WIKIPEDIA_FILE_PREFIX):
+        return url
+    name = unquote(url[len(WIKIPEDIA_FILE_PREFIX):]).replace(" ", "_")
+    digest = hashlib.md5(name.encode("utf-8"), usedforsecurity=False).hexdigest()
+    return f"{COMMONS_UPLOAD_PREFIX}{digest[0]}/{digest[:2]}/{quote(name)}"
+
+
+def _parse_state_row(row):
+    """
+    Turn one CSV row into a state name and its details.
+
+    Args:
+        row (dict): A row read by csv.DictReader.
+
+    Returns:
+        tuple: The state name and a dictionary of its code, capital, population,
+        flower and image URL.
+
+    Raises:
+        KeyError: If an expected column is missing in the row.
+    """
+    state_key = "\ufeffSTATE" if "\ufeffSTATE" in row else "STATE"
+    return row[state_key], {
+        "CODE": row["CODE"],
+        "CAPITAL": row["CAPITAL"],
+        "POPULATION": int(
+            row["POPULATION"].replace(",", "")
+        ),  # Removing commas and converting to int
+        "FLOWER": row["FLOWER"],
+        "URL": commons_upload_url(row["URL"]),
+    }
+
+
+def iter_states_csv(csv_file, counts=None):
+    """
+    Read state data from a CSV file lazily, one row at a time.
+
+    Rows with a missing column, a missing value or a population that is not a
+    number are reported and skipped.
+
+    Args:
+        csv_file (str): Path to the source CSV file containing state data.
+        counts (dict): If given, its 'skipped' entry is incremented for every
+            skipped row.
+
+    Yields:
+        tuple: The state name and its details, as returned by `_parse_state_row`.
+    """
+    with open(csv_file, newline="", encoding="utf-8-sig") as csvfile:
+        yield from _iter_states(csvfile, counts)
+
+
+def _iter_states(csvfile, counts=None):
+    """
+    Read state data from an open CSV file, as `iter_states_csv` does.
+
+    Args:
+        csvfile (file): The CSV file, opened with ``newline=""``.
+        counts (dict): If given, its 'skipped' entry is incremented for every
+            skipped row.
+
+    Yields:
+        tuple: The state name and its details, as returned by `_parse_state_row`.
+    """
+    reader = csv.DictReader(csvfile)
+    for row in reader:
+        try:
+            record = _parse_state_row(row)
+        except KeyError as key_error:
+            print(f"KeyError: {key_error}")
+        except (AttributeError, ValueError):
+            # Short rows have None for their missing columns
+            print(f"Skipping incomplete or invalid row on line {reader.line_num}.")
+        else:
+            yield record
+            continue
+        if counts is not None:
+            counts["skipped"] = counts.get("skipped", 0) + 1
+
+
 def read_states_csv_to_json(csv_file, json_file):
     """
     Convert state data from a CSV file to a JSON file format.
@@ -74,12 +187,14 @@ def read_states_csv_to_json(csv_file, json_file):
     This function reads state data from a specified CSV file and writes it into a JSON file.
     It constructs a dictionary with details for each state, including its code, capital, population,
     state flower, and a URL for an image of the state's flower. The population numbers are cleansed
-    of commas and converted to integers, and the URLs for the flower images are modified for direct
-    access.
+    of commas and converted to integers, and the URLs for the flower images are converted to direct
+    image URLs with `commons_upload_url`.
 
     The function handles UTF-8 byte order mark (BOM) in the CSV file and expects specific headers in
     the CSV file. It manages KeyError exceptions that may occur if any expected columns are missing.
 
+    The whole dictionary is built in memory; use `stream_states_csv_to_json` for large files.
+
     Args:
         csv_file (str): Path to the source CSV file containing state data.
         json_file (str): Path to the target JSON file for output.
@@ -90,47 +205,170 @@ def read_states_csv_to_json(csv_file, json_file):
     Note:
         The CSV file should have headers: 'STATE', 'CODE', 'CAPITAL', 'POPULATION', 'FLOWER', 'URL'.
     """
-    states_dict = {}
-
-    with open(csv_file, newline="", encoding="utf-8-sig") as csvfile:
-        reader = csv.DictReader(csvfile)
-
-        for row in reader:
-            state_key = "\ufeffSTATE" if "\ufeffSTATE" in row else "STATE"
-
-            try:
-                state = row[state_key]
-                states_dict[state] = {
-                    "CODE": row["CODE"],
-                    "CAPITAL": row["CAPITAL"],
-                    "POPULATION": int(
-                        row["POPULATION"].replace(",", "")
-                    ),  # Removing commas and converting to int
-                    "FLOWER": row["FLOWER"],
-                    "URL": row["URL"].replace(
-                        "en.wikipedia.org/wiki/File:",
-                        "upload.wikimedia.org/wikipedia/commons/",
-                    ),
-                }
-            except KeyError as key_error:
-                print(f"KeyError: {key_error}")
-                continue
+    states_dict = dict(iter_states_csv(csv_file))
 
     with open(json_file, "w", encoding="utf-8") as jsonfile:
         json.dump(states_dict, jsonfile, indent=4)
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python script.py <csv_filename> <json_filename>")
-        sys.exit(1)
+def stream_states_csv_to_json(csv_file, json_file, ndjson=False, compact=False):
+    """
+    Convert state data from a CSV file to JSON while reading and writing one row at a time.
+
+    Memory use stays the same whatever the size of the CSV file. Without
+    ``ndjson`` or ``compact`` the output is the same as `read_states_csv_to_json`
+    writes, except that a state appearing twice is written twice; JSON readers
+    keep the last one, as the in-memory conversion does.
+
+    The output is written to a temporary file next to ``json_file`` that only
+    replaces it once the whole CSV file has been converted, so a missing or
+    unreadable CSV file leaves an existing JSON file untouched.
+
+    Args:
+        csv_file (str): Path to the source CSV file containing state data.
+        json_file (str): Path to the target JSON file for output.
+        ndjson (bool): Write one JSON object per line, with the state name under
+            'STATE', instead of one object keyed by state name.
+        compact (bool): Leave out indentation and spaces.
+
+    Returns:
+        dict: The numbers of rows written and skipped, bytes read and written,
+        and the elapsed time in seconds.
+
+    Raises:
+        OSError: If the CSV file cannot be read or the JSON file written.
+        csv.Error: If the CSV file is malformed.
+        UnicodeDecodeError: If the CSV file is not UTF-8.
+    """
+    # One encoder for every row; json.dumps builds a new one per call when given options
+    encoder = json.JSONEncoder(
+        indent=None if compact or ndjson else 4,
+        separators=(",", ":") if compact else None,
+    )
+    counts = {"skipped": 0}
+
+    start = time.perf_counter()
+    with open(csv_file, newline="", encoding="utf-8-sig") as csvfile:
+        bytes_read = os.fstat(csvfile.fileno()).st_size
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".csv2dict-", dir=os.path.dirname(os.path.abspath(json_file))
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", buffering=BUFFER_SIZE) as jsonfile:
+                rows, bytes_written = _write_states(
+                    _iter_states(csvfile, counts), jsonfile, encoder, ndjson, compact
+                )
+            # mkstemp creates the file readable by its owner only
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+            os.replace(tmp_path, json_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    return {
+        "rows": rows,
+        "skipped": counts["skipped"],
+        "bytes_read": bytes_read,
+        "bytes_written": bytes_written,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _write_states(records, jsonfile, encoder, ndjson, compact):
+    """
+    Write state records to an open JSON file for `stream_states_csv_to_json`.
+
+    Args:
+        records (iterable): State names and details.
+        jsonfile (file): The target file, opened for writing.
+        encoder (json.JSONEncoder): Encoder for each record.
+        ndjson (bool): Write one JSON object per line.
+        compact (bool): Leave out indentation and spaces.
+
+    Returns:
+        tuple: The number of rows and of bytes written.
+    """
+    rows = 0
+    if not ndjson:
+        jsonfile.write("{")
+    for state, details in records:
+        if ndjson:
+            record = {"STATE": state}
+            record.update(details)
+            jsonfile.write(encoder.encode(record) + "\n")
+        else:
+            value = encoder.encode(details)
+            key = encoder.encode(state)
+            if compact:
+                jsonfile.write(f"{',' if rows else ''}{key}:{value}")
+            else:
+                # Match json.dump(..., indent=4): each entry on its own level
+                value = value.replace("\n", "\n    ")
+                jsonfile.write(f"{',' if rows else ''}\n    {key}: {value}")
+        rows += 1
+    if not ndjson:
+        jsonfile.write("\n}" if rows and not compact else "}")
+    return rows, jsonfile.tell()
+
+
+def format_report(stats):
+    """
+    Describe the throughput of a streaming conversion.
+
+    Args:
+        stats (dict): Statistics returned by `stream_states_csv_to_json`.
+
+    Returns:
+        str: Rows and bytes converted, with rows per second and MB per second.
+    """
+    seconds = stats["seconds"] or 1e-9
+    return (
+        f"Converted {stats['rows']:,} rows ({stats['skipped']:,} skipped) in {seconds:.2f}s: "
+        f"{stats['rows'] / seconds:,.0f} rows/s, "
+        f"read {stats['bytes_read'] / 1e6:,.1f} MB at {stats['bytes_read'] / 1e6 / seconds:,.1f} MB/s, "
+        f"wrote {stats['bytes_written'] / 1e6:,.1f} MB at "
+        f"{stats['bytes_written'] / 1e6 / seconds:,.1f} MB/s"
+    )
+
+
+def main():
+    """
+    Parse the command line and convert the CSV file.
+    """
+    parser = argparse.ArgumentParser(description="Convert state data from CSV to JSON.")
+    parser.add_argument("csv_filename", help="source CSV file")
+    parser.add_argument("json_filename", help="target JSON file")
+    parser.add_argument("--stream", action="store_true",
+                        help="read and write one row at a time and report the throughput")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="write one JSON object per line (implies --stream)")
+    parser.add_argument("--compact", action="store_true",
+                        help="write without indentation or spaces (implies --stream)")
+    args = parser.parse_args()
 
     try:
         # Sanitize input filenames
-        csv_filename = sanitize_filename(sys.argv[1])
-        json_filename = sanitize_filename(sys.argv[2])
+        csv_filename = sanitize_filename(args.csv_filename)
+        json_filename = sanitize_filename(args.json_filename)
     except ValueError as e:
         print(e)
         sys.exit(1)
 
-    read_states_csv_to_json(csv_filename, json_filename)
+    try:
+        if args.stream or args.ndjson or args.compact:
+            stats = stream_states_csv_to_json(csv_filename, json_filename, args.ndjson, args.compact)
+            print(format_report(stats))
+        else:
+            read_states_csv_to_json(csv_filename, json_filename)
+    except OSError as e:
+        print(f"Error: could not convert {csv_filename} to {json_filename}: {e}")
+        sys.exit(1)
+    except (csv.Error, UnicodeDecodeError) as e:
+        print(f"Error: {csv_filename} is not a valid UTF-8 CSV file: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# =================================================================
+#
+# Authors: Michael Jones <mjones467@student.umgc.edu>
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+# =================================================================
+
+"""
+A content-addressed disk cache for the state flower images used by state_search.py.
+
+Each image is stored once under the SHA-256 digest of its content, so states whose
+flowers share a URL or an identical picture share one file. An index maps the SHA-256
+digest of each URL to its content digest, ETag, Last-Modified date and freshness.
+
+- A fresh entry is served from disk without any network access.
+- A stale entry is revalidated with If-None-Match/If-Modified-Since; a 304 answer
+  only renews it.
+- When the cache grows past its size limit, the least recently used entries are
+  evicted.
+- In offline mode the network is never used: cached images are served even when
+  stale, and missing ones are reported as unavailable.
+
+Hits, revalidations, misses and network requests are counted so the hit ratio can
+be reported.
+
+Usage:
+    python image_cache.py stats
+    python image_cache.py clear
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_cache")
+MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 60 * 60  # seconds an image stays fresh without a max-age
+TIMEOUT = 10
+COUNTERS = ("hits", "revalidated", "misses", "offline_misses", "requests", "evictions")
+
+
+def _max_age(cache_control):
+    """
+    Return the max-age in seconds from a Cache-Control header, if any.
+
+    Args:
+        cache_control (str): The header value, or None.
+
+    Returns:
+        int: The max-age, or None if the header has none.
+    """
+    for directive in (cache_control or "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name.lower() == "max-age" and value.isdigit():
+            return int(value)
+    return None
+
+
+class ImageCache:
+    """
+    A size-bounded, content-addressed disk cache of downloaded images.
+
+    Attributes:
+        directory (str): Directory holding the index and the image files.
+        max_bytes (int): Total size of the image files kept before evicting.
+        offline (bool): Never use the network when True.
+        stats (dict): Counts of hits, revalidations, misses, offline misses,
+            network requests and evictions since the cache was opened.
+        totals (dict): The same counts over the lifetime of the cache directory.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES, offline=False):
+        """
+        Open the cache, creating its directory and loading its index.
+
+        Args:
+            directory (str): Directory holding the index and the image files.
+            max_bytes (int): Total size of the image files kept before evicting.
+            offline (bool): Never use the network when True.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.stats = dict.fromkeys(COUNTERS, 0)
+        self._index_file = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        try:
+            with open(self._index_file, encoding="utf-8") as index:
+                saved = json.load(index)
+            self._index = saved["entries"]
+            self.totals = {name: saved["totals"].get(name, 0) for name in COUNTERS}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            self._index = {}
+            self.totals = dict.fromkeys(COUNTERS, 0)
+
+    def _count(self, name):
+        """Increment a counter for this session and the lifetime totals; lock held."""
+        self.stats[name] += 1
+        self.totals[name] += 1
+
+    def _object_path(self, digest):
+        """Return the path of the image file with the given content digest."""
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def _read_object(self, digest):
+        """Return an image file's content, or None if it is missing or corrupted."""
+        path = self._object_path(digest)
+        try:
+            with open(path, "rb") as image:
+                content = image.read()
+        except OSError:
+            return None
+        if hashlib.sha256(content).hexdigest() != digest:
+            # Remove the corrupted file so the next download can store the image again
+            self._remove_object(digest)
+            return None
+        return content
+
+    def _remove_object(self, digest):
+        """Delete an image file, ignoring failures."""
+        try:
+            os.remove(self._object_path(digest))
+        except OSError:
+            pass
+
+    def _write_object(self, content):
+        """Store image content under its digest and return the digest."""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as image:
+                image.write(content)
+            os.replace(tmp_path, path)
+        return digest
+
+    def _save_index(self):
+        """Write the index atomically, ignoring failures; must be called with the lock held."""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as index:
+                json.dump({"entries": self._index, "totals": self.totals}, index)
+            os.replace(tmp_path, self._index_file)
+        except OSError as e:
+            print(f"Warning: could not write the image cache index: {e}")
+
+    def _evict(self):
+        """Evict least recently used entries until the size limit is met; lock held."""
+        sizes = {entry["sha256"]: entry["size"] for entry in self._index.values()}
+        total = sum(sizes.values())
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes or len(self._index) == 1:
+                break
+            del self._index[key]
+            self._count("evictions")
+            digest = entry["sha256"]
+            if all(other["sha256"] != digest for other in self._index.values()):
+                total -= sizes[digest]
+                self._remove_object(digest)
+
+    def _store(self, key, url, response, now):
+        """Record a downloaded image in the index and return its content; lock held."""
+        content = response.content
+        try:
+            digest = self._write_object(content)
+        except OSError as e:
+            print(f"Warning: could not cache the image from {url}: {e}")
+            return content
+        max_age = _max_age(response.headers.get("Cache-Control"))
+        previous = self._index.get(key)
+        self._index[key] = {
+            "url": url,
+            "sha256": digest,
+            "size": len(content),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "expires": now + (DEFAULT_TTL if max_age is None else max_age),
+            "last_used": now,
+        }
+        # The URL's content changed: its old image file is no longer reachable
+        if previous and previous["sha256"] != digest and all(
+            entry["sha256"] != previous["sha256"] for entry in self._index.values()
+        ):
+            self._remove_object(previous["sha256"])
+        self._evict()
+        self._save_index()
+        return content
+
+    def get(self, url, session=None):
+        """
+        Return the content of an image, downloading it only when needed.
+
+        Args:
+            url (str): URL of the image.
+            session (requests.Session): Session used for network requests.
+                Defaults to the module-level ``requests`` functions.
+
+        Returns:
+            bytes: The image content, or None in offline mode if the image is
+            not cached.
+
+        Raises:
+            requests.exceptions.RequestException: If the download fails,
+                including an HTTP error status.
+        """
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            entry = self._index.get(key)
+            content = self._read_object(entry["sha256"]) if entry else None
+            if content is not None and (self.offline or now < entry["expires"]):
+                self._count("hits")
+                entry["last_used"] = now
+                self._save_index()
+                return content
+            if self.offline:
+                self._count("offline_misses")
+                return None
+            headers = {}
+            if content is not None:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+            self._count("requests")
+
+        response = (session or requests).get(url, headers=headers, timeout=TIMEOUT)
+        with self._lock:
+            if response.status_code == 304 and content is not None:
+                self._count("revalidated")
+                max_age = _max_age(response.headers.get("Cache-Control"))
+                entry["expires"] = now + (DEFAULT_TTL if max_age is None else max_age)
+                entry["last_used"] = now
+                self._save_index()
+                return content
+            response.raise_for_status()
+            self._count("misses")
+            return self._store(key, url, response, now)
+
+    @staticmethod
+    def hit_ratio(counts):
+        """
+        Return the share of lookups answered without downloading the image.
+
+        Args:
+            counts (dict): ``stats`` or ``totals``.
+
+        Returns:
+            float: Hits and revalidations divided by all lookups, 0.0 if none.
+        """
+        served = counts["hits"] + counts["revalidated"]
+        lookups = served + counts["misses"] + counts["offline_misses"]
+        return served / lookups if lookups else 0.0
+
+    def report(self, lifetime=False):
+        """
+        Return a one-line summary of the cache's activity and size.
+
+        Args:
+            lifetime (bool): Report the lifetime totals instead of this session's.
+
+        Returns:
+            str: Hits, revalidations, misses, network requests, hit ratio and size.
+        """
+        with self._lock:
+            counts = dict(self.totals if lifetime else self.stats)
+            sizes = {entry["sha256"]: entry["size"] for entry in self._index.values()}
+            entries = len(self._index)
+        return (
+            f"Image cache: {counts['hits']} hits, {counts['revalidated']} revalidated, "
+            f"{counts['misses']} misses, {counts['offline_misses']} offline misses, "
+            f"{counts['requests']} network requests, hit ratio {self.hit_ratio(counts):.0%}; "
+            f"{entries} URLs in {len(sizes)} files, {sum(sizes.values()) / 1024:.0f} KiB"
+        )
+
+    def clear(self):
+        """Remove every cached image and empty the index."""
+        with self._lock:
+            for entry in self._index.values():
+                self._remove_object(entry["sha256"])
+            self._index = {}
+            self._save_index()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in ("stats", "clear"):
+        print("Usage: python image_cache.py stats|clear")
+        sys.exit(1)
+
+    cache = ImageCache()
+    if sys.argv[1] == "clear":
+        cache.clear()
+        print("Image cache cleared.")
+    else:
+        print(cache.report(lifetime=True))
@@ -0,0 +1,253 @@
+# =================================================================
+#
+# Authors: Michael Jones <mjones467@student.umgc.edu>
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+# =================================================================
+
+"""
+Prefetch every state flower image into the image cache used by state_search.py.
+
+The URLs in STATES are deduplicated and downloaded concurrently by a thread pool
+through one shared requests.Session. The session's connection pool is sized to the
+per-host limit, and a semaphore per host keeps at most that many requests in flight
+to any one server, so connections to upload.wikimedia.org are kept alive and reused
+instead of being opened for every image.
+
+With --compare, the same URLs are also fetched one at a time with module-level
+requests.get, as state_search.py used to, and both wall times are reported. The
+concurrent pass then downloads into an empty temporary cache, so both passes
+measure real downloads rather than hits in the persistent cache.
+
+With --stub, the images are served by a local HTTP server that adds a fixed delay
+to every response, so the prefetch can be tried and timed without network access.
+Stub runs use a temporary cache directory.
+
+Usage:
+    python prefetch_images.py [--workers 8] [--per-host 4] [--compare]
+    python prefetch_images.py --stub [--delay 0.1] --compare
+"""
+
+import argparse
+import hashlib
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from image_cache import ImageCache, TIMEOUT
+from state_search import STATES
+
+
+def unique_urls(states):
+    """
+    Return the distinct image URLs of a states dictionary.
+
+    Args:
+        states (dict): State data with a 'URL' for each state.
+
+    Returns:
+        list: The distinct URLs, sorted.
+    """
+    return sorted({details["URL"] for details in states.values()})
+
+
+def make_session(per_host):
+    """
+    Create a requests.Session whose connection pools keep per_host connections.
+
+    Args:
+        per_host (int): Connections kept alive per host.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=per_host)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def prefetch(urls, cache, workers=8, per_host=4):
+    """
+    Download images into the cache concurrently through one shared session.
+
+    Args:
+        urls (list): Image URLs to fetch.
+        cache (ImageCache): The cache to fill.
+        workers (int): Number of download threads.
+        per_host (int): Maximum requests in flight to one host.
+
+    Returns:
+        tuple: The wall time in seconds and a dict of failed URLs and their errors.
+    """
+    host_limits = {}
+    failures = {}
+
+    def fetch(url, session):
+        with host_limits[urlsplit(url).netloc]:
+            cache.get(url, session=session)
+
+    for url in urls:
+        host_limits.setdefault(urlsplit(url).netloc, threading.BoundedSemaphore(per_host))
+
+    start = time.perf_counter()
+    with make_session(per_host) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch, url, session): url for url in urls}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except requests.exceptions.RequestException as e:
+                failures[futures[future]] = str(e)
+    return time.perf_counter() - start, failures
+
+
+def fetch_sequentially(urls):
+    """
+    Download images one at a time without a session, as state_search.py used to.
+
+    Args:
+        urls (list): Image URLs to fetch.
+
+    Returns:
+        tuple: The wall time in seconds and a dict of failed URLs and their errors.
+    """
+    failures = {}
+    start = time.perf_counter()
+    for url in urls:
+        try:
+            requests.get(url, timeout=TIMEOUT).raise_for_status()
+        except requests.exceptions.RequestException as e:
+            failures[url] = str(e)
+    return time.perf_counter() - start, failures
+
+
+class StubImageHandler(BaseHTTPRequestHandler):
+    """
+    Serve a small fake image for any path after a fixed delay, with keep-alive.
+
+    The delay and the connection counter are set on the server object by
+    `start_stub_server`.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        """Count each new connection before handling its requests."""
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer with a deterministic body and an ETag derived from the path."""
+        time.sleep(self.server.delay)
+        body = hashlib.sha256(self.path.encode("utf-8")).digest() * 512
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep the stub server quiet."""
+
+
+def start_stub_server(delay):
+    """
+    Start a local stub image server on a free port in a background thread.
+
+    Args:
+        delay (float): Seconds to wait before answering each request.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubImageHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.connections = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """
+    Parse the command line, prefetch the images and report the timings.
+    """
+    parser = argparse.ArgumentParser(description="Prefetch all state flower images.")
+    parser.add_argument("--workers", type=int, default=8, help="download threads (default: 8)")
+    parser.add_argument("--per-host", type=int, default=4,
+                        help="requests in flight and connections kept per host (default: 4)")
+    parser.add_argument("--compare", action="store_true",
+                        help="also time a sequential fetch without a session; "
+                             "uses a temporary cache")
+    parser.add_argument("--stub", action="store_true",
+                        help="fetch from a local stub server into a temporary cache")
+    parser.add_argument("--delay", type=float, default=0.1,
+                        help="stub server delay per request in seconds (default: 0.1)")
+    args = parser.parse_args()
+
+    urls = unique_urls(STATES)
+    print(f"{len(STATES)} states, {len(urls)} unique image URLs")
+
+    server = cache_dir = None
+    if args.stub:
+        server = start_stub_server(args.delay)
+        base = f"http://127.0.0.1:{server.server_port}"
+        urls = [base + urlsplit(url).path for url in urls]
+    if args.stub or args.compare:
+        cache_dir = tempfile.mkdtemp(prefix="image-cache-")
+    cache = ImageCache(cache_dir) if cache_dir else ImageCache()
+
+    try:
+        elapsed, failures = prefetch(urls, cache, args.workers, args.per_host)
+        connections = f", {server.connections} connections" if server else ""
+        print(f"Concurrent ({args.workers} threads, {args.per_host} per host): "
+              f"{elapsed:.2f}s{connections}")
+        print(cache.report())
+
+        if args.compare:
+            before = server.connections if server else 0
+            sequential, sequential_failures = fetch_sequentially(urls)
+            failures.update(sequential_failures)
+            connections = f", {server.connections - before} connections" if server else ""
+            print(f"Sequential (requests.get): {sequential:.2f}s{connections}")
+            print(f"Speed-up: {sequential / elapsed:.1f}x" if elapsed else "Speed-up: n/a")
+    finally:
+        if server:
+            server.shutdown()
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    for url, error in sorted(failures.items()):
+        print(f"Failed: {url}: {error}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+# =================================================================
+#
+# Authors: Michael Jones <mjones467@student.umgc.edu>
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+# =================================================================
+
+"""
+A search index over state names, codes and capitals for state_search.py.
+
+Names and capitals are normalized (case, accents, punctuation and spacing are
+ignored, so "new york", "NEW-YORK" and "St Paul" all match) and stored in a trie
+from every word onward, so "york" completes to New York and "city" to Carson City.
+Each trie node keeps its matches already ranked, so a completion costs one step
+per character of the query. Two-letter codes are matched exactly.
+
+When a query has no completion, the terms sharing enough trigrams with it to be
+within a few typos are compared by edit distance (adjacent transpositions count
+as one edit), both with the whole term and with its prefixes, so "Pensylvania",
+"new yrok" and "masachu" are still found.
+
+Results are ranked: exact matches, then completions (names before capitals,
+then shorter terms), then typo matches by distance. Each state appears once.
+
+Classes:
+    Match: One ranked search result.
+    StateIndex: The trie and trigram index over a states dictionary.
+
+Functions:
+    normalize: Reduce text to the form used for indexing and searching.
+    max_distance: Number of typos tolerated in a query of a given length.
+    edit_distances: Edit distance of a query to a term and to its best prefix.
+
+Usage:
+    python state_index.py QUERY [QUERY ...]
+    python state_index.py --bench [--repeat 2000]
+"""
+
+import argparse
+import re
+import time
+import unicodedata
+from collections import namedtuple
+
+FIELD_RANK = {"name": 0, "code": 1, "capital": 2}
+MIN_FUZZY_LENGTH = 3
+FUZZY_CANDIDATES = 8
+NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+Match = namedtuple("Match", "state field term kind distance")
+Match.__doc__ = """One search result.
+
+Attributes:
+    state (str): The state's name, a key of the states dictionary.
+    field (str): "name", "code" or "capital".
+    term (str): The normalized term that matched.
+    kind (str): "exact", "prefix" or "fuzzy".
+    distance (int): Edit distance for fuzzy matches, 0 otherwise.
+"""
+
+
+def normalize(text):
+    """
+    Reduce text to lowercase ASCII letters and digits separated by single spaces.
+
+    Args:
+        text (str): A state name, capital, code or query.
+
+    Returns:
+        str: The normalized text, e.g. "st paul" for "St. Paul".
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    ascii_text = decomposed.encode("ascii", "ignore").decode("ascii").lower()
+    return NON_ALNUM.sub(" ", ascii_text).strip()
+
+
+def _trigrams(text):
+    """Return the set of trigrams of text padded with spaces."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_distance(length):
+    """
+    Return the number of typos tolerated in a query of the given length.
+
+    Args:
+        length (int): Length of the normalized query.
+
+    Returns:
+        int: 1 up to 5 characters, 2 up to 10, 3 beyond.
+    """
+    if length <= 5:
+        return 1
+    return 2 if length <= 10 else 3
+
+
+def edit_distances(query, term, limit):
+    """
+    Compute the edit distance of a query to a term and to the term's closest prefix.
+
+    Insertions, deletions, substitutions and transpositions of adjacent characters
+    each count as one edit. Only cells within ``limit`` of the diagonal are
+    computed, and the computation stops once every distance is above the limit.
+
+    Args:
+        query (str): The normalized query.
+        term (str): The normalized term.
+        limit (int): Largest distance of interest.
+
+    Returns:
+        tuple: The distance to the whole term and the distance to its closest
+        prefix, each limit + 1 if it exceeds the limit.
+    """
+    too_far = limit + 1
+    length = len(term)
+    before = None
+    previous = [j if j <= limit else too_far for j in range(length + 1)]
+    for i in range(1, len(query) + 1):
+        char = query[i - 1]
+        low, high = max(1, i - limit), min(length, i + limit)
+        row = [too_far] * (length + 1)
+        if i <= limit:
+            row[0] = i
+        for j in range(low, high + 1):
+            term_char = term[j - 1]
+            best = previous[j - 1] if char == term_char else previous[j - 1] + 1
+            if previous[j] + 1 < best:
+                best = previous[j] + 1
+            if row[j - 1] + 1 < best:
+                best = row[j - 1] + 1
+            if (before is not None and j > 1 and char == term[j - 2]
+                    and query[i - 2] == term_char and before[j - 2] + 1 < best):
+                best = before[j - 2] + 1
+            row[j] = best if best < too_far else too_far
+        closest = min(row[low - 1:high + 1])
+        if closest > limit:
+            return too_far, too_far
+        before, previous = previous, row
+    return previous[length], closest
+
+
+class _TrieNode:
+    """A trie node with the entries ending here and all entries below, ranked."""
+
+    __slots__ = ("children", "exact", "ranked")
+
+    def __init__(self):
+        self.children = {}
+        self.exact = []
+        self.ranked = []
+
+
+class StateIndex:
+    """
+    A prefix trie and trigram index over the names, codes and capitals of states.
+
+    Attributes:
+        size (int): Number of indexed terms, counting each word-suffix once.
+    """
+
+    def __init__(self, states):
+        """
+        Build the index.
+
+        Args:
+            states (dict): State data keyed by name, with 'CODE' and 'CAPITAL'.
+        """
+        self.size = 0
+        self._root = _TrieNode()
+        self._codes = {}
+        self._terms = []
+        self._grams = {}
+        self.build(states)
+
+    def build(self, states):
+        """
+        Rebuild the index from a states dictionary, e.g. after a capital changed.
+
+        Args:
+            states (dict): State data keyed by name, with 'CODE' and 'CAPITAL'.
+        """
+        root = _TrieNode()
+        codes = {}
+        terms = []
+        grams = {}
+        for state, details in states.items():
+            if details.get("CODE"):
+                codes[normalize(details["CODE"])] = state
+            for field, text in (("name", state), ("capital", details.get("CAPITAL", ""))):
+                words = normalize(text).split()
+                # Index the term from each word onward, so later words complete too
+                for position in range(len(words)):
+                    term = " ".join(words[position:])
+                    rank = (position > 0, FIELD_RANK[field], len(term), state)
+                    entry = (rank, Match(state, field, term, "prefix", 0))
+                    node = root
+                    node.ranked.append(entry)
+                    for char in term:
+                        node = node.children.setdefault(char, _TrieNode())
+                        node.ranked.append(entry)
+                    if position == 0:
+                        node.exact.append(entry[1]._replace(kind="exact"))
+                    term_id = len(terms)
+                    terms.append(entry)
+                    for gram in _trigrams(term):
+                        grams.setdefault(gram, []).append(term_id)
+
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node.ranked = [match for _, match in sorted(node.ranked)]
+            node.exact.sort(key=lambda match: FIELD_RANK[match.field])
+            stack.extend(node.children.values())
+
+        self._root, self._codes, self._terms, self._grams = root, codes, terms, grams
+        self.size = len(terms)
+
+    def _fuzzy(self, query):
+        """Return fuzzy matches for a normalized query, best first."""
+        limit = max_distance(len(query))
+        query_grams = _trigrams(query)
+        counts = {}
+        for gram in query_grams:
+            for term_id in self._grams.get(gram, ()):
+                counts[term_id] = counts.get(term_id, 0) + 1
+        # Each edit changes at most three trigrams, and matching a prefix loses
+        # the one that ends the query
+        needed = len(query_grams) - 3 * limit - 1
+        candidates = sorted(
+            (term_id for term_id, count in counts.items() if count >= needed),
+            key=counts.get, reverse=True,
+        )[:FUZZY_CANDIDATES]
+
+        found = []
+        for term_id in candidates:
+            rank, match = self._terms[term_id]
+            if len(query) - len(match.term) > limit:
+                continue
+            whole, prefix = edit_distances(query, match.term, limit)
+            # A typo in a partly typed term ranks just after the same typo in a whole one
+            distance = min(whole, prefix)
+            if distance <= limit:
+                found.append(((distance, whole > distance, -counts[term_id], rank),
+                              match._replace(kind="fuzzy", distance=distance)))
+                # Only terms at least as close are of interest from now on
+                limit = distance
+        return [match for _, match in sorted(found) if match.distance <= limit]
+
+    def search(self, query, limit=5):
+        """
+        Return the states matching a name, code or capital, best first.
+
+        Args:
+            query (str): Full or partial name, code or capital, possibly misspelled.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: Up to ``limit`` Match tuples, one per state.
+        """
+        text = normalize(query)
+        if not text or limit <= 0:
+            return []
+
+        results = []
+        seen = set()
+
+        def add(matches):
+            for match in matches:
+                if match.state not in seen:
+                    seen.add(match.state)
+                    results.append(match)
+                    if len(results) == limit:
+                        return True
+            return False
+
+        code_state = self._codes.get(text)
+        if code_state and add([Match(code_state, "code", text, "exact", 0)]):
+            return results
+
+        node = self._root
+        for char in text:
+            node = node.children.get(char)
+            if node is None:
+                break
+        else:
+            if add(node.exact) or add(node.ranked):
+                return results
+
+        # Typos are only looked for when nothing else matches
+        if not results and len(text) >= MIN_FUZZY_LENGTH:
+            add(self._fuzzy(text))
+        return results
+
+    def lookup(self, query):
+        """
+        Return the best match for a query.
+
+        Args:
+            query (str): Full or partial name, code or capital, possibly misspelled.
+
+        Returns:
+            Match: The best match, or None if nothing matches.
+        """
+        results = self.search(query, limit=1)
+        return results[0] if results else None
+
+
+BENCH_QUERIES = (
+    "new york", "NY", "ca", "north", "new", "city", "st. paul", "Pensylvania",
+    "new yrok", "masachusets", "conneticut", "missisipi", "tallahasee", "xyzzy",
+)
+
+
+def main():
+    """
+    Print the ranked matches for each query, or time a set of sample queries.
+    """
+    # Imported here so importing this module does not load the states data
+    from state_search import STATES  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="Search the states by name, code or capital.")
+    parser.add_argument("queries", nargs="*", help="names, codes or capitals to look up")
+    parser.add_argument("--limit", type=int, default=5, help="results per query (default: 5)")
+    parser.add_argument("--bench", action="store_true", help="time a set of sample queries")
+    parser.add_argument("--repeat", type=int, default=2000,
+                        help="searches per sample query with --bench (default: 2000)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = StateIndex(STATES)
+    built = time.perf_counter() - start
+    print(f"Indexed {index.size} terms of {len(STATES)} states in {built * 1000:.2f} ms")
+
+    for query in args.queries:
+        matches = index.search(query, args.limit)
+        found = ", ".join(
+            f"{m.state} ({m.field} {m.kind}{f' d={m.distance}' if m.distance else ''})"
+            for m in matches
+        )
+        print(f"{query!r}: {found or 'no match'}")
+
+    if args.bench:
+        for query in BENCH_QUERIES:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                matches = index.search(query, args.limit)
+            elapsed = (time.perf_counter() - start) / args.repeat
+            best = matches[0].state if matches else "-"
+            print(f"{query!r:>16}: {elapsed * 1e6:7.1f} us  -> {best}")
+
+
+if __name__ == "__main__":
+    main()
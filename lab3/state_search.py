@@ -19,8 +19,14 @@ It includes functionalities to read state data, validate the data integrity, upd
 state details, display state-related statistics, and interact with users through a
 command-line interface.
 
+Flower images are kept in a disk cache (see image_cache.py); run the script with
+--offline to use only cached images. States are looked up through a search index
+(see state_index.py), so names, codes and capitals can be typed in any case, in
+part or with typos.
+
 Functions include:
-- Reading and converting state data from CSV to JSON.
+- Loading the state data generated by csv2dict.py from states.json, through a
+  binary cache that is rebuilt only when the JSON file changes.
 - Validating state data for completeness and correct data type.
 - Displaying state details like capital, population, and state flower.
 - Plotting population statistics in a bar graph.
@@ -35,366 +41,117 @@ Note:
     'requests' for network operations.
 """
 
+import hashlib
+import json
+import marshal
+import os
 import sys
+import tempfile
 from io import BytesIO
 import matplotlib.pyplot as plt
 import requests
 from PIL import Image
+from image_cache import ImageCache
+from state_index import StateIndex
 
-STATES = {
-    "Alabama": {
-      "CODE": "AL",
-      "CAPITAL": "Montgomery",
-      "POPULATION": 196010,
-      "FLOWER": "Camellia",
-      "URL": "https://upload.wikimedia.org/wikipedia/commons/9/96/Camellia_japonica_flower_2.jpg"
-    },
-    "Alaska": {
-      "CODE": "AK",
-      "CAPITAL": "Juneau",
-      "POPULATION": 31534,
-      "FLOWER": "Forget-me-not",
-      "URL": "https://upload.wikimedia.org/wikipedia/commons/5/5f/Forget-me-not_close_600.jpg"
-    },
-    "Arizona": {
-        "CODE": "AZ",
-        "CAPITAL": "Phoenix",
-        "POPULATION": 1651344,
-        "FLOWER": "Saguaro Cactus Blossom",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/f/f1/Carnegiea_gigantea_%28Saguaro_cactus%29_blossoms.jpg"
-    },
-    "Arkansas": {
-        "CODE": "AR",
-        "CAPITAL": "Little Rock",
-        "POPULATION": 201029,
-        "FLOWER": "Apple Blossom",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/f/f9/Appletree_bloom_l.jpg"
-    },
-    "California": {
-        "CODE": "CA",
-        "CAPITAL": "Sacramento",
-        "POPULATION": 528306,
-        "FLOWER": "California Poppy",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/e/ec/California_poppy.jpg"
-    },
-    "Colorado": {
-        "CODE": "CO",
-        "CAPITAL": "Denver",
-        "POPULATION": 699288,
-        "FLOWER": "Rocky Mountain Columbine",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/9/94/Aquilegia_caerulea.jpg"
-    },
-    "Connecticut": {
-        "CODE": "CT",
-        "CAPITAL": "Hartford",
-        "POPULATION": 119817,
-        "FLOWER": "Mountain Laurel",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/e/e0/Kalmia_latifolia2.jpg"
-    },
-    "Delaware": {
-        "CODE": "DE",
-        "CAPITAL": "Dover",
-        "POPULATION": 37892,
-        "FLOWER": "Peach Blossom",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/f/f2/Peach_flowers.jpg"
-    },
-    "Florida": {
-        "CODE": "FL",
-        "CAPITAL": "Tallahassee",
-        "POPULATION": 198631,
-        "FLOWER": "Orange Blossom",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/b/b0/OrangeBloss_wb.jpg"
-    },
-    "Georgia": {
-        "CODE": "GA",
-        "CAPITAL": "Atlanta",
-        "POPULATION": 490270,
-        "FLOWER": "Cherokee Rose",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/8/8c/Cherokee_rose.jpg"
-    },
-    "Hawaii": {
-        "CODE": "HI",
-        "CAPITAL": "Honolulu",
-        "POPULATION": 337088,
-        "FLOWER": "Hibiscus",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/9/9a/Maohauhele.jpg"
-    },
-    "Idaho": {
-      "CODE": "ID",
-      "CAPITAL": "Boise",
-      "POPULATION": 240713,
-      "FLOWER": "Syringa",
-      "URL": "https://upload.wikimedia.org/wikipedia/commons/4/49/Lewis%27s_Mock-orange_NFUW_-_Umatilla_NF_Oregon.jpg"
-    },
-    "Illinois": {
-        "CODE": "IL",
-        "CAPITAL": "Springfield",
-        "POPULATION": 111711,
-        "FLOWER": "Violet",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/3/30/Viola_sororia.jpg"
-    },
-    "Indiana": {
-        "CODE": "IN",
-        "CAPITAL": "Indianapolis",
-        "POPULATION": 871449,
-        "FLOWER": "Peony",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/2/23/Paeonia_19.jpg"
-    },
-    "Iowa": {
-        "CODE": "IA",
-        "CAPITAL": "Des Moines",
-        "POPULATION": 208734,
-        "FLOWER": "Wild Rose",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/e/e7/Rosa_arkansana.jpg"
-    },
-    "Kansas": {
-        "CODE": "KS",
-        "CAPITAL": "Topeka",
-        "POPULATION": 125353,
-        "FLOWER": "Sunflower",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/a/a9/A_sunflower.jpg"
-    },
-    "Kentucky": {
-        "CODE": "KY",
-        "CAPITAL": "Frankfort",
-        "POPULATION": 28523,
-        "FLOWER": "Goldenrod",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/a/a6/Solidago_virgaurea_minuta0.jpg"
-    },
-    "Louisiana": {
-        "CODE": "LA",
-        "CAPITAL": "Baton Rouge",
-        "POPULATION": 217665,
-        "FLOWER": "Magnolia",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/7/78/Magnolia_flower_Duke_campus.jpg"
-    },
-    "Maine": {
-        "CODE": "ME",
-        "CAPITAL": "Augusta",
-        "POPULATION": 19058,
-        "FLOWER": "White Pine",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/8/8d/Pinus_strobus_cones.JPG"
-    },
-    "Maryland": {
-        "CODE": "MD",
-        "CAPITAL": "Annapolis",
-        "POPULATION": 40397,
-        "FLOWER": "Black-eyed Susan",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/5/5f/Rudbeckia_hirta_Indian_Summer.JPG"
-    },
-    "Massachusett": {
-        "CODE": "MA",
-        "CAPITAL": "Boston",
-        "POPULATION": 617459,
-        "FLOWER": "Mayflower",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/d/d3/Trailing_arbutus.jpg"
-    },
-    "Michigan": {
-        "CODE": "MI",
-        "CAPITAL": "Lansing",
-        "POPULATION": 112460,
-        "FLOWER": "Apple Blossom",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/f/f9/Appletree_bloom_l.jpg"
-    },
-    "Minnesota": {
-        "CODE": "MN",
-        "CAPITAL": "St. Paul",
-        "POPULATION": 299830,
-        "FLOWER": "Pink and White Lady's Slipper",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/a/ab/Cypripedium_reginae_Orchi_004.jpg"
-    },
-    "Mississippi": {
-        "CODE": "MS",
-        "CAPITAL": "Jackson",
-        "POPULATION": 143776,
-        "FLOWER": "Magnolia",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/7/78/Magnolia_flower_Duke_campus.jpg"
-    },
-    "Missouri": {
-        "CODE": "MO",
-        "CAPITAL": "Jefferson City",
-        "POPULATION": 42535,
-        "FLOWER": "Hawthorn",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/4/47/%28MHNT%29_Crataegus_monogyna_-_flowers_and_buds.jpg"
-    },
-    "Montana": {
-        "CODE": "MT",
-        "CAPITAL": "Helena",
-        "POPULATION": 34690,
-        "FLOWER": "Bitterroot",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/d/d0/Lewisia_rediviva_4.jpg"
-    },
-    "Nebraska": {
-        "CODE": "NE",
-        "CAPITAL": "Lincoln",
-        "POPULATION": 295222,
-        "FLOWER": "Goldenrod",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/a/a6/Solidago_virgaurea_minuta0.jpg"
-    },
-    "Nevada": {
-        "CODE": "NV",
-        "CAPITAL": "Carson City",
-        "POPULATION": 59630,
-        "FLOWER": "Sagebrush",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/6/60/Sagebrush.jpg"
-    },
-    "New Hampshi": {
-        "CODE": "NH",
-        "CAPITAL": "Concord",
-        "POPULATION": 44606,
-        "FLOWER": "Purple Lilac",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/2/2c/Lilac_%282%29.jpg"
-    },
-    "New Jersey": {
-        "CODE": "NJ",
-        "CAPITAL": "Trenton",
-        "POPULATION": 90048,
-        "FLOWER": "Purple Violet",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/3/30/Viola_sororia.jpg"
-    },
-    "New Mexico": {
-        "CODE": "NM",
-        "CAPITAL": "Santa Fe",
-        "POPULATION": 89220,
-        "FLOWER": "Yucca",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/5/56/Yucca_filamentosa.jpg"
-    },
-    "New York": {
-        "CODE": "NY",
-        "CAPITAL": "Albany",
-        "POPULATION": 97593,
-        "FLOWER": "Rose",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/7/7c/Rosa_sp.163.jpg"
-    },
-    "North Carolin": {
-      "CODE": "NC",
-      "CAPITAL": "Raleigh",
-      "POPULATION": 472540,
-      "FLOWER": "Dogwood",
-      "URL": "https://upload.wikimedia.org/wikipedia/commons/e/e9/Flowering_Dogwood_Cornus_florida_Yellow_Flowers_3008px.JPG"
-    },
-    "North Dakota": {
-        "CODE": "ND",
-        "CAPITAL": "Bismarck",
-        "POPULATION": 75073,
-        "FLOWER": "Wild Prairie Rose",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/e/e7/Rosa_arkansana.jpg"
-    },
-    "Ohio": {
-        "CODE": "OH",
-        "CAPITAL": "Columbus",
-        "POPULATION": 907865,
-        "FLOWER": "Scarlet Carnation",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/d/d1/Red_Carnation_NGM_XXXI_p507.jpg"
-    },
-    "Oklahoma": {
-        "CODE": "OK",
-        "CAPITAL": "Oklahoma City",
-        "POPULATION": 697763,
-        "FLOWER": "Oklahoma Rose",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/c/ca/Rose%2C_Oklahoma_-_Flickr_-_nekonomania.jpg"
-    },
-    "Oregon": {
-      "CODE": "OR",
-      "CAPITAL": "Salem",
-      "POPULATION": 181620,
-      "FLOWER": "Oregon Grape",
-      "URL": "https://upload.wikimedia.org/wikipedia/commons/8/87/%28MHNT%29_Berberis_aquifolium_inflorecences_and_buds.jpg"
-    },
-    "Pennsylvania": {
-        "CODE": "PA",
-        "CAPITAL": "Harrisburg",
-        "POPULATION": 50267,
-        "FLOWER": "Mountain Laurel",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/e/e0/Kalmia_latifolia2.jpg"
-    },
-    "Rhode Island": {
-        "CODE": "RI",
-        "CAPITAL": "Providence",
-        "POPULATION": 188877,
-        "FLOWER": "Violet",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/3/30/Viola_sororia.jpg"
-    },
-    "South Carolina": {
-        "CODE": "SC",
-        "CAPITAL": "Columbia",
-        "POPULATION": 137996,
-        "FLOWER": "Yellow Jessamine",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/1/19/Gelsemium_sempervirensCDP140CA.jpg"
-    },
-    "South Dakota": {
-        "CODE": "SD",
-        "CAPITAL": "Pierre",
-        "POPULATION": 13954,
-        "FLOWER": "Pasque Flower",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/b/ba/Pulsatilla_vulgaris-700px.jpg"
-    },
-    "Tennessee": {
-        "CODE": "TN",
-        "CAPITAL": "Nashville",
-        "POPULATION": 658525,
-        "FLOWER": "Iris",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/a/ab/Iris_%27Gene_Wild%27_2007-05-13_383.jpg"
-    },
-    "Texas": {
-        "CODE": "TX",
-        "CAPITAL": "Austin",
-        "POPULATION": 966292,
-        "FLOWER": "Bluebonnet",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/3/33/Texas_Bluebonnet_%28Lupinus_texensis%29.jpg"
-    },
-    "Utah": {
-        "CODE": "UT",
-        "CAPITAL": "Salt Lake City",
-        "POPULATION": 202272,
-        "FLOWER": "Sego Lily",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/0/01/Sego_lily_cm.jpg"
-    },
-    "Vermont": {
-        "CODE": "VT",
-        "CAPITAL": "Montpelier",
-        "POPULATION": 7988,
-        "FLOWER": "Red Clover",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/5/56/Red_clover_closeup.jpg"
-    },
-    "Virginia": {
-        "CODE": "VA",
-        "CAPITAL": "Richmond",
-        "POPULATION": 226472,
-        "FLOWER": "American Dogwood",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/5/5a/Benthamidia_florida2.jpg"
-    },
-    "Washington": {
-        "CODE": "WA",
-        "CAPITAL": "Olympia",
-        "POPULATION": 56510,
-        "FLOWER": "Western Rhododendron",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/b/b8/Rhododendron_macrophyllum.JPG"
-    },
-    "West Virginia": {
-      "CODE": "WV",
-      "CAPITAL": "Charleston",
-      "POPULATION": 46692,
-      "FLOWER": "Rhododendron",
-      "URL": "https://upload.wikimedia.org/wikipedia/commons/7/75/Rhododendron-by-eiffel-public-domain-20040617.jpg"
-    },
-    "Wisconsin": {
-        "CODE": "WI",
-        "CAPITAL": "Madison",
-        "POPULATION": 269897,
-        "FLOWER": "Wood Violet",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/3/30/Viola_sororia.jpg"
-    },
-    "Wyoming": {
-        "CODE": "WY",
-        "CAPITAL": "Cheyenne",
-        "POPULATION": 64831,
-        "FLOWER": "Indian Paintbrush",
-        "URL": "https://upload.wikimedia.org/wikipedia/commons/7/79/Indian_Paintbrush_in_Grand_Teton_NP-NPS.jpg"
-    }
-}
+STATES_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "states.json")
+CACHE_VERSION = 1
+
+
+def _read_cache(cache_file):
+    """
+    Read a state data cache file written by `_write_cache`.
+
+    Args:
+        cache_file (str): Path to the cache file.
+
+    Returns:
+        tuple: (version, mtime_ns, size, sha256, states, code_lookup), or None if
+        the file is missing or unreadable.
+    """
+    try:
+        with open(cache_file, "rb") as cache:
+            entry = marshal.loads(cache.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(entry, tuple) or len(entry) != 6 or entry[0] != CACHE_VERSION:
+        return None
+    return entry
+
+
+def _write_cache(cache_file, entry):
+    """
+    Write a state data cache file atomically, ignoring failures.
+
+    Args:
+        cache_file (str): Path to the cache file.
+        entry (tuple): (version, mtime_ns, size, sha256, states, code_lookup).
+    """
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".states-", dir=os.path.dirname(os.path.abspath(cache_file))
+        )
+        with os.fdopen(fd, "wb") as cache:
+            cache.write(marshal.dumps(entry))
+        os.replace(tmp_path, cache_file)
+    except OSError as e:
+        print(f"Warning: could not write the states cache {cache_file}: {e}")
+
+
+def load_states(json_file=STATES_JSON, cache_file=None):
+    """
+    Load the state data generated by csv2dict.py, through a binary cache.
+
+    The parsed data and the code-to-name lookup are kept in a marshal file next
+    to the JSON file. The cache is used as is while the JSON file's modification
+    time and size are unchanged; otherwise the JSON file's SHA-256 digest is
+    compared with the cached one, and the JSON is only parsed again, and the
+    cache rewritten, if its content changed.
+
+    Args:
+        json_file (str): Path to the JSON file written by csv2dict.py.
+        cache_file (str): Path to the cache file. Defaults to the JSON file's
+            path with a ``.cache`` suffix.
+
+    Returns:
+        tuple: The STATES dictionary and the STATE_CODE_LOOKUP dictionary, both
+        empty if the JSON file cannot be read, with an error message printed.
+    """
+    cache_file = cache_file or json_file + ".cache"
+    try:
+        stat = os.stat(json_file)
+        entry = _read_cache(cache_file)
+        if entry and entry[1:3] == (stat.st_mtime_ns, stat.st_size):
+            return entry[4], entry[5]
+
+        with open(json_file, "rb") as source:
+            data = source.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry and entry[3] == digest:
+            states, code_lookup = entry[4], entry[5]
+        else:
+            states = json.loads(data)
+            code_lookup = {details["CODE"]: state for state, details in states.items()}
+    except (OSError, ValueError) as e:
+        print(f"Error: could not load the states data from {json_file}: {e}")
+        return {}, {}
+    except KeyError as e:
+        print(f"KeyError: Missing key in states data - {e}")
+        return {}, {}
+
+    _write_cache(cache_file, (CACHE_VERSION, stat.st_mtime_ns, stat.st_size, digest,
+                              states, code_lookup))
+    return states, code_lookup
+
+
+STATES, STATE_CODE_LOOKUP = load_states()
+
+# Flower images are downloaded once and then served from disk; run with
+# --offline to never use the network
+IMAGE_CACHE = ImageCache()
 
-STATE_CODE_LOOKUP = {details["CODE"]: state for state, details in STATES.items()}
+# Names, codes and capitals, normalized for case-insensitive, typo-tolerant lookup
+STATE_INDEX = StateIndex(STATES)
 
 
 def validate_states_data():
@@ -462,27 +219,47 @@ def get_state_name_from_code(code):
         print(f"State code '{code}' not found.")
         return None
 
+
+def find_state(identifier):
+    """
+    Find the state best matching a name, code or capital typed by the user.
+
+    When the identifier is not an exact match, the state chosen and any other
+    candidates are printed, so a guessed state is never used silently.
+
+    Args:
+        identifier (str): Full or partial state name, code or capital, possibly
+            misspelled.
+
+    Returns:
+        str: State name or None if nothing matches, with an error message printed.
+    """
+    matches = STATE_INDEX.search(identifier)
+    if not matches:
+        print("State not found.")
+        return None
+
+    best = matches[0]
+    if best.kind != "exact":
+        print(f"Showing results for {best.state}.")
+        if len(matches) > 1:
+            print(f"Other matches: {', '.join(match.state for match in matches[1:])}")
+    return best.state
+
+
 def search_state():
     """
-    Search and display details of a state based on user input (name or code).
+    Search and display details of a state based on user input (name, code or capital).
 
-    The function handles state lookup, details display, and attempts to display
-    an image of the state's flower.
+    The function looks the state up in STATE_INDEX, displays its details, and
+    attempts to display an image of the state's flower.
 
     Exceptions:
         General exception: Prints an error message for search or data retrieval issues.
     """
     try:
-        identifier = input("Enter state name or 2-letter code: ").strip()
-
-        # Check if the input is a two-letter code
-        if len(identifier) == 2:
-            state_name = get_state_name_from_code(identifier)
-            if not state_name:
-                print("State code not found.")
-                return
-        else:
-            state_name = identifier.capitalize()
+        identifier = input("Enter state name, 2-letter code or capital: ").strip()
+        state_name = find_state(identifier)
 
         if state_name in STATES:
             state_info = STATES[state_name]
@@ -492,8 +269,6 @@ def search_state():
                 f"Population: {formatted_population}, Flower: {state_info['FLOWER']}"
             )
             display_state_flower_image(state_name)
-        else:
-            print("State not found.")
 
     except KeyError as e:
         print(f"Key error occurred: {e}")
@@ -580,6 +355,10 @@ def add_or_update_state(state_name, **kwargs):
             if not update_actions[key](value):
                 return False
 
+    # Capitals are indexed for lookup, so the index must follow a change
+    if kwargs.get("capital"):
+        STATE_INDEX.build(STATES)
+
     return validate_states_data()
 
 
@@ -593,12 +372,8 @@ def update_population():
     Exceptions:
         ValueError: Handles invalid numeric input for population.
     """
-    identifier = input("Enter state name or 2-letter code: ").strip()
-    state_name = (
-        get_state_name_from_code(identifier)
-        if len(identifier) == 2
-        else identifier.capitalize()
-    )
+    identifier = input("Enter state name, 2-letter code or capital: ").strip()
+    state_name = find_state(identifier)
 
     if state_name in STATES:
         try:
@@ -614,14 +389,15 @@ def update_population():
 
         except ValueError:
             print("Invalid input: Population must be a numeric value.")
-    else:
-        print("State not found.")
 
 
 def display_state_flower_image(state_name):
     """
     Display the image of a state's flower given its name.
 
+    The image is taken from IMAGE_CACHE, which only downloads it when it is not
+    cached or its cached copy has expired.
+
     Args:
         state_name (str): Name of the state.
 
@@ -641,25 +417,28 @@ def display_state_flower_image(state_name):
         return
 
     try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            try:
-                img = Image.open(BytesIO(response.content))
-                plt.imshow(img)
-                plt.axis("off")  # Turn off axis numbers
-                plt.show()
-            except IOError:
-                print(f"Failed to open the image from {url}. The file may not be an image or might be corrupted.")
-        else:
-            print(f"Failed to download the image from {url}. HTTP status code: {response.status_code}")
+        content = IMAGE_CACHE.get(url)
+        if content is None:
+            print(f"The image from {url} is not cached and offline mode is on.")
+            return
+        try:
+            img = Image.open(BytesIO(content))
+            plt.imshow(img)
+            plt.axis("off")  # Turn off axis numbers
+            plt.show()
+        except IOError:
+            print(f"Failed to open the image from {url}. The file may not be an image or might be corrupted.")
+    except requests.exceptions.HTTPError as e:
+        print(f"Failed to download the image from {url}. HTTP status code: {e.response.status_code}")
     except requests.exceptions.RequestException:
         print(f"Failed to download the image from {url} due to a network error.")
 
 
 def exit_program():
     """
-    Print a farewell message and terminate the program execution.
+    Print the image cache statistics and a farewell message, then terminate the program execution.
     """
+    print(IMAGE_CACHE.report())
     print("Exiting the program. Goodbye!")
     sys.exit()
 
@@ -704,11 +483,13 @@ def main():
             print("Network error: Failed to perform a network request.")
         except KeyboardInterrupt:
             print("\nProgram interrupted by the user. Exiting...")
+            print(IMAGE_CACHE.report())
             break
 
 
 if __name__ == "__main__":
-    if validate_states_data():  # Ensure the states data is valid before starting the program
+    IMAGE_CACHE.offline = "--offline" in sys.argv[1:]
+    if STATES and validate_states_data():  # Ensure the states data is valid before starting the program
         main()
     else:
         print("The states data failed validation and the program cannot start.")
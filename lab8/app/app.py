@@ -14,8 +14,11 @@ hashed passwords are stored in the database for security.
 
 Functions:
     check_password_complexity: Validate password complexity.
+    is_common_password: Check a password against the cached common-password list.
     register: Handle user registration.
     login: Authenticate users and manage sessions.
+    rehash_if_needed: Upgrade a stored password hash to the configured policy.
+    hashing_pool_saturated: Answer 503 when the password hashing pool is full.
     require_login: Restrict access to certain routes for non-authenticated users.
     index: Render the index page.
     overview: Render an overview page about Demon Slayer.
@@ -27,27 +30,116 @@ Running this script directly starts the Flask application.
 """
 
 # Standard library imports
+import concurrent.futures
 from datetime import datetime
 import logging
 import os
-import re
-import secrets
 import sqlite3
 
 # Related third-party imports
 from flask import Flask, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
+
+# Local application imports
+import assets
+from blocklist import PasswordBlocklist
+from breach_index import BreachIndex
+import db
+from hashing import HashingPool, HashingPoolSaturated
+from logging_setup import configure_logging
+import metrics
+import migrations
+from page_cache import PageCache
+import password_policy
+from ratelimit import LoginRateLimiter
+import sessions
+import template_cache
+import tracing
+import warmup
 
 app = Flask(__name__)
 
-# Logging configuration
-logging.basicConfig(
-    filename="logs/app.log",
-    level=logging.DEBUG,
-    format="%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]",
+# Logging configuration: LOG_MODE=queue hands records to a single writer process
+configure_logging(
+    filename=os.environ.get("LOG_FILE", "logs/app.log"),
+    level=os.environ.get("LOG_LEVEL", "DEBUG"),
+    mode=os.environ.get("LOG_MODE", "sync"),
+)
+
+# Instrumentation: per-endpoint and hot-path latency histograms served at /metrics.
+# Registered first so its before_request hook runs ahead of require_login.
+metrics.registry.configure(directory=os.environ.get("METRICS_DIR", "logs/metrics"))
+metrics.init_app(app)
+
+# Request IDs and per-request spans: every log line written during a request
+# ends with [req <id>], and one summary line is logged per sampled request
+tracing.init_app(
+    app,
+    sample_rate=float(os.environ.get("TRACE_SAMPLE_RATE", 1.0)),
+    slow_ms=float(os.environ.get("TRACE_SLOW_MS", 500)),
+)
+
+# Fingerprinted static assets built by assets.py, linked through asset_url()
+assets.init_app(app)
+
+# Compiled templates are cached on disk, so restarted processes skip parsing
+# them; TEMPLATE_CACHE=0 disables it. Fill it ahead of time with template_cache.py
+if os.environ.get("TEMPLATE_CACHE", "1") == "1":
+    template_bytecode_cache = template_cache.init_app(app, os.environ.get("TEMPLATE_CACHE_DIR"))
+    metrics.registry.register_collector("template_cache", template_bytecode_cache.stats)
+
+# Session signing key shared by every worker and kept across restarts
+app.secret_key = sessions.load_secret_key(
+    os.environ.get("SECRET_KEY_FILE", os.path.join(app.instance_path, "secret_key"))
 )
 
-app.secret_key = secrets.token_hex(32)  # Set a secret key for session management
+# SESSION_BACKEND=sqlite keeps session data server-side; the cookie holds only an id
+if os.environ.get("SESSION_BACKEND", "cookie") == "sqlite":
+    app.session_interface = sessions.SQLiteSessionInterface(
+        os.environ.get("SESSION_DB", "sessions.db"),
+        ttl=int(os.environ.get("SESSION_TTL", 24 * 60 * 60)),
+    )
+
+# Database configuration: one reused WAL-mode connection per worker thread
+app.config["DATABASE"] = os.environ.get("USERS_DB", "users.db")
+db.init_app(app)
+
+# Password hashing runs in a bounded process pool, off the request threads.
+# Each uwsgi worker has its own pool, so unless HASH_WORKERS and
+# HASH_MAX_IN_FLIGHT are set the pool takes its share of the CPUs and accepts
+# no more jobs than it can run at once (see hashing.HashingPool)
+hash_pool = HashingPool(
+    max_workers=int(os.environ.get("HASH_WORKERS", 0)) or None,
+    max_in_flight=int(os.environ.get("HASH_MAX_IN_FLIGHT", 0)) or None,
+    method=os.environ.get("PASSWORD_HASH_METHOD", "scrypt"),
+)
+
+# Failed logins are counted per IP and username in a store shared by all workers
+login_limiter = LoginRateLimiter(
+    os.environ.get("RATELIMIT_DB", "ratelimit.db"),
+    window=int(os.environ.get("LOGIN_WINDOW_SECONDS", 300)),
+    ip_limit=int(os.environ.get("LOGIN_IP_LIMIT", 20)),
+    user_limit=int(os.environ.get("LOGIN_USER_LIMIT", 10)),
+)
+
+# Content pages are rendered at most once per time bucket and support 304s
+page_cache = PageCache(bucket_seconds=int(os.environ.get("PAGE_CACHE_SECONDS", 60)))
+
+# Common passwords are loaded once per worker and reloaded when the file changes
+common_passwords = PasswordBlocklist("CommonPassword.txt")
+
+# BREACH_INDEX points at an index built by breach_index.py; it is mmap'd and
+# shared through the page cache by every worker
+breach_index = BreachIndex(os.environ["BREACH_INDEX"]) if os.environ.get("BREACH_INDEX") else None
+
+for collector_name, component in [
+    ("hash_pool", hash_pool),
+    ("login_limiter", login_limiter),
+    ("page_cache", page_cache),
+    ("blocklist", common_passwords),
+]:
+    metrics.registry.register_collector(collector_name, component.stats)
+if breach_index is not None:
+    metrics.registry.register_collector("breach_index", breach_index.stats)
 
 
 # Password complexity check function
@@ -58,7 +150,8 @@ def check_password_complexity(password):
     Validates the password against several criteria: length (must be at least 
     12 characters), inclusion of lowercase and uppercase letters, inclusion 
     of digits, and inclusion of special characters (underscore, at sign, or 
-    dollar sign).
+    dollar sign). The rules themselves are defined in ``password_policy``
+    and shared with the batch audit tool.
 
     Args:
         password (str): The password string to be checked.
@@ -66,32 +159,25 @@ def check_password_complexity(password):
     Returns:
         bool: True if the password meets all complexity requirements, False otherwise.
     """
-    if len(password) < 12:
-        logging.warning("Password complexity check failed: Length less than 12 characters")
+    failures = password_policy.failed_rules(password, first_only=True)
+    if failures:
+        logging.warning("Password complexity check failed: %s",
+                        password_policy.describe(failures[0]))
         return False
 
-    complexity_criteria = [
-        ('[a-z]', "lowercase letter"),
-        ('[A-Z]', "uppercase letter"),
-        ('[0-9]', "digit"),
-        ('[_@$]', "special character (_, @, $)")
-    ]
-
-    for pattern, criterion in complexity_criteria:
-        if not re.search(pattern, password):
-            logging.warning("Password complexity check failed: missing %s", criterion)
-            return False
-
     return True
 
 def is_common_password(password):
     """
     Check if the given password is a common password.
 
-    This function reads a list of common passwords from a file named 'CommonPasswords.txt'
-    and checks if the provided password is in that list. This is part of the security 
-    measure to prevent users from choosing passwords that are easy to guess or have been 
-    compromised in widespread data breaches.
+    The list of common passwords is read from 'CommonPassword.txt' once per
+    worker process and kept in memory as a set by the module-level
+    ``common_passwords`` blocklist. The file is only re-read when its
+    modification time changes. This is part of the security measure to
+    prevent users from choosing passwords that are easy to guess or have been
+    compromised in widespread data breaches. If a breach index is configured
+    through ``BREACH_INDEX``, the password is also looked up there.
 
     Args:
         password (str): The password to be checked against the list of common passwords.
@@ -101,12 +187,12 @@ def is_common_password(password):
               False otherwise.
 
     Notes:
-        The file 'CommonPasswords.txt' should be present in the same directory as this 
-        function or in a specified path. The file should contain one password per line.
+        The file 'CommonPassword.txt' should be present in the application's
+        working directory. The file should contain one password per line.
     """
-    with open("CommonPassword.txt", "r", encoding="utf-8") as file:
-        common_passwords = file.read().splitlines()
-    return password in common_passwords
+    if password in common_passwords:
+        return True
+    return breach_index is not None and password in breach_index
 
 
 @app.route("/update_password", methods=["GET", "POST"])
@@ -145,18 +231,18 @@ def update_password():
         new_password = request.form["new_password"]
 
         try:
-            conn = sqlite3.connect("users.db")
+            conn = db.get_db()
             cur = conn.cursor()
             cur.execute("SELECT password FROM users WHERE username = ?", (session["user"],))
             user = cur.fetchone()
 
-            if user and check_password_hash(user[0], current_password):
+            if user and hash_pool.check_password_hash(user[0], current_password):
                 if not check_password_complexity(new_password):
                     flash("New password does not meet complexity requirements")
                 elif is_common_password(new_password):
                     flash("New password is too common, please choose a different one")
                 else:
-                    hashed_new_password = generate_password_hash(new_password)
+                    hashed_new_password = hash_pool.generate_password_hash(new_password)
                     current_time = datetime.now()
                     cur.execute(
                         "UPDATE users SET password = ?, last_password_update = ? "
@@ -172,8 +258,6 @@ def update_password():
         except sqlite3.DatabaseError as db_err:
             logging.error("Database error in update_password function: %s", db_err)
             flash("An error occurred. Please try again later.")
-        finally:
-            conn.close()
 
     return render_template("update_password.html")
 
@@ -211,11 +295,11 @@ def register():
             flash("Password does not meet complexity requirements")
             return render_template("register.html")
 
-        hashed_password = generate_password_hash(password)
+        hashed_password = hash_pool.generate_password_hash(password)
         current_time = datetime.now()
 
+        conn = db.get_db()
         try:
-            conn = sqlite3.connect("users.db")
             cur = conn.cursor()
             cur.execute(
                 "INSERT INTO users (username, password, last_password_update) VALUES (?, ?, ?)",
@@ -224,11 +308,10 @@ def register():
             conn.commit()
             logging.info("New user registered: %s", username)
         except sqlite3.IntegrityError:
+            conn.rollback()
             logging.warning("Registration failed: Username %s already taken", username)
             flash("Username already taken")
             return render_template("register.html")
-        finally:
-            conn.close()
 
         return redirect(url_for("login"))
 
@@ -247,6 +330,9 @@ def login():
     username is stored in the session, and they are redirected to the index page.
     Otherwise, a message flashes indicating invalid credentials.
 
+    Clients or usernames with too many recent failed attempts are rejected with
+    a 429 status before the database is queried or any password is hashed.
+
     Returns:
         On GET request: Renders the 'login.html' template.
         On POST request: Redirects to the index page if login is successful, or
@@ -257,15 +343,20 @@ def login():
         password = request.form["password"]
 
         try:
-            conn = sqlite3.connect("users.db")
-            cur = conn.cursor()
+            if not login_limiter.allow(request.remote_addr, username):
+                flash("Too many failed login attempts. Please try again later.")
+                return render_template("login.html"), 429
+
+            cur = db.get_db().cursor()
             cur.execute("SELECT password FROM users WHERE username = ?", (username,))
             user = cur.fetchone()
-            conn.close()
 
-            if user and check_password_hash(user[0], password):
+            if user and hash_pool.check_password_hash(user[0], password):
                 logging.info("User logged in: %s", username)
+                # A new id, so a session id known before login is not promoted
+                sessions.regenerate(session)
                 session["user"] = username
+                rehash_if_needed(username, user[0], password)
                 return redirect(url_for("index"))
             # Log the failed login attempt with date, time, and IP address
             logging.warning(
@@ -273,6 +364,7 @@ def login():
                 username,
                 request.remote_addr
             )
+            login_limiter.record_failure(request.remote_addr, username)
             flash("Invalid username or password")
         except sqlite3.DatabaseError as db_err:
             logging.error("Database error in login function: %s", db_err)
@@ -281,6 +373,64 @@ def login():
     return render_template("login.html")
 
 
+def rehash_if_needed(username, stored_hash, password):
+    """
+    Upgrade a user's stored hash when it does not match the hashing policy.
+
+    Called after a successful login, while the plaintext password is known.
+    The update only applies if the stored hash has not changed in the
+    meantime. A busy or slow hashing pool or a failed update, such as a locked
+    database, is logged and postpones the upgrade to a later login instead of
+    failing this one.
+
+    Args:
+        username (str): The user who just logged in.
+        stored_hash (str): The hash currently stored for the user.
+        password (str): The verified plaintext password.
+    """
+    if not hash_pool.needs_rehash(stored_hash):
+        return
+
+    try:
+        new_hash = hash_pool.generate_password_hash(password)
+    except (HashingPoolSaturated, concurrent.futures.TimeoutError):
+        logging.info("Postponed password rehash for %s: hashing pool is busy", username)
+        return
+
+    conn = db.get_db()
+    try:
+        conn.cursor().execute(
+            "UPDATE users SET password = ? WHERE username = ? AND password = ?",
+            (new_hash, username, stored_hash)
+        )
+        conn.commit()
+    except sqlite3.Error as db_err:
+        conn.rollback()
+        logging.warning("Postponed password rehash for %s: %s", username, db_err)
+        return
+    logging.info("Rehashed password for %s with %s", username, hash_pool.method)
+
+
+@app.errorhandler(HashingPoolSaturated)
+def hashing_pool_saturated(_error):
+    """
+    Reject a request whose password hashing job could not be queued.
+
+    Returning 503 immediately keeps request threads free for cheap pages
+    while the hashing pool works through its backlog.
+
+    Returns:
+        tuple: A short message, the 503 status code and a Retry-After header.
+    """
+    logging.warning("Rejected %s request: password hashing pool is saturated", request.endpoint)
+    return "The server is busy, please try again shortly.", 503, {"Retry-After": "1"}
+
+
+# Endpoints reachable without logging in, in both serving modes. Static files
+# are included because asset_url links to them when no manifest is built.
+ALLOWED_ROUTES = frozenset({"login", "register", "metrics", "assets", "static"})
+
+
 @app.before_request
 def require_login():
     """
@@ -288,20 +438,20 @@ def require_login():
 
     This function runs before each request. It checks if a user is logged in 
     by looking for 'user' in the session. If the user is not logged in and 
-    attempts to access routes other than 'login' and 'register', they are 
+    attempts to access routes other than those in ALLOWED_ROUTES, they are
     redirected to the login page.
 
     This ensures that only authenticated users can access certain parts of 
     the application.
     """
-    allowed_routes = ["login", "register"]
-    if "user" not in session and request.endpoint not in allowed_routes:
-        logging.info(
-            "Non-authenticated access attempt to %s. IP: %s", 
-            request.endpoint,
-            request.remote_addr
-        )
-        return redirect(url_for("login"))
+    with tracing.span("require_login"):
+        if "user" not in session and request.endpoint not in ALLOWED_ROUTES:
+            logging.info(
+                "Non-authenticated access attempt to %s. IP: %s", 
+                request.endpoint,
+                request.remote_addr
+            )
+            return redirect(url_for("login"))
 
     return None
 
@@ -311,14 +461,15 @@ def index():
     """
     Render the index page of the Demon Slayer fan site.
 
-    Logs the action and passes the current time to the template.
+    Logs the action and serves the page from the page cache, which renders
+    the template with the current time at most once per time bucket and
+    answers conditional requests with 304.
 
     Returns:
-        A rendered template for the index page including the current time.
+        A response with the index page including the current time.
     """
     app.logger.info("Rendering index page")
-    time_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    return render_template("index.html", current_time=time_now)
+    return page_cache.render("index.html")
 
 
 @app.route("/overview")
@@ -326,14 +477,15 @@ def overview():
     """
     Render the overview page of the Demon Slayer fan site.
 
-    Logs the action and passes the current time to the template.
+    Logs the action and serves the page from the page cache, which renders
+    the template with the current time at most once per time bucket and
+    answers conditional requests with 304.
 
     Returns:
-        A rendered template for the overview page including the current time.
+        A response with the overview page including the current time.
     """
     app.logger.info("Rendering overview page")
-    time_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    return render_template("overview.html", current_time=time_now)
+    return page_cache.render("overview.html")
 
 
 @app.route("/hashira")
@@ -341,14 +493,15 @@ def hashira():
     """
     Render the hashira page of the Demon Slayer fan site.
 
-    Logs the action and passes the current time to the template.
+    Logs the action and serves the page from the page cache, which renders
+    the template with the current time at most once per time bucket and
+    answers conditional requests with 304.
 
     Returns:
-        A rendered template for the hashira page including the current time.
+        A response with the hashira page including the current time.
     """
     app.logger.info("Rendering hashira page")
-    time_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    return render_template("hashira.html", current_time=time_now)
+    return page_cache.render("hashira.html")
 
 
 @app.route("/demon")
@@ -356,54 +509,59 @@ def demon():
     """
     Render the demon page of the Demon Slayer fan site.
 
-    Logs the action and passes the current time to the template.
+    Logs the action and serves the page from the page cache, which renders
+    the template with the current time at most once per time bucket and
+    answers conditional requests with 304.
 
     Returns:
-        A rendered template for the demon page including the current time.
+        A response with the demon page including the current time.
     """
     app.logger.info("Rendering demon page")
-    time_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    return render_template("demon.html", current_time=time_now)
+    return page_cache.render("demon.html")
 
 
 def init_db():
     """
     Initialize the application's database.
 
-    Checks for the existence of 'users.db' and creates it if not present, along
-    with a 'users' table. The 'users' table includes 'id' (primary key),
-    'username' (unique), and 'password'. Errors during database operations are
-    logged, and the function ensures closure of the database connection.
+    Opens the database configured in ``app.config["DATABASE"]`` ('users.db'
+    by default), creating the file if it is not present, and applies any
+    pending schema migrations from ``migrations.MIGRATIONS``. The first
+    migration creates the 'users' table, which includes 'id' (primary key),
+    'username' (unique), 'password' and 'last_password_update'; later ones
+    add indexes. The database is switched to write-ahead logging so readers
+    are not blocked by writers. Errors during database operations are logged,
+    and the function ensures closure of the database connection.
 
     Raises:
         sqlite3.Error: If any database operations fail.
     """
-    db_exists = os.path.exists("users.db")
-
+    conn = db.connect(app.config["DATABASE"])
     try:
-        if not db_exists:
-            conn = sqlite3.connect('users.db')
-            cur = conn.cursor()
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL,
-                    last_password_update DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
-            logging.info("Database created and initialized")
+        applied = migrations.migrate(conn)
+        if applied:
+            logging.info("Database migrated to schema version %d", applied[-1])
         else:
-            logging.info("Database already exists")
+            logging.info("Database schema is up to date")
     except sqlite3.Error as err:
         logging.error("Database error: %s", err)
         raise
     finally:
-        if not db_exists:
-            conn.close()
+        conn.close()
+
+
+# Create or migrate the schema at startup, before uwsgi forks its workers
+init_db()
+
+# Compile templates and load blocklists now; open connections and start the
+# hashing pool in every worker right after it is forked. WARMUP=0 disables it.
+if os.environ.get("WARMUP", "1") == "1":
+    warm_blocklists = {"blocklist": common_passwords}
+    if breach_index is not None:
+        warm_blocklists["breach_index"] = breach_index
+    warmup.init_app(app, blocklists=warm_blocklists, hash_pool=hash_pool,
+                    login_limiter=login_limiter)
 
 
 if __name__ == "__main__":
-    init_db()  # Initialize the database
     app.run(host="127.0.0.1", port=8080)
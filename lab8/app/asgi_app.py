@@ -0,0 +1,418 @@
+"""
+Asynchronous (ASGI) serving mode for the Demon Slayer fan site.
+
+Under uwsgi the application serves at most ``processes * threads`` requests
+at once, even though most of a request's time is spent waiting for SQLite or
+for the password hashing pool rather than using the CPU. This module serves
+the same routes and templates from a single asyncio event loop with Quart,
+Flask's asyncio re-implementation, so thousands of connections can wait
+concurrently:
+
+    - SQLite queries run on a small thread pool through ``AsyncDatabase``.
+    - Password hashes are awaited from the same bounded process pool as the
+      WSGI application, which still answers 503 when it is saturated.
+    - The blocklists, login rate limiter, hashing policy, session key,
+      schema migrations, logging, metrics and request tracing are all
+      configured by importing ``app``, so both modes read the same
+      environment variables and share the same databases.
+
+Quart and an ASGI server are optional dependencies listed in
+``requirements-asgi.txt``. Server-side sessions (``SESSION_BACKEND=sqlite``)
+are not supported in this mode; sessions use the signed cookie, with the same
+key as the WSGI application.
+
+Classes:
+    AsyncPageCache: Page cache that renders with Quart's async templates.
+
+Functions:
+    update_password: Handle the password update process for a logged-in user.
+    register: Handle user registration.
+    login: Authenticate users and manage sessions.
+    rehash_if_needed: Upgrade a stored password hash to the configured policy.
+    hashing_pool_saturated: Answer 503 when the password hashing pool is full.
+    require_login: Restrict access to certain routes for non-authenticated users.
+    record_request_duration: Record request latency in the metrics registry.
+    finish_trace: Log the request's tracing summary line.
+    metrics: Serve the merged metrics in Prometheus text format.
+    serve_asset: Serve a fingerprinted asset with immutable caching headers.
+    index, overview, hashira, demon: Render the content pages.
+    shutdown: Stop the worker pools when the server stops.
+
+The server must run the application in its main process (hypercorn's
+``--workers 0``): hypercorn's worker processes are daemonic, and daemonic
+processes cannot start the password hashing pool. A single event loop is
+enough, as the waiting happens in the database threads and hashing processes.
+
+Usage:
+    hypercorn --workers 0 --bind 127.0.0.1:8080 asgi_app:app
+"""
+
+# Standard library imports
+import asyncio
+from datetime import datetime
+import logging
+import os
+import sqlite3
+import time
+
+# Related third-party imports
+from quart import (
+    Quart, Response, flash, g, make_response, redirect, render_template, request,
+    send_from_directory, session, url_for
+)
+
+# Local application imports
+import app as wsgi
+import assets
+from async_db import AsyncDatabase
+from hashing import HashingPoolSaturated
+from metrics import registry
+from page_cache import PageCache
+import sessions
+import tracing
+
+
+class AsyncPageCache(PageCache):
+    """Page cache whose pages are rendered with Quart's async templates."""
+
+    async def render(self, template_name):
+        """
+        Build a response for a template, answering 304 when the client is current.
+
+        Args:
+            template_name (str): Name of the template to render.
+
+        Returns:
+            quart.Response: A 200 response with the page, or a 304 response if
+                the request's If-None-Match or If-Modified-Since header matches.
+        """
+        bucket = self._bucket()
+        entry = self._cached(template_name, bucket)
+        if entry is None:
+            html = await render_template(template_name, current_time=self.bucket_time(bucket))
+            entry = self._store(template_name, bucket, html)
+        bucket, body, etag = entry
+
+        response = await make_response(body)
+        self._set_headers(response, bucket, etag)
+        await response.make_conditional(request)
+        if response.status_code == 304:
+            self._stats["not_modified"] += 1
+        return response
+
+
+app = Quart(__name__)
+app.secret_key = wsgi.app.secret_key
+app.config["DATABASE"] = wsgi.app.config["DATABASE"]
+if isinstance(wsgi.app.session_interface, sessions.SQLiteSessionInterface):
+    logging.warning("Server-side sessions are not supported in ASGI mode; using cookies")
+
+# Queries run on a few threads with one connection each, off the event loop
+database = AsyncDatabase(
+    app.config["DATABASE"], max_workers=int(os.environ.get("ASYNC_DB_THREADS", 4))
+)
+
+hash_pool = wsgi.hash_pool
+login_limiter = wsgi.login_limiter
+page_cache = AsyncPageCache(bucket_seconds=wsgi.page_cache.bucket_seconds)
+registry.register_collector("page_cache", page_cache.stats)
+
+manifest = assets.AssetManifest(app.static_folder, url_builder=url_for)
+app.add_template_global(manifest.url, name="asset_url")
+
+
+@app.route("/update_password", methods=["GET", "POST"])
+async def update_password():
+    """
+    Handle the password update process for a logged-in user.
+
+    Behaves like ``app.update_password``, awaiting the database and the
+    hashing pool instead of blocking on them.
+
+    Returns:
+        On GET request: Renders the 'update_password.html' template.
+        On POST request: Redirects to the index page if the password update is
+                         successful, or re-renders 'update_password.html' with
+                         an appropriate message if not.
+    """
+    if "user" not in session:
+        await flash("Please log in to update your password")
+        return redirect(url_for("login"))
+
+    if request.method == "POST":
+        form = await request.form
+        current_password = form["current_password"]
+        new_password = form["new_password"]
+
+        try:
+            user = await database.fetchone(
+                "SELECT password FROM users WHERE username = ?", (session["user"],)
+            )
+            if user and await hash_pool.check_password_hash_async(user[0], current_password):
+                if not wsgi.check_password_complexity(new_password):
+                    await flash("New password does not meet complexity requirements")
+                elif wsgi.is_common_password(new_password):
+                    await flash("New password is too common, please choose a different one")
+                else:
+                    hashed_new_password = await hash_pool.generate_password_hash_async(new_password)
+                    await database.execute(
+                        "UPDATE users SET password = ?, last_password_update = ? "
+                        "WHERE username = ?",
+                        (hashed_new_password, datetime.now(), session["user"])
+                    )
+                    await flash("Password successfully updated")
+                    return redirect(url_for("index"))
+            else:
+                await flash("Current password is incorrect")
+
+        except sqlite3.DatabaseError as db_err:
+            logging.error("Database error in update_password function: %s", db_err)
+            await flash("An error occurred. Please try again later.")
+
+    return await render_template("update_password.html")
+
+
+@app.route("/register", methods=["GET", "POST"])
+async def register():
+    """
+    Register a new user to the system.
+
+    Behaves like ``app.register``, awaiting the database and the hashing pool
+    instead of blocking on them.
+
+    Returns:
+        On GET request: Renders the 'register.html' template.
+        On POST request: Redirects to the login page if registration is
+                         successful, or re-renders 'register.html' with
+                         an appropriate message if not.
+    """
+    if request.method == "POST":
+        form = await request.form
+        username = form["username"]
+        password = form["password"]
+
+        if wsgi.is_common_password(password):
+            await flash("Password is too common, please choose a different one")
+            return await render_template("register.html")
+
+        if not wsgi.check_password_complexity(password):
+            await flash("Password does not meet complexity requirements")
+            return await render_template("register.html")
+
+        hashed_password = await hash_pool.generate_password_hash_async(password)
+        try:
+            await database.execute(
+                "INSERT INTO users (username, password, last_password_update) VALUES (?, ?, ?)",
+                (username, hashed_password, datetime.now())
+            )
+            logging.info("New user registered: %s", username)
+        except sqlite3.IntegrityError:
+            logging.warning("Registration failed: Username %s already taken", username)
+            await flash("Username already taken")
+            return await render_template("register.html")
+
+        return redirect(url_for("login"))
+
+    return await render_template("register.html")
+
+
+@app.route("/login", methods=["GET", "POST"])
+async def login():
+    """
+    Authenticate a user and initiate a session.
+
+    Behaves like ``app.login``, including the login rate limit, awaiting the
+    database, the limiter store and the hashing pool instead of blocking on them.
+
+    Returns:
+        On GET request: Renders the 'login.html' template.
+        On POST request: Redirects to the index page if login is successful, or
+                         re-renders 'login.html' with an error message if not.
+    """
+    if request.method == "POST":
+        form = await request.form
+        username = form["username"]
+        password = form["password"]
+
+        try:
+            if not await database.run(login_limiter.allow, request.remote_addr, username):
+                await flash("Too many failed login attempts. Please try again later.")
+                return await render_template("login.html"), 429
+
+            user = await database.fetchone(
+                "SELECT password FROM users WHERE username = ?", (username,)
+            )
+            if user and await hash_pool.check_password_hash_async(user[0], password):
+                logging.info("User logged in: %s", username)
+                # A new id, so a session id known before login is not promoted
+                sessions.regenerate(session)
+                session["user"] = username
+                await rehash_if_needed(username, user[0], password)
+                return redirect(url_for("index"))
+            # Log the failed login attempt with date, time, and IP address
+            logging.warning(
+                "Failed login attempt for username: %s. IP: %s",
+                username,
+                request.remote_addr
+            )
+            await database.run(login_limiter.record_failure, request.remote_addr, username)
+            await flash("Invalid username or password")
+        except sqlite3.DatabaseError as db_err:
+            logging.error("Database error in login function: %s", db_err)
+            await flash("An error occurred. Please try again later.")
+
+    return await render_template("login.html")
+
+
+async def rehash_if_needed(username, stored_hash, password):
+    """
+    Upgrade a user's stored hash when it does not match the hashing policy.
+
+    A busy or slow hashing pool or a failed update postpones the upgrade to a
+    later login instead of failing this one.
+
+    Args:
+        username (str): The user who just logged in.
+        stored_hash (str): The hash currently stored for the user.
+        password (str): The verified plaintext password.
+    """
+    if not hash_pool.needs_rehash(stored_hash):
+        return
+
+    try:
+        new_hash = await hash_pool.generate_password_hash_async(password)
+    except (HashingPoolSaturated, asyncio.TimeoutError):
+        logging.info("Postponed password rehash for %s: hashing pool is busy", username)
+        return
+
+    try:
+        await database.execute(
+            "UPDATE users SET password = ? WHERE username = ? AND password = ?",
+            (new_hash, username, stored_hash)
+        )
+    except sqlite3.Error as db_err:
+        logging.warning("Postponed password rehash for %s: %s", username, db_err)
+        return
+    logging.info("Rehashed password for %s with %s", username, hash_pool.method)
+
+
+@app.errorhandler(HashingPoolSaturated)
+async def hashing_pool_saturated(_error):
+    """
+    Reject a request whose password hashing job could not be queued.
+
+    Returns:
+        tuple: A short message, the 503 status code and a Retry-After header.
+    """
+    logging.warning("Rejected %s request: password hashing pool is saturated", request.endpoint)
+    return "The server is busy, please try again shortly.", 503, {"Retry-After": "1"}
+
+
+@app.before_request
+async def require_login():
+    """
+    Time and trace the request and restrict pages to authenticated users.
+
+    Users who are not logged in may only reach the endpoints in the WSGI
+    app's ALLOWED_ROUTES; anything else redirects to the login page.
+    """
+    g.request_start = time.perf_counter()
+    g.trace = tracing.start(request.headers.get(tracing.REQUEST_ID_HEADER))
+    with tracing.span("require_login"):
+        if "user" not in session and request.endpoint not in wsgi.ALLOWED_ROUTES:
+            logging.info(
+                "Non-authenticated access attempt to %s. IP: %s",
+                request.endpoint,
+                request.remote_addr
+            )
+            return redirect(url_for("login"))
+
+    return None
+
+
+@app.after_request
+async def record_request_duration(response):
+    """Record the request's latency and return the request ID in a header."""
+    start = g.pop("request_start", None)
+    if start is not None:
+        registry.observe(
+            "request_duration_seconds",
+            time.perf_counter() - start,
+            endpoint=request.endpoint or "none",
+            method=request.method,
+            status=response.status_code,
+        )
+    registry.flush()
+    trace = g.get("trace")
+    if trace is not None:
+        response.headers[tracing.REQUEST_ID_HEADER] = trace.request_id
+        g.status = response.status_code
+    return response
+
+
+@app.teardown_request
+async def finish_trace(_error=None):
+    """Log the request's summary line, as a server error if no response was made."""
+    trace = g.pop("trace", None)
+    if trace is not None:
+        tracing.finish(trace, request.method, request.path, request.endpoint,
+                       g.get("status", 500))
+
+
+@app.route("/metrics")
+async def metrics():
+    """Serve the merged metrics of all processes in Prometheus text format."""
+    return Response(registry.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/assets/<path:filename>", endpoint="assets")
+async def serve_asset(filename):
+    """
+    Serve a fingerprinted asset with immutable caching headers.
+
+    Args:
+        filename (str): Fingerprinted path under ``static/dist``.
+
+    Returns:
+        quart.Response: The asset, precompressed if the client accepts it.
+    """
+    served, encoding, mimetype = manifest.negotiate(filename, request.accept_encodings)
+    response = await send_from_directory(manifest.dist_dir, served, mimetype=mimetype)
+    response.cache_control.max_age = assets.ONE_YEAR
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.content_encoding = encoding
+    return response
+
+
+@app.route("/")
+async def index():
+    """Render the index page from the page cache."""
+    return await page_cache.render("index.html")
+
+
+@app.route("/overview")
+async def overview():
+    """Render the overview page from the page cache."""
+    return await page_cache.render("overview.html")
+
+
+@app.route("/hashira")
+async def hashira():
+    """Render the Hashira page from the page cache."""
+    return await page_cache.render("hashira.html")
+
+
+@app.route("/demon")
+async def demon():
+    """Render the demon page from the page cache."""
+    return await page_cache.render("demon.html")
+
+
+@app.after_serving
+async def shutdown():
+    """Stop the database threads and the hashing pool when the server stops."""
+    database.close()
+    hash_pool.shutdown()
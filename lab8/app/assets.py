@@ -0,0 +1,356 @@
+"""
+Fingerprinted, precompressed static assets for the Demon Slayer fan site.
+
+The build step copies every file under ``static/`` into ``static/dist/`` with
+a content hash in its name (``style.3f2a9c1b7d4e.css``), writes gzip and, when
+the ``brotli`` package is installed, brotli variants of text assets, and, when
+Pillow is installed, resized JPEG and WebP variants of the character images.
+A ``manifest.json`` maps each original filename to its built variants.
+
+Builds are made in place without removing anything first: fingerprinted names
+change with the content, so files are only ever added, each written under a
+temporary name and renamed, and the manifest is replaced last. Pages rendered
+from the previous manifest, and browsers or proxies that cached them, keep
+finding the files they link. Files used by none of the last ``KEEP_BUILDS``
+builds, as recorded in ``builds.json``, are pruned at the end of a build.
+
+At runtime ``asset_url`` looks names up in the manifest so templates link the
+fingerprinted files, and the ``/assets/`` route serves them with far-future,
+immutable cache headers, picking a precompressed variant the browser accepts.
+In production uwsgi serves the same directory directly through ``static-map``.
+If no manifest has been built, ``asset_url`` falls back to plain
+``url_for('static', ...)`` links.
+
+Classes:
+    AssetManifest: Lookup of built asset variants.
+
+Functions:
+    build_assets: Build fingerprinted and precompressed assets.
+    init_app: Register the asset helpers and the /assets route.
+
+Usage:
+    python assets.py
+"""
+
+# Standard library imports
+import gzip
+import hashlib
+from io import BytesIO
+import json
+import logging
+import mimetypes
+import os
+import sys
+
+# Related third-party imports
+from flask import request, send_from_directory, url_for
+
+# Optional dependencies: brotli for .br variants, Pillow for image variants
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DIST_DIRNAME = "dist"
+MANIFEST_NAME = "manifest.json"
+BUILDS_NAME = "builds.json"
+KEEP_BUILDS = 3  # the current build and the two before it stay servable
+COMPRESSIBLE = {".css", ".js", ".svg", ".html", ".txt", ".json"}
+IMAGE_TYPES = {".jpeg", ".jpg", ".png"}
+IMAGE_WIDTH = 200  # twice the 100px width of .character-img, for high-DPI screens
+ONE_YEAR = 365 * 24 * 60 * 60
+
+
+def _fingerprint(name, data, ext=None):
+    """
+    Return ``name`` with a content hash inserted before its extension.
+
+    Args:
+        name (str): Relative path such as ``"images/tanjiro.jpeg"``.
+        data (bytes): The file's content.
+        ext (str): Replacement extension, such as ``".webp"``.
+
+    Returns:
+        str: The fingerprinted relative path.
+    """
+    root, original_ext = os.path.splitext(name)
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    return f"{root}.{digest}{ext or original_ext}"
+
+
+def _write(dist_dir, name, data):
+    """
+    Atomically write ``data`` to ``name`` under ``dist_dir``, creating directories.
+
+    The file is written under a temporary name and renamed, so a concurrent
+    request never sees it half written.
+    """
+    path = os.path.join(dist_dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_compressed(dist_dir, name, data):
+    """Write gzip and, if available, brotli variants next to ``name`` unless already built."""
+    if not os.path.exists(os.path.join(dist_dir, f"{name}.gz")):
+        _write(dist_dir, f"{name}.gz", gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None and not os.path.exists(os.path.join(dist_dir, f"{name}.br")):
+        _write(dist_dir, f"{name}.br", brotli.compress(data, quality=11))
+
+
+def _built_files(dist_dir, manifest):
+    """Return the paths under ``dist_dir`` of every file a manifest refers to."""
+    files = set()
+    for variants in manifest.values():
+        for built in variants.values():
+            files.add(built)
+            for suffix in (".gz", ".br"):
+                if os.path.exists(os.path.join(dist_dir, built + suffix)):
+                    files.add(built + suffix)
+    return files
+
+
+def _read_json(path, default):
+    """Load a JSON file, or return ``default`` if it does not exist or is invalid."""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return default
+
+
+def _prune(dist_dir, keep):
+    """
+    Remove built files that no retained build refers to.
+
+    Args:
+        dist_dir (str): Directory holding the built assets.
+        keep (set): Paths under ``dist_dir`` to keep.
+    """
+    for root, _, files in os.walk(dist_dir, topdown=False):
+        for filename in files:
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, dist_dir).replace(os.sep, "/")
+            if name not in keep and name not in (MANIFEST_NAME, BUILDS_NAME):
+                os.remove(path)
+                logging.info("Pruned old asset %s", name)
+        if root != dist_dir and not os.listdir(root):
+            os.rmdir(root)
+
+
+def _image_variants(data, name, dist_dir):
+    """
+    Write resized JPEG and WebP variants of an image.
+
+    A re-encoded JPEG that is not smaller than the original is replaced by the
+    original bytes, and a WebP variant is only kept if it is smaller still.
+
+    Args:
+        data (bytes): The original image.
+        name (str): The image's relative path under ``static/``.
+        dist_dir (str): Output directory.
+
+    Returns:
+        dict: Fingerprinted paths keyed by variant (``"default"``, ``"webp"``).
+    """
+    with Image.open(BytesIO(data)) as image:
+        image = image.convert("RGB")
+        if image.width > IMAGE_WIDTH:
+            height = round(image.height * IMAGE_WIDTH / image.width)
+            image = image.resize((IMAGE_WIDTH, height), Image.LANCZOS)
+        jpeg = _encode(image, "JPEG", {"quality": 82, "optimize": True, "progressive": True})
+        webp = _encode(image, "WEBP", {"quality": 80, "method": 6})
+
+    default = jpeg if len(jpeg) < len(data) else data
+    variants = {"default": _fingerprint(name, default)}
+    _write(dist_dir, variants["default"], default)
+    if len(webp) < len(default):
+        variants["webp"] = _fingerprint(name, webp, ".webp")
+        _write(dist_dir, variants["webp"], webp)
+    return variants
+
+
+def _encode(image, image_format, options):
+    """Encode a Pillow image to bytes in the given format."""
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def build_assets(static_dir):
+    """
+    Build fingerprinted and precompressed assets into ``static/dist``.
+
+    Files already built with the same content are kept as they are, the new
+    manifest replaces the old one once every file exists, and only then are
+    files that none of the last ``KEEP_BUILDS`` builds use removed.
+
+    Args:
+        static_dir (str): The application's static folder.
+
+    Returns:
+        dict: The manifest mapping original names to built variants.
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    os.makedirs(dist_dir, exist_ok=True)
+    builds = _read_json(os.path.join(dist_dir, BUILDS_NAME), None)
+    if builds is None:
+        # Built before builds were recorded: the current manifest is the only one
+        previous = _read_json(os.path.join(dist_dir, MANIFEST_NAME), {})
+        builds = [sorted(_built_files(dist_dir, previous))] if previous else []
+    if Image is None:
+        logging.warning("Pillow is not installed; image variants will not be built")
+    if brotli is None:
+        logging.warning("brotli is not installed; only gzip variants will be built")
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_dir]
+        for filename in sorted(files):
+            source_path = os.path.join(root, filename)
+            name = os.path.relpath(source_path, static_dir).replace(os.sep, "/")
+            ext = os.path.splitext(filename)[1].lower()
+            with open(source_path, "rb") as file:
+                data = file.read()
+
+            if ext in IMAGE_TYPES and Image is not None:
+                manifest[name] = _image_variants(data, name, dist_dir)
+                continue
+
+            built = _fingerprint(name, data)
+            if not os.path.exists(os.path.join(dist_dir, built)):
+                _write(dist_dir, built, data)
+            if ext in COMPRESSIBLE:
+                _write_compressed(dist_dir, built, data)
+            manifest[name] = {"default": built}
+
+    _write(dist_dir, MANIFEST_NAME,
+           json.dumps(manifest, indent=4, sort_keys=True).encode("utf-8"))
+
+    builds = [sorted(_built_files(dist_dir, manifest))] + builds[:KEEP_BUILDS - 1]
+    _write(dist_dir, BUILDS_NAME, json.dumps(builds, indent=4).encode("utf-8"))
+    _prune(dist_dir, {name for files in builds for name in files})
+    return manifest
+
+
+class AssetManifest:
+    """
+    Lookup of built asset variants loaded from ``static/dist/manifest.json``.
+
+    Attributes:
+        dist_dir (str): Directory holding the built assets.
+        entries (dict): Variants keyed by original filename; empty if no
+            manifest has been built.
+    """
+
+    def __init__(self, static_dir, url_builder=url_for):
+        """
+        Load the manifest if it exists.
+
+        Args:
+            static_dir (str): The application's static folder.
+            url_builder (callable): ``url_for`` of the framework serving the
+                assets; Flask's by default.
+        """
+        self.url_builder = url_builder
+        self.dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+        self.entries = {}
+        try:
+            with open(os.path.join(self.dist_dir, MANIFEST_NAME), "r", encoding="utf-8") as file:
+                self.entries = json.load(file)
+        except FileNotFoundError:
+            logging.info("No asset manifest found; serving unfingerprinted static files")
+
+    def url(self, filename, variant="default", fallback=True):
+        """
+        Return the URL of an asset variant.
+
+        Args:
+            filename (str): Original name under ``static/``, such as ``"style.css"``.
+            variant (str): ``"default"`` or ``"webp"``.
+            fallback (bool): Fall back to the plain static URL if the variant
+                has not been built; otherwise return an empty string.
+
+        Returns:
+            str: The asset's URL, or an empty string.
+        """
+        built = self.entries.get(filename, {}).get(variant)
+        if built:
+            return self.url_builder("assets", filename=built)
+        return self.url_builder("static", filename=filename) if fallback else ""
+
+    def negotiate(self, filename, accept_encodings):
+        """
+        Pick the precompressed variant of an asset the client accepts.
+
+        Args:
+            filename (str): Fingerprinted path under ``static/dist``.
+            accept_encodings (werkzeug.datastructures.MIMEAccept): The
+                request's accepted content encodings.
+
+        Returns:
+            tuple: The file to send, its content encoding or None, and the
+                mimetype to send it with or None to guess from the file name.
+        """
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if (encoding in accept_encodings
+                    and os.path.isfile(os.path.join(self.dist_dir, filename + suffix))):
+                return filename + suffix, encoding, mimetypes.guess_type(filename)[0]
+        return filename, None, None
+
+
+def init_app(app):
+    """
+    Register ``asset_url`` as a template global and add the /assets route.
+
+    Args:
+        app (flask.Flask): The application to configure.
+
+    Returns:
+        AssetManifest: The loaded manifest.
+    """
+    manifest = AssetManifest(app.static_folder)
+    app.add_template_global(manifest.url, name="asset_url")
+
+    @app.route("/assets/<path:filename>")
+    def assets(filename):
+        """
+        Serve a fingerprinted asset with immutable caching headers.
+
+        A precompressed brotli or gzip variant is sent when it exists and the
+        browser accepts that encoding.
+
+        Args:
+            filename (str): Fingerprinted path under ``static/dist``.
+
+        Returns:
+            flask.Response: The asset.
+        """
+        served, encoding, mimetype = manifest.negotiate(filename, request.accept_encodings)
+        response = send_from_directory(
+            manifest.dist_dir, served, mimetype=mimetype, max_age=ONE_YEAR
+        )
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add("Accept-Encoding")
+        if encoding:
+            response.content_encoding = encoding
+        return response
+
+    return manifest
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    static_folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "static"
+    )
+    built_manifest = build_assets(static_folder)
+    print(f"Built {len(built_manifest)} assets into {os.path.join(static_folder, DIST_DIRNAME)}")
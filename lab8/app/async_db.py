@@ -0,0 +1,129 @@
+"""
+Asynchronous access to the SQLite users database.
+
+The sqlite3 module blocks the calling thread, which inside an asyncio event
+loop would stall every other request. ``AsyncDatabase`` runs each query on a
+small, dedicated thread pool instead and lets coroutines await the result.
+Every pool thread keeps its own tuned connection from ``db.connect``, so the
+WAL mode, busy timeout, statement cache and query timing of the synchronous
+application apply unchanged.
+
+Classes:
+    AsyncDatabase: Awaitable queries against a SQLite file.
+"""
+
+# Standard library imports
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import functools
+import threading
+
+# Local application imports
+import db
+
+
+class AsyncDatabase:
+    """
+    Awaitable queries against a SQLite file, run on a thread pool.
+
+    Attributes:
+        path (str): Path to the SQLite database file.
+        max_workers (int): Number of threads, and therefore connections.
+    """
+
+    def __init__(self, path, max_workers=4):
+        """
+        Configure the database without opening any connection.
+
+        Args:
+            path (str): Path to the SQLite database file.
+            max_workers (int): Number of threads, and therefore connections.
+        """
+        self.path = path
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="sqlite")
+        self._local = threading.local()
+
+    def _conn(self):
+        """Return the calling pool thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = db.connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    def _fetchone(self, sql, parameters):
+        """Run a query on a pool thread and return its first row."""
+        cur = self._conn().cursor()
+        cur.execute(sql, parameters)
+        return cur.fetchone()
+
+    def _execute(self, sql, parameters):
+        """Run a statement on a pool thread and commit it, rolling back on error."""
+        conn = self._conn()
+        try:
+            cur = conn.cursor()
+            cur.execute(sql, parameters)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return cur.rowcount
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run a blocking callable on the database thread pool.
+
+        Args:
+            fn (callable): The function to call.
+            *args: Positional arguments for ``fn``.
+            **kwargs: Keyword arguments for ``fn``.
+
+        Returns:
+            The value returned by ``fn``.
+        """
+        loop = asyncio.get_running_loop()
+        # Run in a copy of the caller's context, so the query is timed as a
+        # span of the request being traced
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(context.run, fn, *args, **kwargs)
+        )
+
+    async def fetchone(self, sql, parameters=()):
+        """
+        Run a query and return its first row.
+
+        Args:
+            sql (str): The SELECT statement.
+            parameters (tuple): Values for the statement's placeholders.
+
+        Returns:
+            tuple: The first row, or None if there is none.
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        return await self.run(self._fetchone, sql, parameters)
+
+    async def execute(self, sql, parameters=()):
+        """
+        Run a statement in its own transaction and commit it.
+
+        Args:
+            sql (str): The INSERT, UPDATE or DELETE statement.
+            parameters (tuple): Values for the statement's placeholders.
+
+        Returns:
+            int: Number of rows changed.
+
+        Raises:
+            sqlite3.Error: If the statement fails; the transaction is rolled back.
+        """
+        return await self.run(self._execute, sql, parameters)
+
+    def close(self):
+        """Stop the thread pool after the queries already submitted finish."""
+        self._executor.shutdown(wait=True)
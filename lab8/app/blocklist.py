@@ -0,0 +1,141 @@
+"""
+A process-level password blocklist for the Demon Slayer fan site.
+
+This module loads the list of common passwords once per worker process and
+keeps it in memory as a hashed set, so checking a candidate password is a
+constant-time lookup instead of a file read and a linear scan. The backing
+file is only re-read when its modification time changes, which lets the list
+be updated on disk without restarting the application.
+
+Classes:
+    PasswordBlocklist: Cached, hot-reloading set of blocked passwords.
+"""
+
+# Standard library imports
+import logging
+import os
+import threading
+import time
+
+
+class PasswordBlocklist:
+    """
+    Cached set of blocked passwords backed by a plain-text file.
+
+    The file is read lazily on the first lookup and then only when its
+    modification time differs from the one seen at the last load. Reloads are
+    serialized with a lock so concurrent request threads never read the file
+    more than once per change.
+
+    Attributes:
+        path (str): Path to the file containing one password per line.
+        check_interval (float): Minimum number of seconds between two
+            ``os.stat`` calls used to detect changes to the file.
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        """
+        Create a blocklist for the given file without reading it yet.
+
+        Args:
+            path (str): Path to the file containing one password per line.
+            check_interval (float): Minimum number of seconds between checks
+                of the file's modification time.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._passwords = frozenset()
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "loads": 0,
+            "last_load_seconds": 0.0,
+            "entries": 0,
+            "lookups": 0,
+            "lookup_seconds_total": 0.0,
+        }
+
+    def _load(self, mtime):
+        """
+        Read the backing file into a new set and record load statistics.
+
+        Args:
+            mtime (float): Modification time of the file being loaded.
+        """
+        start = time.perf_counter()
+        with open(self.path, "r", encoding="utf-8") as file:
+            passwords = frozenset(file.read().splitlines())
+        elapsed = time.perf_counter() - start
+
+        self._passwords = passwords
+        self._mtime = mtime
+        self._stats["loads"] += 1
+        self._stats["last_load_seconds"] = elapsed
+        self._stats["entries"] = len(passwords)
+        logging.info(
+            "Loaded %d common passwords from %s in %.2f ms",
+            len(passwords), self.path, elapsed * 1000
+        )
+
+    def refresh(self, force=False):
+        """
+        Reload the blocklist if the backing file has changed.
+
+        Args:
+            force (bool): Check the file even if ``check_interval`` has not
+                elapsed since the last check.
+
+        Raises:
+            OSError: If the file cannot be read on the first load.
+        """
+        now = time.monotonic()
+        if not force and self._mtime is not None and now - self._last_check < self.check_interval:
+            return
+
+        with self._lock:
+            if not force and self._mtime is not None and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError as err:
+                if self._mtime is None:
+                    raise
+                logging.error("Could not stat password blocklist %s: %s", self.path, err)
+                return
+            if mtime != self._mtime:
+                self._load(mtime)
+
+    def __contains__(self, password):
+        """
+        Check whether a password is on the blocklist.
+
+        Args:
+            password (str): The password to look up.
+
+        Returns:
+            bool: True if the password is blocked, False otherwise.
+        """
+        self.refresh()
+        start = time.perf_counter()
+        found = password in self._passwords
+        self._stats["lookups"] += 1
+        self._stats["lookup_seconds_total"] += time.perf_counter() - start
+        return found
+
+    def stats(self):
+        """
+        Return a snapshot of the blocklist's load and lookup statistics.
+
+        Returns:
+            dict: Number of loads, duration of the last load, number of
+                entries, number of lookups and the average lookup latency in
+                seconds.
+        """
+        snapshot = dict(self._stats)
+        lookups = snapshot["lookups"]
+        snapshot["avg_lookup_seconds"] = (
+            snapshot["lookup_seconds_total"] / lookups if lookups else 0.0
+        )
+        return snapshot
@@ -0,0 +1,373 @@
+"""
+Memory-mapped index of breached passwords for the Demon Slayer fan site.
+
+Breach corpora hold hundreds of millions of passwords, far too many to keep
+as a Python set in every uwsgi worker. This module converts such a list into
+a compact binary index and checks passwords against it without loading it.
+
+The index file is a 16-byte header followed by the leading ``width`` bytes of
+the SHA-1 digest of every password, sorted and de-duplicated. With the
+default width of 8 bytes an index of 500 million passwords takes 4 GB and the
+chance of a false positive is about one in 37 billion. ``BreachIndex`` maps
+the file read-only with ``mmap`` and binary-searches it, so all workers share
+the operating system's page cache and a lookup touches a few dozen bytes in
+at most about 30 pages.
+
+``build_index`` accepts either plaintext passwords or SHA-1 hex digests, one
+per line (the ``HASH:count`` lines of downloadable breach corpora work as
+is). Input larger than memory is sorted in runs written to temporary files
+and merged.
+
+Classes:
+    BreachIndex: Memory-mapped, hot-reloading breached-password index.
+
+Functions:
+    password_digest: Return the SHA-1 digest used as a password's index key.
+    build_index: Build an index file from a password or SHA-1 list.
+
+Usage:
+    python breach_index.py build breached.txt breached.idx [--format sha1]
+    python breach_index.py check breached.idx PASSWORD
+"""
+
+# Standard library imports
+import argparse
+import hashlib
+import heapq
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+MAGIC = b"BRIX"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHQ")  # magic, version, width, reserved, count
+DEFAULT_WIDTH = 8
+RUN_SIZE = 4_000_000  # prefixes sorted in memory per run while building
+SHA1_LINE = re.compile(rb"^([0-9A-Fa-f]{40})(:\d+)?$")
+
+
+def password_digest(password):
+    """
+    Return the SHA-1 digest used as a password's index key.
+
+    Args:
+        password (str or bytes): The password.
+
+    Returns:
+        bytes: The 20-byte digest.
+    """
+    if isinstance(password, str):
+        password = password.encode("utf-8")
+    return hashlib.sha1(password).digest()  # nosec - a lookup key, not a password hash
+
+
+def _detect_format(path):
+    """Return ``"sha1"`` if the first non-empty line of ``path`` is a SHA-1 digest."""
+    with open(path, "rb") as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                return "sha1" if SHA1_LINE.match(line) else "plain"
+    return "plain"
+
+
+def _prefixes(path, input_format, width):
+    """
+    Yield the index key of every line of an input file.
+
+    Args:
+        path (str): Input file.
+        input_format (str): ``"plain"`` or ``"sha1"``.
+        width (int): Bytes of each digest to keep.
+
+    Yields:
+        bytes: One key per non-empty line.
+    """
+    with open(path, "rb") as file:
+        for number, line in enumerate(file, 1):
+            if input_format == "plain":
+                line = line.rstrip(b"\r\n")
+                if line:
+                    yield password_digest(line)[:width]
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            match = SHA1_LINE.match(line)
+            if not match:
+                logging.warning("Skipping line %d: not a SHA-1 digest", number)
+                continue
+            yield bytes.fromhex(match.group(1).decode())[:width]
+
+
+def _write_run(prefixes, directory):
+    """Sort one run of keys and write it to a temporary file; return its path."""
+    prefixes.sort()
+    fd, path = tempfile.mkstemp(prefix="breach-run-", dir=directory)
+    with os.fdopen(fd, "wb") as file:
+        file.write(b"".join(prefixes))
+    return path
+
+
+def _read_run(path, width):
+    """Yield the keys stored in a sorted run file."""
+    with open(path, "rb", buffering=1 << 20) as file:
+        while True:
+            record = file.read(width)
+            if len(record) < width:
+                return
+            yield record
+
+
+def build_index(source, destination, input_format="auto", width=DEFAULT_WIDTH,
+                run_size=RUN_SIZE):
+    """
+    Build a sorted, fixed-width index file from a password or SHA-1 list.
+
+    The index is written to a temporary file next to ``destination`` and
+    renamed into place, so running workers never see a partial index and pick
+    up the new one at their next reload check.
+
+    Args:
+        source (str): Input file with one password or SHA-1 digest per line.
+        destination (str): Path of the index file to write.
+        input_format (str): ``"plain"``, ``"sha1"`` or ``"auto"`` to decide
+            from the first line.
+        width (int): Bytes of each SHA-1 digest to store, between 4 and 20.
+        run_size (int): Keys sorted in memory at a time.
+
+    Returns:
+        int: Number of distinct entries in the index.
+
+    Raises:
+        ValueError: If ``width`` or ``input_format`` is invalid.
+    """
+    if not 4 <= width <= 20:
+        raise ValueError("width must be between 4 and 20 bytes")
+    if input_format == "auto":
+        input_format = _detect_format(source)
+    if input_format not in ("plain", "sha1"):
+        raise ValueError(f"Unknown input format '{input_format}'")
+
+    directory = os.path.dirname(os.path.abspath(destination))
+    runs = []
+    try:
+        batch = []
+        for prefix in _prefixes(source, input_format, width):
+            batch.append(prefix)
+            if len(batch) >= run_size:
+                runs.append(_write_run(batch, directory))
+                batch = []
+        if batch or not runs:
+            runs.append(_write_run(batch, directory))
+
+        fd, tmp_path = tempfile.mkstemp(prefix=".breach-index-", dir=directory)
+        count = 0
+        with os.fdopen(fd, "wb", buffering=1 << 20) as out:
+            out.write(HEADER.pack(MAGIC, VERSION, width, 0, 0))
+            previous = None
+            for record in heapq.merge(*(_read_run(path, width) for path in runs)):
+                if record != previous:
+                    out.write(record)
+                    count += 1
+                    previous = record
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, VERSION, width, 0, count))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, destination)
+    finally:
+        for path in runs:
+            os.unlink(path)
+    return count
+
+
+class BreachIndex:
+    """
+    Breached-password index backed by a memory-mapped file.
+
+    The file is mapped lazily on the first lookup in each process and
+    remapped when its modification time changes, using the same change
+    detection as ``PasswordBlocklist``.
+
+    Attributes:
+        path (str): Path to the index file.
+        check_interval (float): Minimum number of seconds between two
+            ``os.stat`` calls used to detect a rebuilt index.
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        """
+        Create an index reader for the given file without opening it yet.
+
+        Args:
+            path (str): Path to the index file.
+            check_interval (float): Minimum number of seconds between checks
+                of the file's modification time.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        # The map, key width and entry count, replaced together so a lookup
+        # never mixes a new map with an old width or count
+        self._state = None
+        self._mtime = None
+        self._pid = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "loads": 0,
+            "entries": 0,
+            "lookups": 0,
+            "hits": 0,
+            "lookup_seconds_total": 0.0,
+        }
+
+    def _open(self, mtime):
+        """
+        Map the index file and validate its header.
+
+        Args:
+            mtime (float): Modification time of the file being mapped.
+
+        Raises:
+            ValueError: If the file is not a valid index.
+        """
+        with open(self.path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, width, _, count = HEADER.unpack_from(mapped)
+        if magic != MAGIC or version != VERSION:
+            mapped.close()
+            raise ValueError(f"{self.path} is not a breach index")
+        if HEADER.size + width * count != len(mapped):
+            mapped.close()
+            raise ValueError(f"{self.path} is truncated")
+        if hasattr(mapped, "madvise"):
+            mapped.madvise(mmap.MADV_RANDOM)
+
+        # The old map is left for the garbage collector: a lookup in another
+        # thread may still be reading it.
+        self._state = (mapped, width, count)
+        self._mtime = mtime
+        self._pid = os.getpid()
+        self._stats["loads"] += 1
+        self._stats["entries"] = count
+        logging.info("Mapped breach index %s with %d entries", self.path, count)
+
+    def refresh(self, force=False):
+        """
+        Remap the index if the file has changed or this is a new process.
+
+        Args:
+            force (bool): Check the file even if ``check_interval`` has not
+                elapsed since the last check.
+
+        Raises:
+            OSError: If the file cannot be opened on the first load.
+            ValueError: If the file is not a valid index on the first load.
+        """
+        now = time.monotonic()
+        fresh = self._state is not None and self._pid == os.getpid()
+        if not force and fresh and now - self._last_check < self.check_interval:
+            return
+
+        with self._lock:
+            fresh = self._state is not None and self._pid == os.getpid()
+            if not force and fresh and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if mtime != self._mtime or not fresh:
+                    self._open(mtime)
+            except (OSError, ValueError) as err:
+                if self._state is None:
+                    raise
+                logging.error("Could not reload breach index %s: %s", self.path, err)
+
+    def __contains__(self, password):
+        """
+        Check whether a password appears in the breach corpus.
+
+        Args:
+            password (str): The password to look up.
+
+        Returns:
+            bool: True if the password's key is in the index.
+        """
+        self.refresh()
+        start = time.perf_counter()
+        mapped, width, count = self._state
+        key = password_digest(password)[:width]
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * width
+            if mapped[offset:offset + width] < key:
+                low = middle + 1
+            else:
+                high = middle
+        offset = HEADER.size + low * width
+        found = low < count and mapped[offset:offset + width] == key
+
+        self._stats["lookups"] += 1
+        self._stats["hits"] += found
+        self._stats["lookup_seconds_total"] += time.perf_counter() - start
+        return found
+
+    def stats(self):
+        """
+        Return a snapshot of the index's load and lookup statistics.
+
+        Returns:
+            dict: Number of loads, number of entries, number of lookups and
+                hits and the average lookup latency in seconds.
+        """
+        snapshot = dict(self._stats)
+        lookups = snapshot["lookups"]
+        snapshot["avg_lookup_seconds"] = (
+            snapshot["lookup_seconds_total"] / lookups if lookups else 0.0
+        )
+        return snapshot
+
+
+def main():
+    """Build an index or check a password from the command line."""
+    parser = argparse.ArgumentParser(description="Build or query a breached-password index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    builder = commands.add_parser("build", help="build an index from a password list")
+    builder.add_argument("source", help="plaintext or SHA-1 list, one entry per line")
+    builder.add_argument("destination", help="index file to write")
+    builder.add_argument("--format", choices=("auto", "plain", "sha1"), default="auto")
+    builder.add_argument("--width", type=int, default=DEFAULT_WIDTH,
+                         help=f"digest bytes per entry (default: {DEFAULT_WIDTH})")
+    builder.add_argument("--run-size", type=int, default=RUN_SIZE,
+                         help=f"entries sorted in memory at a time (default: {RUN_SIZE})")
+    checker = commands.add_parser("check", help="look up passwords in an index")
+    checker.add_argument("index", help="index file")
+    checker.add_argument("passwords", nargs="+")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    if args.command == "build":
+        start = time.perf_counter()
+        try:
+            count = build_index(args.source, args.destination, args.format,
+                                args.width, args.run_size)
+        except (OSError, ValueError) as err:
+            logging.error("%s", err)
+            sys.exit(1)
+        print(f"Indexed {count} entries into {args.destination} "
+              f"in {time.perf_counter() - start:.1f}s")
+    else:
+        index = BreachIndex(args.index)
+        for password in args.passwords:
+            print(f"{password}: {'breached' if password in index else 'not found'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Calibrate password-hash cost parameters for this host.
+
+This tool times Werkzeug's password hash methods on the current machine and
+finds, for each method, the strongest cost parameters whose median hashing
+time stays within a latency budget. The result is printed as a table and as
+the ``PASSWORD_HASH_METHOD`` setting to use; ``login`` then transparently
+rehashes stored passwords that were made with other parameters.
+
+PBKDF2 time grows linearly with the iteration count, so the iteration count
+is extrapolated from a short probe and then verified. scrypt's ``n`` must be
+a power of two and is doubled until the budget is exceeded.
+
+Functions:
+    time_method: Median time to hash a password with a method.
+    calibrate_pbkdf2: Highest PBKDF2 iteration count within the budget.
+    calibrate_scrypt: Highest scrypt work factor within the budget.
+
+Usage:
+    python calibrate_hash.py [--target-ms 50] [--repeat 5] [--json]
+"""
+
+# Standard library imports
+import argparse
+import json
+import statistics
+import time
+
+# Related third-party imports
+from werkzeug.security import generate_password_hash
+
+SAMPLE_PASSWORD = "Calibration_Passw0rd"
+
+# Werkzeug's defaults, used as the floor below which a warning is printed
+RECOMMENDED = {
+    "pbkdf2:sha256": 600000,
+    "pbkdf2:sha512": 210000,
+    "scrypt": 2**15,
+}
+
+
+def time_method(method, repeat):
+    """
+    Return the median time to hash a password with ``method``.
+
+    Args:
+        method (str): A Werkzeug method such as ``"pbkdf2:sha256:600000"``.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        float: Median duration in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generate_password_hash(SAMPLE_PASSWORD, method=method)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def calibrate_pbkdf2(hash_name, budget, repeat, probe_iterations=50000):
+    """
+    Find the highest PBKDF2 iteration count that fits the budget.
+
+    Args:
+        hash_name (str): Digest name, such as ``"sha256"``.
+        budget (float): Latency budget in seconds.
+        repeat (int): Number of timed runs per measurement.
+        probe_iterations (int): Iteration count used to estimate the rate.
+
+    Returns:
+        tuple: The method string and its measured median time in seconds.
+    """
+    probe = time_method(f"pbkdf2:{hash_name}:{probe_iterations}", repeat)
+    iterations = max(1000, int(probe_iterations * budget / probe) // 1000 * 1000)
+    elapsed = time_method(f"pbkdf2:{hash_name}:{iterations}", repeat)
+    while elapsed > budget and iterations > 1000:
+        iterations = max(1000, int(iterations * budget / elapsed * 0.95) // 1000 * 1000)
+        elapsed = time_method(f"pbkdf2:{hash_name}:{iterations}", repeat)
+    return f"pbkdf2:{hash_name}:{iterations}", elapsed
+
+
+def calibrate_scrypt(budget, repeat, r=8, p=1):
+    """
+    Find the highest power-of-two scrypt ``n`` that fits the budget.
+
+    Args:
+        budget (float): Latency budget in seconds.
+        repeat (int): Number of timed runs per measurement.
+        r (int): scrypt block size.
+        p (int): scrypt parallelisation factor.
+
+    Returns:
+        tuple: The method string and its measured median time in seconds.
+    """
+    n = 2**10
+    best = (f"scrypt:{n}:{r}:{p}", time_method(f"scrypt:{n}:{r}:{p}", repeat))
+    while n < 2**22:
+        n *= 2
+        elapsed = time_method(f"scrypt:{n}:{r}:{p}", repeat)
+        if elapsed > budget:
+            break
+        best = (f"scrypt:{n}:{r}:{p}", elapsed)
+    return best
+
+
+def _cost(method):
+    """Return the family and cost parameter of a calibrated method."""
+    parts = method.split(":")
+    if parts[0] == "scrypt":
+        return "scrypt", int(parts[1])
+    return f"{parts[0]}:{parts[1]}", int(parts[2])
+
+
+def main():
+    """Calibrate every method and report the results."""
+    parser = argparse.ArgumentParser(description="Calibrate password hash cost for this host.")
+    parser.add_argument("--target-ms", type=float, default=50.0,
+                        help="latency budget per hash in milliseconds (default: 50)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timed runs per measurement (default: 5)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    budget = args.target_ms / 1000
+
+    results = []
+    for hash_name in ("sha256", "sha512"):
+        results.append(calibrate_pbkdf2(hash_name, budget, args.repeat))
+    results.append(calibrate_scrypt(budget, args.repeat))
+
+    rows = []
+    for method, elapsed in results:
+        family, cost = _cost(method)
+        rows.append({
+            "method": method,
+            "median_ms": round(elapsed * 1000, 2),
+            "meets_recommended_cost": cost >= RECOMMENDED[family],
+        })
+
+    # Prefer scrypt (memory-hard) when it meets the recommended cost
+    recommended = next((row for row in rows if row["method"].startswith("scrypt")
+                        and row["meets_recommended_cost"]), None)
+    if recommended is None:
+        recommended = next((row for row in rows if row["meets_recommended_cost"]), rows[-1])
+
+    if args.json:
+        print(json.dumps({"target_ms": args.target_ms, "results": rows,
+                          "recommended": recommended["method"]}, indent=4))
+        return
+
+    print(f"Budget: {args.target_ms:.0f} ms per hash\n")
+    print(f"{'method':<28}{'median ms':>12}  recommended cost")
+    for row in rows:
+        flag = "yes" if row["meets_recommended_cost"] else "NO - below Werkzeug default"
+        print(f"{row['method']:<28}{row['median_ms']:>12}  {flag}")
+    print(f"\nPASSWORD_HASH_METHOD={recommended['method']}")
+    if not recommended["meets_recommended_cost"]:
+        print("Warning: no method reaches the recommended cost within this budget; "
+              "consider a larger --target-ms.")
+
+
+if __name__ == "__main__":
+    main()
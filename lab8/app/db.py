@@ -0,0 +1,150 @@
+"""
+SQLite connection management for the Demon Slayer fan site.
+
+Opening a SQLite connection for every request is wasteful when uwsgi serves
+the application from a small, fixed set of worker threads. This module keeps
+one connection per thread (and per process, so connections never leak across
+a uwsgi fork) and hands it out to request handlers through ``get_db``. Every
+connection runs in WAL mode with a busy timeout, so readers such as ``login``
+never wait behind a registration write, and uses the sqlite3 module's
+prepared-statement cache so repeated queries are not re-parsed. Statements
+run through the connection's cursors are timed into the
+``db_query_seconds`` metric.
+
+Classes:
+    TimedCursor: Cursor that records how long each statement takes.
+    TimedConnection: Connection whose cursors are ``TimedCursor`` objects.
+
+Functions:
+    connect: Open a tuned SQLite connection.
+    get_db: Return the current thread's connection to the users database.
+    release_db: Return the connection to a clean state at app-context teardown.
+    init_app: Register the teardown handler on a Flask application.
+"""
+
+# Standard library imports
+import logging
+import os
+import sqlite3
+import threading
+
+# Related third-party imports
+from flask import current_app
+
+# Local application imports
+from metrics import registry
+
+BUSY_TIMEOUT_MS = 5000
+CACHED_STATEMENTS = 128
+
+_local = threading.local()
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records the duration of each statement it executes."""
+
+    def execute(self, sql, parameters=()):
+        """Execute a statement and record its duration by statement type."""
+        with registry.timer("db_query_seconds", database=self.connection.label,
+                            statement=sql.split(None, 1)[0].upper()):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        """Execute a statement for each parameter set and record the total duration."""
+        with registry.timer("db_query_seconds", database=self.connection.label,
+                            statement=sql.split(None, 1)[0].upper()):
+            return super().executemany(sql, seq_of_parameters)
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    Connection whose cursors time their statements.
+
+    Attributes:
+        label (str): Name of the database file, used as a metric label.
+    """
+
+    label = "unknown"
+
+    def cursor(self, factory=TimedCursor):
+        """Return a new ``TimedCursor`` by default."""
+        return super().cursor(factory)
+
+
+def connect(path):
+    """
+    Open a SQLite connection configured for concurrent web traffic.
+
+    The connection uses write-ahead logging so readers and a writer can work
+    at the same time, waits up to ``BUSY_TIMEOUT_MS`` for locks instead of
+    failing immediately, and caches up to ``CACHED_STATEMENTS`` prepared
+    statements.
+
+    Args:
+        path (str): Path to the SQLite database file.
+
+    Returns:
+        sqlite3.Connection: The configured connection.
+    """
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=CACHED_STATEMENTS,
+        factory=TimedConnection,
+    )
+    conn.label = os.path.basename(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def get_db():
+    """
+    Return the current thread's connection to the users database.
+
+    The connection is opened on first use and reused by every later request
+    served by the same thread. A connection inherited from a parent process
+    is never reused; a fresh one is opened instead.
+
+    Returns:
+        sqlite3.Connection: The thread's database connection.
+    """
+    path = current_app.config["DATABASE"]
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid() or _local.path != path:
+        conn = connect(path)
+        _local.conn = conn
+        _local.pid = os.getpid()
+        _local.path = path
+        logging.debug("Opened SQLite connection to %s in process %d", path, _local.pid)
+    return conn
+
+
+def release_db(exc=None):
+    """
+    Return the thread's connection to a clean state when the app context ends.
+
+    The connection itself stays open for the next request. Any transaction
+    left open by a failed request is rolled back so it cannot hold locks.
+
+    Args:
+        exc (Exception): The exception that ended the app context, if any.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        return
+    if conn.in_transaction:
+        if exc is not None:
+            logging.warning("Rolling back open transaction after error: %s", exc)
+        conn.rollback()
+
+
+def init_app(app):
+    """
+    Register the connection teardown handler on a Flask application.
+
+    Args:
+        app (flask.Flask): The application to configure.
+    """
+    app.teardown_appcontext(release_db)
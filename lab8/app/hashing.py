@@ -0,0 +1,375 @@
+"""
+Password hashing offloaded to a bounded process pool.
+
+PBKDF2 and scrypt hashing are deliberately CPU-heavy. Running them inline on
+one of uwsgi's few request threads holds the GIL and stalls every other page
+served by the same worker. This module runs ``generate_password_hash`` and
+``check_password_hash`` in a separate pool of processes instead, and caps the
+number of hashing jobs that may be queued or running at once. When the cap is
+reached new jobs are rejected immediately with ``HashingPoolSaturated`` so the
+application can answer with a fast 503 rather than piling up threads. A job
+whose result does not arrive within the pool's timeout is cancelled if it has
+not started and reported with the same exception, as the pool is backed up. The
+``*_async`` variants await the same jobs from an asyncio event loop.
+
+Under uwsgi every worker process starts its own pool, so the defaults are sized
+from the server layout: the CPUs are shared out between the workers, and a
+worker accepts no more jobs than it has hashing processes or request threads.
+A job therefore never waits behind another one, and a login that would have to
+is answered with the 503 straight away.
+
+The pool also holds the configured hashing policy: new hashes are generated
+with the policy's method, and ``needs_rehash`` tells whether a stored hash was
+made with different parameters so it can be upgraded at the next login.
+
+Classes:
+    HashingPoolSaturated: Raised when the pool has no free slot.
+    HashingPool: Bounded process pool for password hashing.
+
+Functions:
+    normalize_method: Expand a Werkzeug hash method to its full parameters.
+    server_layout: Number of uwsgi worker processes and threads per worker.
+"""
+
+# Standard library imports
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import logging
+import os
+import threading
+import time
+
+# Related third-party imports
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+)
+
+# Local application imports
+from metrics import registry
+
+try:
+    import uwsgi
+except ImportError:  # not running under uwsgi
+    uwsgi = None
+
+
+def normalize_method(method):
+    """
+    Expand a Werkzeug hash method to the full form stored in its hashes.
+
+    ``"scrypt"`` becomes ``"scrypt:32768:8:1"`` and ``"pbkdf2"`` becomes
+    ``"pbkdf2:sha256:600000"``, matching the prefix Werkzeug writes in front
+    of the salt, so a stored hash's method can be compared with the policy.
+
+    Args:
+        method (str): A method such as ``"scrypt"`` or ``"pbkdf2:sha256:600000"``.
+
+    Returns:
+        str: The method with every parameter spelled out.
+
+    Raises:
+        ValueError: If the method is not supported by Werkzeug.
+    """
+    name, *args = method.split(":")
+    if name == "scrypt":
+        n, r, p = map(int, args) if args else (2**15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Invalid hash method '{method}'.")
+
+
+def server_layout():
+    """
+    Return the number of uwsgi worker processes and request threads per worker.
+
+    Returns:
+        tuple: The number of processes and of threads per process, or
+            ``(1, None)`` when not running under uwsgi.
+    """
+    if uwsgi is None:
+        return 1, None
+    threads = uwsgi.opt.get("threads", 1)
+    if isinstance(threads, list):  # the option was given more than once
+        threads = threads[-1]
+    return max(1, uwsgi.numproc), max(1, int(threads))
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when a hashing job is submitted while the pool is at capacity."""
+
+
+class HashingPool:
+    """
+    Bounded process pool for password hashing.
+
+    The executor is created lazily on first use and recreated if the current
+    process id changes, so a pool is never shared across a uwsgi fork.
+
+    Attributes:
+        max_workers (int): Number of hashing processes.
+        max_in_flight (int): Maximum number of jobs queued or running at once.
+        timeout (float): Seconds to wait for a job's result before giving up.
+        method (str): Fully expanded hash method used for new hashes.
+    """
+
+    def __init__(self, max_workers=None, max_in_flight=None, timeout=30.0,
+                 method="scrypt"):
+        """
+        Configure the pool without starting any processes.
+
+        Args:
+            max_workers (int): Number of hashing processes. Defaults to the
+                number of CPUs divided between the uwsgi worker processes.
+            max_in_flight (int): Maximum number of jobs queued or running at
+                once. Defaults to ``max_workers``, or to the threads per
+                worker if fewer, under uwsgi and to twice ``max_workers``
+                otherwise.
+            timeout (float): Seconds to wait for a job's result.
+            method (str): Werkzeug hash method for new hashes.
+        """
+        self.method = normalize_method(method)
+        processes, threads = server_layout()
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 1) // processes)
+        if max_in_flight is None:
+            max_in_flight = (self.max_workers * 2 if threads is None
+                             else min(self.max_workers, threads))
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "completed": 0, "rejected": 0, "timed_out": 0}
+
+    def _get_executor(self):
+        """
+        Return the executor for the current process, creating it if needed.
+
+        Returns:
+            concurrent.futures.ProcessPoolExecutor: The process pool.
+        """
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            with self._lock:
+                if self._executor is None or self._pid != pid:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        initializer=_start_parent_watch, initargs=(pid,),
+                    )
+                    self._pid = pid
+                    logging.info(
+                        "Started password hashing pool with %d workers in process %d",
+                        self.max_workers, pid
+                    )
+        return self._executor
+
+    def _release(self, _future):
+        """Free the slot held by a finished job."""
+        self._stats["completed"] += 1
+        self._slots.release()
+
+    def _timed_out(self, future):
+        """
+        Give up on a job whose result did not arrive in time.
+
+        Args:
+            future (concurrent.futures.Future): The job's future.
+
+        Returns:
+            HashingPoolSaturated: The exception to raise to the caller.
+        """
+        future.cancel()
+        self._stats["timed_out"] += 1
+        logging.warning("Password hashing job timed out after %gs", self.timeout)
+        return HashingPoolSaturated("Password hashing job timed out")
+
+    def submit(self, fn, *args):
+        """
+        Submit a hashing job to the pool.
+
+        Args:
+            fn (callable): The picklable function to run.
+            *args: Arguments passed to ``fn``.
+
+        Returns:
+            concurrent.futures.Future: The future for the job's result.
+
+        Raises:
+            HashingPoolSaturated: If ``max_in_flight`` jobs are already queued
+                or running.
+        """
+        if not self._slots.acquire(blocking=False):
+            self._stats["rejected"] += 1
+            logging.warning("Password hashing pool saturated; rejecting job")
+            raise HashingPoolSaturated("Too many password hashing jobs in flight")
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        self._stats["submitted"] += 1
+        future.add_done_callback(self._release)
+        return future
+
+    def generate_password_hash(self, password, **kwargs):
+        """
+        Hash a password in the pool with the configured method.
+
+        Args:
+            password (str): The plaintext password.
+            **kwargs: Extra arguments for ``werkzeug.security.generate_password_hash``.
+
+        Returns:
+            str: The password hash.
+
+        Raises:
+            HashingPoolSaturated: If the pool has no free slot or the job
+                timed out.
+        """
+        kwargs.setdefault("method", self.method)
+        with registry.timer("password_hash_seconds", operation="generate"):
+            future = self.submit(_generate, password, kwargs)
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError as err:
+                raise self._timed_out(future) from err
+
+    def check_password_hash(self, pwhash, password):
+        """
+        Verify a password against a stored hash in the pool.
+
+        Args:
+            pwhash (str): The stored password hash.
+            password (str): The plaintext password to check.
+
+        Returns:
+            bool: True if the password matches the hash, False otherwise.
+
+        Raises:
+            HashingPoolSaturated: If the pool has no free slot or the job
+                timed out.
+        """
+        with registry.timer("password_hash_seconds", operation="check"):
+            future = self.submit(check_password_hash, pwhash, password)
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError as err:
+                raise self._timed_out(future) from err
+
+    async def generate_password_hash_async(self, password, **kwargs):
+        """
+        Hash a password in the pool without blocking the event loop.
+
+        Args:
+            password (str): The plaintext password.
+            **kwargs: Extra arguments for ``werkzeug.security.generate_password_hash``.
+
+        Returns:
+            str: The password hash.
+
+        Raises:
+            HashingPoolSaturated: If the pool has no free slot or the job
+                timed out.
+        """
+        kwargs.setdefault("method", self.method)
+        with registry.timer("password_hash_seconds", operation="generate"):
+            future = self.submit(_generate, password, kwargs)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+            except asyncio.TimeoutError as err:
+                raise self._timed_out(future) from err
+
+    async def check_password_hash_async(self, pwhash, password):
+        """
+        Verify a password against a stored hash without blocking the event loop.
+
+        Args:
+            pwhash (str): The stored password hash.
+            password (str): The plaintext password to check.
+
+        Returns:
+            bool: True if the password matches the hash, False otherwise.
+
+        Raises:
+            HashingPoolSaturated: If the pool has no free slot or the job
+                timed out.
+        """
+        with registry.timer("password_hash_seconds", operation="check"):
+            future = self.submit(check_password_hash, pwhash, password)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+            except asyncio.TimeoutError as err:
+                raise self._timed_out(future) from err
+
+    def needs_rehash(self, pwhash):
+        """
+        Check whether a stored hash was made with a different method or cost.
+
+        Args:
+            pwhash (str): The stored password hash.
+
+        Returns:
+            bool: True if the hash's parameters differ from the policy.
+        """
+        try:
+            return normalize_method(pwhash.split("$", 1)[0]) != self.method
+        except ValueError:
+            return True
+
+    def stats(self):
+        """
+        Return a snapshot of the pool's job counters.
+
+        Returns:
+            dict: Numbers of submitted, completed, rejected and timed-out
+                jobs, jobs currently in flight and the configured limits.
+        """
+        snapshot = dict(self._stats)
+        snapshot["in_flight"] = snapshot["submitted"] - snapshot["completed"]
+        snapshot["max_workers"] = self.max_workers
+        snapshot["max_in_flight"] = self.max_in_flight
+        return snapshot
+
+    def shutdown(self):
+        """Stop the pool's processes if they were started by this process."""
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=True)
+        self._executor = None
+        self._pid = None
+
+
+def _start_parent_watch(parent_pid):
+    """
+    End this hashing process once the process that started the pool has died.
+
+    Runs as the pool's initializer. A uwsgi worker killed at shutdown never
+    stops its pool, and the pool's processes would otherwise wait for jobs
+    forever.
+
+    Args:
+        parent_pid (int): Process id of the process that owns the pool.
+    """
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(1)
+        os._exit(0)  # pylint: disable=protected-access
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+def _generate(password, kwargs):
+    """
+    Call ``generate_password_hash`` with keyword arguments in a pool process.
+
+    Args:
+        password (str): The plaintext password.
+        kwargs (dict): Keyword arguments for ``generate_password_hash``.
+
+    Returns:
+        str: The password hash.
+    """
+    return generate_password_hash(password, **kwargs)
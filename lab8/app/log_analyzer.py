@@ -0,0 +1,670 @@
+"""
+Streaming analysis of the Demon Slayer fan site's application log.
+
+``logs/app.log`` records failed logins with the client's IP address,
+non-authenticated access attempts, registrations, a summary line for every
+sampled request (see ``tracing.py``) and, when the development server is
+used, one access line per request. Each request is counted once: an access
+line following the summary of the same request is skipped. Sampled summaries
+are also scaled by their sample rate into estimated request and status
+counts, while slow requests and server errors, which are always logged,
+count once. This module reads the current
+log and its rotated predecessors (``app.log.5`` ... ``app.log.1``) in order,
+one line at a time, and folds every line into running aggregates:
+
+    - failed logins per IP address and per username,
+    - non-authenticated access attempts per endpoint and per IP address,
+    - requests and status codes per route,
+    - successful logins, registrations and lines per level.
+
+Lines are parsed as bytes with precompiled patterns, and per-key counters are
+capped, keeping the most frequent keys, so memory stays constant however
+large the logs grow. With ``--follow`` the current log is tailed across
+rotations and a report over a rolling window of recent minutes is printed
+periodically.
+
+Time-range queries (``--since``/``--until``) use a small index per log file,
+kept in ``logs/index``: the timestamp and byte offset of the first line after
+every ``INDEX_INTERVAL`` bytes. A query seeks straight to the checkpoint
+before the start of the range and stops reading at its end. Index files are
+named after the log file's inode, so they stay valid when the log is rotated,
+and are extended incrementally as the log grows.
+
+Classes:
+    TopCounter: Counter that keeps at most a fixed number of keys.
+    RollingCounter: Counts per minute over a sliding window of minutes.
+    LogStats: Running aggregates over parsed log lines.
+    LogIndex: Timestamp-to-offset checkpoints for one log file.
+
+Functions:
+    log_files: Return a log and its rotated files, oldest first.
+    scan: Feed the lines of a time range from a set of log files into LogStats.
+    follow: Tail a log across rotations, reporting periodically.
+
+Usage:
+    python log_analyzer.py [logs/app.log] [--since "2023-12-10 19:00"] [--until ...]
+    python log_analyzer.py --follow --window 5 --interval 10
+"""
+
+# Standard library imports
+import argparse
+from bisect import bisect_left
+from collections import Counter, deque
+from datetime import datetime, timedelta
+import glob
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import tempfile
+import time
+
+# "2023-12-10 19:18:38,459 INFO: message [in path:lineno]"
+LINE = re.compile(rb"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),\d{3} ([A-Z]+): ")
+FAILED_LOGIN = re.compile(rb"Failed login attempt for username: (.*?)\. IP: (\S+)")
+UNAUTHENTICATED = re.compile(rb"Non-authenticated access attempt to (\S+)\. IP: (\S+)")
+# Werkzeug access lines, optionally wrapped in terminal colour codes
+ACCESS = re.compile(
+    rb'\S+ - - \[[^\]]*\] "(?:\x1b\[[0-9;]*m)*([A-Z]+) ([^ ?"]*)\S* HTTP/[0-9.]+'
+    rb'(?:\x1b\[0m)?" (\d{3})'
+)
+# Request summaries written by tracing.finish; older lines lack the sampling fields
+REQUEST = re.compile(
+    rb"Request ([A-Z]+) (\S+) status=(\d{3}) (?:.*? sample=([0-9.e+-]+) always=([01]))?"
+)
+LOGGED_IN = re.compile(rb"User logged in: ")
+REGISTERED = re.compile(rb"New user registered: ")
+TIME_ARG = re.compile(r"\d{4}-\d\d-\d\d(?: \d\d(?::\d\d(?::\d\d)?)?)?$")
+
+LOWEST_TIME = "0000-00-00 00:00:00"
+MAX_KEYS = 10000
+PENDING_SUMMARIES = 1024  # recent summaries awaiting the matching access line
+
+MAGIC = b"LGIX"
+VERSION = 1
+HEADER = struct.Struct("<4sBIQQ20s")  # magic, version, interval, inode, count, head digest
+ENTRY = struct.Struct("<19sQ")  # timestamp, offset
+INDEX_INTERVAL = 1 << 20
+HEAD_BYTES = 1024  # most of the first line, whose digest identifies a log file
+
+
+class TopCounter:
+    """
+    Counter that keeps at most about ``max_keys`` keys.
+
+    When the number of keys reaches twice the limit, only the ``max_keys``
+    most frequent ones are kept, so rare keys such as scanned usernames
+    cannot grow the counter without bound. Counts are exact until the first
+    pruning and approximate afterwards.
+
+    Attributes:
+        max_keys (int): Number of keys kept when pruning.
+        pruned (bool): Whether any key has been dropped.
+    """
+
+    def __init__(self, max_keys=MAX_KEYS):
+        """
+        Args:
+            max_keys (int): Number of keys kept when pruning.
+        """
+        self.max_keys = max_keys
+        self.pruned = False
+        self._counts = Counter()
+
+    def add(self, key, count=1):
+        """Add ``count`` to ``key``, pruning rare keys if there are too many."""
+        self._counts[key] += count
+        if len(self._counts) >= 2 * self.max_keys:
+            self._counts = Counter(dict(self._counts.most_common(self.max_keys)))
+            self.pruned = True
+
+    def most_common(self, n=None):
+        """Return the ``n`` most frequent keys and their counts."""
+        return self._counts.most_common(n)
+
+    def get(self, key):
+        """Return the count of ``key``, 0 if it is not kept."""
+        return self._counts.get(key, 0)
+
+    def total(self):
+        """Return the sum of all counts kept."""
+        return sum(self._counts.values())
+
+
+class RollingCounter:
+    """
+    Counts per minute over a sliding window of the most recent minutes.
+
+    Minutes are taken from the log lines' timestamps rather than the clock,
+    so the window is the same whether a log is read live or afterwards.
+
+    Attributes:
+        minutes (int): Length of the window in minutes.
+    """
+
+    def __init__(self, minutes=5):
+        """
+        Args:
+            minutes (int): Length of the window in minutes.
+        """
+        self.minutes = minutes
+        self._buckets = deque()  # (minute, datetime, Counter), oldest first
+
+    def add(self, timestamp, key):
+        """
+        Count ``key`` in the minute of ``timestamp`` and expire old minutes.
+
+        Args:
+            timestamp (str): Line timestamp, ``"YYYY-MM-DD HH:MM:SS"``.
+            key: The key to count.
+        """
+        minute = timestamp[:16]
+        if not self._buckets or self._buckets[-1][0] != minute:
+            if self._buckets and minute < self._buckets[-1][0]:
+                # A line written slightly out of order belongs to an earlier minute
+                for bucket_minute, _, counts in reversed(self._buckets):
+                    if bucket_minute <= minute:
+                        counts[key] += 1
+                        return
+                return
+            start = datetime.strptime(minute, "%Y-%m-%d %H:%M")
+            self._buckets.append((minute, start, Counter()))
+            while start - self._buckets[0][1] >= timedelta(minutes=self.minutes):
+                self._buckets.popleft()
+        self._buckets[-1][2][key] += 1
+
+    def most_common(self, n=None):
+        """Return the ``n`` most frequent keys within the window."""
+        total = Counter()
+        for _, _, counts in self._buckets:
+            total.update(counts)
+        return total.most_common(n)
+
+
+class LogStats:
+    """
+    Running aggregates over the lines of an application log.
+
+    Attributes:
+        lines (int): Lines read, including continuation lines.
+        first (str): Timestamp of the first parsed line.
+        last (str): Timestamp of the last parsed line.
+        levels (collections.Counter): Parsed lines per level name.
+        events (collections.Counter): Successful logins and registrations.
+        sampled (int): Request summaries that stand for more than one request.
+    """
+
+    def __init__(self, max_keys=MAX_KEYS, window_minutes=5):
+        """
+        Args:
+            max_keys (int): Keys kept per counter.
+            window_minutes (int): Length of the rolling window of failed logins.
+        """
+        self.lines = 0
+        self.first = None
+        self.last = None
+        self.levels = Counter()
+        self.events = Counter()
+        self.failed_by_ip = TopCounter(max_keys)
+        self.failed_by_user = TopCounter(max_keys)
+        self.unauthenticated_by_endpoint = TopCounter(max_keys)
+        self.unauthenticated_by_ip = TopCounter(max_keys)
+        self.requests_by_route = TopCounter(max_keys)
+        self.estimated_by_route = TopCounter(max_keys)
+        self.statuses_by_route = {}
+        self.sampled = 0
+        self.recent_failed_by_ip = RollingCounter(window_minutes)
+        self._summaries = {}  # (method, path, status) -> weights of unmatched summaries
+
+    def _add_request(self, found, weight, logged=True):
+        """
+        Count a request line's route and status.
+
+        Args:
+            found (re.Match): ``REQUEST`` or ``ACCESS`` match.
+            weight (float): Number of requests the line stands for.
+            logged (bool): Whether the line is a newly logged request, rather
+                than a correction of one already counted.
+        """
+        route = f"{found.group(1).decode('ascii')} {found.group(2).decode('utf-8', 'replace')}"
+        if logged:
+            self.requests_by_route.add(route)
+        self.estimated_by_route.add(route, weight)
+        statuses = self.statuses_by_route.get(route)
+        if statuses is None:
+            if len(self.statuses_by_route) >= self.requests_by_route.max_keys:
+                return
+            statuses = self.statuses_by_route[route] = Counter()
+        statuses[found.group(3).decode("ascii")] += weight
+
+    def add_line(self, line, timestamp=None, match=None):
+        """
+        Fold one raw log line into the aggregates.
+
+        Args:
+            line (bytes): The line, including its newline.
+            timestamp (str): The line's timestamp, if already parsed.
+            match (re.Match): The line's ``LINE`` match, if already parsed.
+        """
+        self.lines += 1
+        if match is None:
+            match = LINE.match(line)
+            if match is None:
+                return  # continuation of a multi-line message
+            timestamp = match.group(1).decode("ascii")
+        if self.first is None:
+            self.first = timestamp
+        self.last = timestamp
+        self.levels[match.group(2).decode("ascii")] += 1
+
+        start = match.end()
+        found = FAILED_LOGIN.match(line, start)
+        if found:
+            ip = found.group(2).decode("utf-8", "replace")
+            self.failed_by_ip.add(ip)
+            self.failed_by_user.add(found.group(1).decode("utf-8", "replace"))
+            self.recent_failed_by_ip.add(timestamp, ip)
+            return
+        found = UNAUTHENTICATED.match(line, start)
+        if found:
+            self.unauthenticated_by_endpoint.add(found.group(1).decode("utf-8", "replace"))
+            self.unauthenticated_by_ip.add(found.group(2).decode("utf-8", "replace"))
+            return
+        found = REQUEST.match(line, start)
+        if found:
+            rate = float(found.group(4)) if found.group(4) else 1.0
+            weight = 1.0 if found.group(5) == b"1" or not 0 < rate < 1 else 1 / rate
+            if weight != 1.0:
+                self.sampled += 1
+            key = found.group(1, 2, 3)
+            self._summaries[key] = self._summaries.pop(key, ()) + (weight,)
+            if len(self._summaries) > PENDING_SUMMARIES:
+                del self._summaries[next(iter(self._summaries))]
+            self._add_request(found, weight)
+            return
+        found = ACCESS.match(line, start)
+        if found:
+            key = found.group(1, 2, 3)
+            weights = self._summaries.get(key)
+            if weights:
+                # The development server logs every request after its summary:
+                # the request is already counted, and counts as exactly one
+                if len(weights) > 1:
+                    self._summaries[key] = weights[1:]
+                else:
+                    del self._summaries[key]
+                if weights[0] != 1.0:
+                    self.sampled -= 1
+                    self._add_request(found, 1.0 - weights[0], logged=False)
+            else:
+                self._add_request(found, 1.0)
+            return
+        if LOGGED_IN.match(line, start):
+            self.events["logins"] += 1
+        elif REGISTERED.match(line, start):
+            self.events["registrations"] += 1
+
+    def report(self, top=10):
+        """
+        Return the aggregates as a JSON-serialisable dict.
+
+        Args:
+            top (int): Number of keys listed per counter.
+
+        Returns:
+            dict: Totals and the most frequent keys of every counter.
+        """
+        counters = {
+            "failed_logins_by_ip": self.failed_by_ip,
+            "failed_logins_by_username": self.failed_by_user,
+            "unauthenticated_by_endpoint": self.unauthenticated_by_endpoint,
+            "unauthenticated_by_ip": self.unauthenticated_by_ip,
+        }
+        report = {
+            "lines": self.lines,
+            "first": self.first,
+            "last": self.last,
+            "levels": dict(self.levels),
+            "events": dict(self.events),
+            "failed_logins": self.failed_by_ip.total(),
+            "unauthenticated": self.unauthenticated_by_ip.total(),
+            "requests": self.requests_by_route.total(),
+            "estimated_requests": round(self.estimated_by_route.total()),
+            "sampled_requests": self.sampled,
+            "approximate": any(counter.pruned for counter in counters.values())
+            or self.requests_by_route.pruned or self.estimated_by_route.pruned,
+        }
+        for name, counter in counters.items():
+            report[name] = dict(counter.most_common(top))
+        report["routes"] = {
+            route: {
+                "requests": self.requests_by_route.get(route),
+                "estimated": round(estimated),
+                "statuses": {
+                    status: round(count)
+                    for status, count in self.statuses_by_route.get(route, {}).items()
+                },
+            }
+            for route, estimated in self.estimated_by_route.most_common(top)
+        }
+        report[f"failed_logins_by_ip_last_{self.recent_failed_by_ip.minutes}m"] = dict(
+            self.recent_failed_by_ip.most_common(top)
+        )
+        return report
+
+
+class LogIndex:
+    """
+    Timestamp-to-offset checkpoints for one log file.
+
+    The index holds the timestamp and offset of the first timestamped line
+    after every ``interval`` bytes of the log. Building it reads only a few
+    lines per interval, and updating it only looks at the part of the log
+    written since the last checkpoint. The index is identified by the log's
+    inode and a digest of its first line, and rebuilt when either differs.
+
+    Attributes:
+        log_path (str): Path to the log file.
+        index_path (str): Path to the index file.
+        interval (int): Bytes between two checkpoints.
+    """
+
+    def __init__(self, log_path, index_dir, interval=INDEX_INTERVAL):
+        """
+        Load the index of a log file, if one exists and is still valid.
+
+        Args:
+            log_path (str): Path to the log file.
+            index_dir (str): Directory holding the index files.
+            interval (int): Bytes between two checkpoints.
+        """
+        self.log_path = log_path
+        self.interval = interval
+        self._inode = os.stat(log_path).st_ino
+        self.index_path = os.path.join(index_dir, f"{self._inode}.idx")
+        self._head = self._head_digest()
+        self.timestamps = []
+        self.offsets = []
+        self._load()
+
+    def _head_digest(self):
+        """Return the SHA-1 digest of the log's first line."""
+        with open(self.log_path, "rb") as file:
+            return hashlib.sha1(file.readline(HEAD_BYTES)).digest()  # nosec - file identity only
+
+    def _load(self):
+        """Read the index file, ignoring it if it belongs to another log."""
+        try:
+            with open(self.index_path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return
+        if len(data) < HEADER.size:
+            return
+        magic, version, interval, inode, count, head = HEADER.unpack_from(data)
+        if (magic, version, interval, inode, head) != (
+                MAGIC, VERSION, self.interval, self._inode, self._head):
+            return
+        if len(data) != HEADER.size + count * ENTRY.size:
+            return
+        for timestamp, offset in ENTRY.iter_unpack(data[HEADER.size:]):
+            self.timestamps.append(timestamp.decode("ascii"))
+            self.offsets.append(offset)
+
+    def update(self):
+        """
+        Add checkpoints for the part of the log written since the last update.
+
+        Returns:
+            int: Number of checkpoints added.
+        """
+        size = os.path.getsize(self.log_path)
+        if self.offsets and self.offsets[-1] >= size:
+            self.timestamps, self.offsets = [], []  # the log was truncated
+        added = 0
+        position = self.offsets[-1] + self.interval if self.offsets else 0
+        with open(self.log_path, "rb") as file:
+            while position < size:
+                file.seek(position)
+                if position:
+                    file.readline()  # skip the rest of a partial line
+                while True:
+                    offset = file.tell()
+                    line = file.readline()
+                    if not line:
+                        return self._save(added)
+                    match = LINE.match(line)
+                    if match:
+                        break
+                timestamp = match.group(1).decode("ascii")
+                if not self.timestamps or timestamp >= self.timestamps[-1]:
+                    self.timestamps.append(timestamp)
+                    self.offsets.append(offset)
+                    added += 1
+                position = offset + self.interval
+        return self._save(added)
+
+    def _save(self, added):
+        """Write the index atomically if checkpoints were added; return ``added``."""
+        if not added:
+            return added
+        directory = os.path.dirname(self.index_path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".log-index-", dir=directory)
+            with os.fdopen(fd, "wb") as out:
+                out.write(HEADER.pack(MAGIC, VERSION, self.interval, self._inode,
+                                      len(self.offsets), self._head))
+                for timestamp, offset in zip(self.timestamps, self.offsets):
+                    out.write(ENTRY.pack(timestamp.encode("ascii"), offset))
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.index_path)
+        except OSError as err:
+            print(f"Warning: could not save log index {self.index_path}: {err}", file=sys.stderr)
+        return added
+
+    def seek_offset(self, since):
+        """
+        Return the offset of the last checkpoint before a point in time.
+
+        Args:
+            since (str): Start of the range, ``"YYYY-MM-DD HH:MM:SS"``.
+
+        Returns:
+            int: Byte offset from which every line at or after ``since`` is read.
+        """
+        position = bisect_left(self.timestamps, since) - 1
+        return self.offsets[position] if position >= 0 else 0
+
+
+def log_files(path):
+    """
+    Return a log file and its rotated predecessors, oldest first.
+
+    Args:
+        path (str): The current log file, such as ``logs/app.log``.
+
+    Returns:
+        list: ``path.N`` ... ``path.1`` followed by ``path``, for those that exist.
+    """
+    rotated = [name for name in glob.glob(glob.escape(path) + ".*")
+               if name[len(path) + 1:].isdigit()]
+    rotated.sort(key=lambda name: int(name[len(path) + 1:]), reverse=True)
+    return rotated + ([path] if os.path.exists(path) else [])
+
+
+def _in_range(timestamp, until):
+    """Return whether a timestamp is not past ``until``, compared at its precision."""
+    return until is None or timestamp[:len(until)] <= until
+
+
+def scan(paths, stats, since=None, until=None, index_dir=None):
+    """
+    Feed the lines of a time range from a set of log files into ``stats``.
+
+    Args:
+        paths (list): Log files, oldest first.
+        stats (LogStats): Aggregates to update.
+        since (str): Inclusive start, ``"YYYY-MM-DD[ HH[:MM[:SS]]]"``, or None.
+        until (str): Inclusive end in the same format, or None.
+        index_dir (str): Directory of the offset indexes; None reads every
+            file from the start.
+
+    Returns:
+        int: Number of bytes read.
+    """
+    since = since + LOWEST_TIME[len(since):] if since else None
+    bytes_read = 0
+    for path in paths:
+        offset = 0
+        if since and index_dir:
+            index = LogIndex(path, index_dir)
+            index.update()
+            if index.timestamps and not _in_range(index.timestamps[0], until):
+                break  # this file and every newer one start after the range
+            offset = index.seek_offset(since)
+        with open(path, "rb") as file:
+            file.seek(offset)
+            in_range = since is None
+            for line in file:
+                bytes_read += len(line)
+                match = LINE.match(line)
+                if match is None:
+                    if in_range:
+                        stats.lines += 1  # continuation of a line inside the range
+                    continue
+                timestamp = match.group(1).decode("ascii")
+                if not _in_range(timestamp, until):
+                    return bytes_read
+                in_range = since is None or timestamp >= since
+                if in_range:
+                    stats.add_line(line, timestamp, match)
+    return bytes_read
+
+
+def follow(path, stats, interval=10.0, top=10, as_json=False, poll=0.5):
+    """
+    Tail a log file across rotations, printing a report every ``interval`` seconds.
+
+    Runs until interrupted. When the file is rotated, the rest of the old
+    file is read before the new one is opened from its start.
+
+    Args:
+        path (str): The current log file.
+        stats (LogStats): Aggregates to update.
+        interval (float): Seconds between two reports.
+        top (int): Number of keys listed per counter.
+        as_json (bool): Print reports as JSON lines instead of text.
+        poll (float): Seconds to wait for new lines.
+    """
+    file = open(path, "rb")
+    file.seek(0, os.SEEK_END)
+    next_report = time.monotonic() + interval
+    pending = b""
+    try:
+        while True:
+            line = file.readline()
+            if line:
+                pending += line
+                if pending.endswith(b"\n"):
+                    stats.add_line(pending)
+                    pending = b""
+                continue
+            try:
+                rotated = os.stat(path).st_ino != os.fstat(file.fileno()).st_ino
+            except FileNotFoundError:
+                rotated = False
+            if rotated:
+                file.close()
+                file = open(path, "rb")
+                continue
+            if time.monotonic() >= next_report:
+                _print(stats.report(top), as_json)
+                next_report = time.monotonic() + interval
+            time.sleep(poll)
+    finally:
+        file.close()
+
+
+def _print(report, as_json):
+    """Print a report as text or as a single JSON line."""
+    if as_json:
+        print(json.dumps(report), flush=True)
+        return
+    print(f"{report['lines']} lines from {report['first']} to {report['last']}"
+          + (" (approximate counts)" if report["approximate"] else ""))
+    print(f"Levels: {report['levels']}  Events: {report['events']}")
+    requests = f"{report['requests']}"
+    if report["sampled_requests"]:
+        requests += (f" logged, ~{report['estimated_requests']} estimated "
+                     f"({report['sampled_requests']} sampled summaries scaled)")
+    print(f"Failed logins: {report['failed_logins']}  "
+          f"Unauthenticated: {report['unauthenticated']}  Requests: {requests}")
+    for name, counts in report.items():
+        if isinstance(counts, dict) and name.startswith(("failed_logins_by", "unauthenticated_by")):
+            if counts:
+                print(f"\n{name}:")
+                for key, count in counts.items():
+                    print(f"  {count:>8}  {key}")
+    if report["routes"]:
+        sampled = report["sampled_requests"]
+        print("\nroutes (estimated, logged):" if sampled else "\nroutes:")
+        for route, counts in report["routes"].items():
+            count = (f"{'~' + str(counts['estimated']):>8} {counts['requests']:>8}" if sampled
+                     else f"{counts['requests']:>8}")
+            print(f"  {count}  {route:<40}{counts['statuses']}")
+    print(flush=True)
+
+
+def main():
+    """Parse the command line, analyse the logs and print the report."""
+    parser = argparse.ArgumentParser(description="Analyse the lab8 application log.")
+    parser.add_argument("log", nargs="?", default="logs/app.log",
+                        help="current log file; rotated files next to it are read first")
+    parser.add_argument("--since", help='start of the range, "YYYY-MM-DD[ HH[:MM[:SS]]]"')
+    parser.add_argument("--until", help="end of the range, inclusive, same format")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep reading new lines and report periodically")
+    parser.add_argument("--interval", type=float, default=10.0,
+                        help="seconds between reports with --follow (default: 10)")
+    parser.add_argument("--window", type=int, default=5,
+                        help="minutes in the rolling failed-login window (default: 5)")
+    parser.add_argument("--top", type=int, default=10, help="keys listed per counter")
+    parser.add_argument("--max-keys", type=int, default=MAX_KEYS,
+                        help=f"keys kept per counter (default: {MAX_KEYS})")
+    parser.add_argument("--index-dir", help="offset index directory (default: LOG_DIR/index)")
+    parser.add_argument("--no-index", action="store_true", help="scan files from the start")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    for value in (args.since, args.until):
+        if value and not TIME_ARG.match(value):
+            parser.error(f"invalid time '{value}'; expected YYYY-MM-DD[ HH[:MM[:SS]]]")
+    index_dir = None if args.no_index else (
+        args.index_dir or os.path.join(os.path.dirname(os.path.abspath(args.log)), "index")
+    )
+
+    stats = LogStats(max_keys=args.max_keys, window_minutes=args.window)
+    start = time.perf_counter()
+    try:
+        bytes_read = scan(log_files(args.log), stats, args.since, args.until, index_dir)
+        elapsed = time.perf_counter() - start
+        report = stats.report(args.top)
+        report["bytes_read"] = bytes_read
+        report["seconds"] = round(elapsed, 3)
+        _print(report, args.json)
+        if not args.json:
+            print(f"Read {bytes_read / 1e6:.1f} MB in {elapsed:.2f}s")
+        if args.follow:
+            follow(args.log, stats, args.interval, args.top, args.json)
+    except OSError as err:
+        print(f"Error: {err}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
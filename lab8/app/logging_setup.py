@@ -0,0 +1,189 @@
+"""
+Logging configuration for the Demon Slayer fan site.
+
+Two modes are supported. In ``sync`` mode every process writes its records
+straight to ``logs/app.log``, exactly as ``logging.basicConfig`` does. In
+``queue`` mode request threads only put records on a multiprocessing queue;
+a single listener process drains the queue and writes the records to a
+rotating log file in batches. Because the queue and the listener are created
+when the application is imported, the uwsgi master sets them up before it
+forks its workers, so every worker shares one writer and lines from different
+processes are never interleaved.
+
+Functions:
+    configure_logging: Install the root logging handlers for the application.
+"""
+
+# Standard library imports
+import atexit
+import logging
+from logging.handlers import QueueHandler, RotatingFileHandler
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+# request_tag is " [req <id>]" for records logged while a request is handled
+# (see tracing.py) and empty otherwise
+LOG_FORMAT = "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]%(request_tag)s"
+LOG_DEFAULTS = {"request_tag": ""}
+BATCH_SIZE = 256
+
+
+class _BatchRotatingFileHandler(RotatingFileHandler):
+    """Rotating file handler that writes a list of records with one flush."""
+
+    def emit_batch(self, records):
+        """
+        Write a batch of records, rotating the file when it grows too large.
+
+        Args:
+            records (list): The log records to write.
+        """
+        for record in records:
+            try:
+                if self.shouldRollover(record):
+                    self.doRollover()
+                self.stream.write(self.format(record) + self.terminator)
+            except Exception:  # pylint: disable=broad-except
+                self.handleError(record)
+        self.stream.flush()
+
+
+class _ForkSafeQueueHandler(QueueHandler):
+    """Queue handler that restarts the queue's feeder thread after a fork."""
+
+    def __init__(self, log_queue):
+        """
+        Args:
+            log_queue (multiprocessing.Queue): The queue the listener drains.
+        """
+        super().__init__(log_queue)
+        self._pid = os.getpid()
+
+    def enqueue(self, record):
+        """
+        Put a record on the queue, resetting it first in a newly forked process.
+
+        A multiprocessing queue sends records through a feeder thread that is
+        started on first use. If the uwsgi master logs before it forks, every
+        worker inherits a queue whose feeder thread does not exist in the
+        worker, and uwsgi does not run the hooks that would reset it, so the
+        worker's records would never reach the listener.
+
+        Args:
+            record (logging.LogRecord): The record to send.
+        """
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self.queue._after_fork()  # pylint: disable=protected-access
+        self.queue.put_nowait(record)
+
+
+def _watch_parent(parent_pid):
+    """
+    Exit the listener process as soon as its parent process has died.
+
+    Args:
+        parent_pid (int): Process id of the process that started the listener.
+    """
+    while os.getppid() == parent_pid:
+        time.sleep(1)
+    os._exit(0)  # pylint: disable=protected-access
+
+
+def _listen(log_queue, filename, max_bytes, backup_count, parent_pid):
+    """
+    Drain the log queue and write records until a ``None`` sentinel arrives.
+
+    Runs in the listener process. Each wake-up takes every record already
+    waiting on the queue, up to ``BATCH_SIZE``, and writes them together.
+    A watchdog thread also ends the listener once its parent process has
+    gone away, since the uwsgi master does not run ``atexit`` handlers on
+    shutdown and a worker killed mid-write can leave a partial message on the
+    queue.
+
+    Args:
+        log_queue (multiprocessing.Queue): Queue shared with the workers.
+        filename (str): Path of the log file.
+        max_bytes (int): Size at which the log file is rotated.
+        backup_count (int): Number of rotated files to keep.
+        parent_pid (int): Process id of the process that started the listener.
+    """
+    handler = _BatchRotatingFileHandler(
+        filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, defaults=LOG_DEFAULTS))
+    threading.Thread(target=_watch_parent, args=(parent_pid,), daemon=True).start()
+    running = True
+    while running:
+        batch = [log_queue.get()]
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if None in batch:
+            running = False
+            batch = [record for record in batch if record is not None]
+        handler.emit_batch(batch)
+    handler.close()
+
+
+def configure_logging(filename="logs/app.log", level="DEBUG", mode="sync",
+                      max_bytes=10 * 1024 * 1024, backup_count=5):
+    """
+    Install the root logging handlers for the application.
+
+    Args:
+        filename (str): Path of the log file.
+        level (str): Minimum level name to record, such as ``"INFO"``.
+        mode (str): ``"sync"`` to write from each process directly, or
+            ``"queue"`` to hand records to a single listener process.
+        max_bytes (int): Size at which the log file is rotated in queue mode.
+        backup_count (int): Number of rotated files to keep in queue mode.
+
+    Raises:
+        ValueError: If ``mode`` or ``level`` is not recognised.
+    """
+    numeric_level = logging.getLevelName(level.upper())
+    if not isinstance(numeric_level, int):
+        raise ValueError(f"Unknown log level: {level}")
+
+    if mode == "sync":
+        handler = logging.FileHandler(filename)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT, defaults=LOG_DEFAULTS))
+        logging.basicConfig(level=numeric_level, handlers=[handler])
+        return
+    if mode != "queue":
+        raise ValueError(f"Unknown logging mode: {mode}")
+
+    log_queue = multiprocessing.Queue()
+    listener = multiprocessing.Process(
+        target=_listen,
+        args=(log_queue, filename, max_bytes, backup_count, os.getpid()),
+        name="log-listener",
+        daemon=True,
+    )
+    listener.start()
+    # uwsgi forks its workers without running Python's at-fork hooks, so they
+    # inherit multiprocessing's list of children. Untrack the listener so no
+    # worker terminates it from multiprocessing's atexit handler; its
+    # lifetime is managed by stop_listener and the watchdog instead.
+    multiprocessing.process._children.discard(listener)  # pylint: disable=protected-access
+
+    root = logging.getLogger()
+    root.setLevel(numeric_level)
+    root.addHandler(_ForkSafeQueueHandler(log_queue))
+
+    owner_pid = os.getpid()
+
+    def stop_listener():
+        """Flush the queue and stop the listener when its owner exits."""
+        if os.getpid() != owner_pid:
+            return
+        log_queue.put(None)
+        listener.join(timeout=5)
+
+    atexit.register(stop_listener)
@@ -0,0 +1,373 @@
+"""
+Request instrumentation and Prometheus metrics for the Demon Slayer fan site.
+
+This module records latency histograms for every endpoint and for the hot
+paths inside a request: SQLite queries, password hashing and template
+rendering. Each process keeps its own histograms in memory and periodically
+writes a snapshot to a shared directory; the ``/metrics`` endpoint merges the
+snapshots of all live uwsgi workers and serves them in the Prometheus text
+exposition format.
+
+Components such as the password blocklist or the hashing pool can register a
+collector whose ``stats()`` values are exported as per-process gauges.
+
+Classes:
+    Histogram: Cumulative latency histogram with fixed buckets.
+    MetricsRegistry: Per-process store of histograms and collectors.
+
+Functions:
+    init_app: Register the request hooks and the /metrics endpoint.
+"""
+
+# Standard library imports
+from contextlib import contextmanager
+import json
+import logging
+import os
+import threading
+import time
+
+# Related third-party imports
+from flask import Response, before_render_template, g, request, template_rendered
+
+PREFIX = "lab8"
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "request_duration_seconds": "Time spent handling a request, by endpoint.",
+    "db_query_seconds": "Time spent executing SQLite statements.",
+    "password_hash_seconds": "Time spent waiting for password hashing, including queueing.",
+    "template_render_seconds": "Time spent rendering Jinja templates.",
+}
+
+
+class Histogram:
+    """
+    Cumulative latency histogram with fixed buckets.
+
+    Attributes:
+        counts (list): Number of observations per bucket, plus one overflow slot.
+        total (float): Sum of all observations in seconds.
+        count (int): Number of observations.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        """
+        Add one observation.
+
+        Args:
+            seconds (float): The observed duration.
+        """
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            index = len(BUCKETS)
+        self.counts[index] += 1
+        self.total += seconds
+        self.count += 1
+
+    def to_dict(self):
+        """Return the histogram as a JSON-serialisable dict."""
+        return {"counts": self.counts, "sum": self.total, "count": self.count}
+
+
+class MetricsRegistry:
+    """
+    Per-process store of histograms and collectors.
+
+    Attributes:
+        directory (str): Directory shared by all workers for snapshot files,
+            or None to serve only this process's metrics.
+        flush_interval (float): Minimum seconds between two snapshot writes.
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        """
+        Args:
+            directory (str): Directory for per-process snapshot files.
+            flush_interval (float): Minimum seconds between two snapshot writes.
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._histograms = {}
+        self._collectors = {}
+        self._observers = []
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def configure(self, directory=None, flush_interval=None):
+        """
+        Set the snapshot directory and flush interval, creating the directory.
+
+        Args:
+            directory (str): Directory for per-process snapshot files.
+            flush_interval (float): Minimum seconds between two snapshot writes.
+        """
+        self.directory = directory
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def observe(self, name, seconds, **labels):
+        """
+        Record one duration in the histogram for ``name`` and ``labels``.
+
+        Args:
+            name (str): Metric name without prefix, such as ``"db_query_seconds"``.
+            seconds (float): The observed duration.
+            **labels: Label names and values.
+        """
+        key = json.dumps(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(seconds)
+        for observer in self._observers:
+            observer(name, seconds, labels)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+        Time the enclosed block and record it with ``observe``.
+
+        Args:
+            name (str): Metric name without prefix.
+            **labels: Label names and values.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_observer(self, observer):
+        """
+        Call ``observer(name, seconds, labels)`` for every recorded duration.
+
+        Args:
+            observer (callable): Receives the metric name, the duration and
+                the labels of each observation, in the observing thread.
+        """
+        self._observers.append(observer)
+
+    def register_collector(self, name, stats):
+        """
+        Export the numeric values of a ``stats()`` callable as gauges.
+
+        Args:
+            name (str): Prefix for the exported gauges, such as ``"blocklist"``.
+            stats (callable): Returns a dict of numeric statistics.
+        """
+        self._collectors[name] = stats
+
+    def snapshot(self):
+        """
+        Return this process's metrics as a JSON-serialisable dict.
+
+        Returns:
+            dict: Histograms by name and label key, and collector gauges.
+        """
+        with self._lock:
+            histograms = {
+                name: {key: hist.to_dict() for key, hist in series.items()}
+                for name, series in self._histograms.items()
+            }
+        gauges = {}
+        for name, stats in self._collectors.items():
+            for key, value in stats().items():
+                if isinstance(value, (int, float)):
+                    gauges[f"{name}_{key}"] = value
+        return {"pid": os.getpid(), "histograms": histograms, "gauges": gauges}
+
+    def flush(self, force=False):
+        """
+        Write this process's snapshot to the shared directory.
+
+        Args:
+            force (bool): Write even if ``flush_interval`` has not elapsed.
+        """
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self.snapshot(), file)
+            os.replace(tmp_path, path)
+        except OSError as err:
+            logging.error("Could not write metrics snapshot %s: %s", path, err)
+
+    def collect(self):
+        """
+        Gather the snapshots of every live process sharing the directory.
+
+        Snapshot files left behind by processes that no longer exist are
+        removed.
+
+        Returns:
+            list: One snapshot dict per live process.
+        """
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush(force=True)
+        snapshots = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, filename)
+            if not _pid_alive(int(filename[:-5])):
+                _remove_quietly(path)
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render_prometheus(self):
+        """
+        Render the merged metrics of all live processes as Prometheus text.
+
+        Histograms are summed across processes; collector gauges are exported
+        per process with a ``pid`` label.
+
+        Returns:
+            str: The metrics in the Prometheus text exposition format.
+        """
+        snapshots = self.collect()
+        merged = {}
+        for snap in snapshots:
+            for name, series in snap["histograms"].items():
+                target = merged.setdefault(name, {})
+                for key, hist in series.items():
+                    into = target.setdefault(key, {"counts": [0] * (len(BUCKETS) + 1),
+                                                   "sum": 0.0, "count": 0})
+                    into["counts"] = [a + b for a, b in zip(into["counts"], hist["counts"])]
+                    into["sum"] += hist["sum"]
+                    into["count"] += hist["count"]
+
+        lines = []
+        for name in sorted(merged):
+            metric = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for key, hist in sorted(merged[name].items()):
+                labels = json.loads(key)
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), hist["counts"]):
+                    cumulative += count
+                    lines.append(
+                        f"{metric}_bucket{_labels(labels + [['le', str(bound)]])} {cumulative}"
+                    )
+                lines.append(f"{metric}_sum{_labels(labels)} {hist['sum']}")
+                lines.append(f"{metric}_count{_labels(labels)} {hist['count']}")
+
+        gauge_names = sorted({name for snap in snapshots for name in snap["gauges"]})
+        for name in gauge_names:
+            metric = f"{PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            for snap in snapshots:
+                if name in snap["gauges"]:
+                    lines.append(f"{metric}{_labels([['pid', str(snap['pid'])]])} {snap['gauges'][name]}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs):
+    """Format label pairs as a Prometheus label set."""
+    if not pairs:
+        return ""
+    inner = ",".join(f'{key}="{_escape(value)}"' for key, value in pairs)
+    return "{" + inner + "}"
+
+
+def _escape(value):
+    """Escape a label value for the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _pid_alive(pid):
+    """Return True if a process with the given id exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _remove_quietly(path):
+    """Delete a file, ignoring errors."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+registry = MetricsRegistry()
+
+
+def init_app(app):
+    """
+    Register the request timing hooks and the /metrics endpoint on an app.
+
+    Args:
+        app (flask.Flask): The application to instrument.
+    """
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_duration(response):
+        start = g.pop("request_start", None)
+        if start is not None:
+            registry.observe(
+                "request_duration_seconds",
+                time.perf_counter() - start,
+                endpoint=request.endpoint or "none",
+                method=request.method,
+                status=response.status_code,
+            )
+        registry.flush()
+        return response
+
+    def start_template_timer(_sender, template, **_extra):
+        g.setdefault("template_starts", []).append(time.perf_counter())
+
+    def record_template_render(_sender, template, **_extra):
+        starts = g.get("template_starts")
+        if starts:
+            registry.observe(
+                "template_render_seconds",
+                time.perf_counter() - starts.pop(),
+                template=template.name,
+            )
+
+    before_render_template.connect(start_template_timer, app, weak=False)
+    template_rendered.connect(record_template_render, app, weak=False)
+
+    @app.route("/metrics")
+    def metrics():
+        """
+        Serve the merged metrics of all workers in Prometheus text format.
+
+        Returns:
+            flask.Response: The metrics as ``text/plain``.
+        """
+        return Response(registry.render_prometheus(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,113 @@
+"""
+Versioned schema migrations for the users database.
+
+Each migration has a version number, a description and a list of SQL
+statements. The ``schema_version`` table records which versions have been
+applied; ``migrate`` runs the pending ones in order inside a single
+``BEGIN IMMEDIATE`` transaction, so when several processes start at once one
+of them applies the migrations and the others find nothing left to do. Every
+statement is written to be idempotent (``IF NOT EXISTS``), so a database
+created before versioning was introduced is brought up to date safely.
+
+New schema changes are added by appending to ``MIGRATIONS``; applied entries
+are never edited.
+
+Functions:
+    current_version: Return the highest applied migration version.
+    migrate: Apply every pending migration.
+"""
+
+# Standard library imports
+import logging
+
+MIGRATIONS = [
+    (1, "create users table", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            last_password_update DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (2, "index users by password age", [
+        "CREATE INDEX IF NOT EXISTS idx_users_last_password_update "
+        "ON users (last_password_update)",
+    ]),
+    (3, "index usernames case-insensitively", [
+        "CREATE INDEX IF NOT EXISTS idx_users_username_nocase "
+        "ON users (username COLLATE NOCASE)",
+    ]),
+]
+
+
+def current_version(conn):
+    """
+    Return the highest migration version applied to a database.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the users database.
+
+    Returns:
+        int: The schema version, or 0 if no migration has been applied.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, description TEXT NOT NULL, "
+        "applied_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cur.fetchone()[0]
+
+
+def migrate(conn, migrations=None):
+    """
+    Apply every pending migration to a database.
+
+    The version check and all pending migrations run in one write
+    transaction; if any statement fails, the whole transaction is rolled
+    back and the database stays at its previous version.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the users database.
+        migrations (list): ``(version, description, statements)`` tuples.
+            Defaults to ``MIGRATIONS``.
+
+    Returns:
+        list: The versions applied by this call.
+
+    Raises:
+        sqlite3.Error: If a migration fails.
+    """
+    migrations = MIGRATIONS if migrations is None else migrations
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # manage the transaction explicitly
+    cur = conn.cursor()
+    applied = []
+    try:
+        current_version(conn)
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            version_now = current_version(conn)
+            for version, description, statements in sorted(migrations):
+                if version <= version_now:
+                    continue
+                for statement in statements:
+                    cur.execute(statement)
+                cur.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (version, description)
+                )
+                applied.append(version)
+                logging.info("Applied schema migration %d: %s", version, description)
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        if applied:
+            cur.execute("PRAGMA optimize")
+    finally:
+        conn.isolation_level = isolation_level
+    return applied
@@ -0,0 +1,142 @@
+"""
+Rendered-page cache with conditional GET support.
+
+The content pages of the fan site (index, overview, hashira and demon) only
+vary by the current time shown at the bottom of each page. Rendering the full
+Jinja template for every request is therefore wasted work. ``PageCache``
+renders each page at most once per time bucket, keeps the result in memory
+and serves it with an ETag and Last-Modified header, so browsers that already
+hold the current version receive a bodyless 304 response.
+
+Classes:
+    PageCache: Per-process cache of rendered pages keyed by template and time bucket.
+"""
+
+# Standard library imports
+from datetime import datetime
+import hashlib
+import time
+
+# Related third-party imports
+from flask import make_response, render_template, request
+
+
+class PageCache:
+    """
+    Per-process cache of rendered pages keyed by template and time bucket.
+
+    Only the most recent bucket of each template is kept, so memory use is
+    bounded by the number of cached templates.
+
+    Attributes:
+        bucket_seconds (int): Length of a time bucket. The time shown on a page
+            is the start of its bucket.
+    """
+
+    def __init__(self, bucket_seconds=60):
+        """
+        Create an empty cache.
+
+        Args:
+            bucket_seconds (int): Length of a time bucket in seconds.
+        """
+        self.bucket_seconds = max(1, int(bucket_seconds))
+        self._entries = {}
+        self._stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def _bucket(self):
+        """Return the start of the current time bucket as a Unix timestamp."""
+        return int(time.time()) // self.bucket_seconds * self.bucket_seconds
+
+    def _cached(self, template_name, bucket):
+        """
+        Return the cached rendering of a template for a bucket, if any.
+
+        Args:
+            template_name (str): Name of the template.
+            bucket (int): Start of the time bucket.
+
+        Returns:
+            tuple: The bucket start, the rendered body and its ETag, or None
+                on a cache miss.
+        """
+        entry = self._entries.get(template_name)
+        if entry is not None and entry[0] == bucket:
+            self._stats["hits"] += 1
+            return entry
+        self._stats["misses"] += 1
+        return None
+
+    def _store(self, template_name, bucket, html):
+        """
+        Cache a freshly rendered page.
+
+        Args:
+            template_name (str): Name of the template.
+            bucket (int): Start of the time bucket it was rendered for.
+            html (str): The rendered page.
+
+        Returns:
+            tuple: The bucket start, the rendered body (bytes) and its ETag (str).
+        """
+        body = html.encode("utf-8")
+        entry = (bucket, body, hashlib.sha1(body).hexdigest()[:20])
+        self._entries[template_name] = entry
+        return entry
+
+    @staticmethod
+    def bucket_time(bucket):
+        """Return the time shown on pages rendered for a bucket."""
+        return datetime.fromtimestamp(bucket).strftime("%Y-%m-%d %H:%M:%S")
+
+    def _entry(self, template_name):
+        """
+        Return the cached rendering of a template for the current bucket.
+
+        Args:
+            template_name (str): Name of the template to render.
+
+        Returns:
+            tuple: The bucket start (int), the rendered body (bytes) and its ETag (str).
+        """
+        bucket = self._bucket()
+        entry = self._cached(template_name, bucket)
+        if entry is None:
+            html = render_template(template_name, current_time=self.bucket_time(bucket))
+            entry = self._store(template_name, bucket, html)
+        return entry
+
+    def _set_headers(self, response, bucket, etag):
+        """Set the validators and cache policy shared by every cached page."""
+        response.set_etag(etag)
+        response.last_modified = bucket
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+
+    def render(self, template_name):
+        """
+        Build a response for a template, answering 304 when the client is current.
+
+        Args:
+            template_name (str): Name of the template to render.
+
+        Returns:
+            flask.Response: A 200 response with the page, or a 304 response if
+                the request's If-None-Match or If-Modified-Since header matches.
+        """
+        bucket, body, etag = self._entry(template_name)
+        response = make_response(body)
+        self._set_headers(response, bucket, etag)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            self._stats["not_modified"] += 1
+        return response
+
+    def stats(self):
+        """
+        Return a snapshot of this process's cache counters.
+
+        Returns:
+            dict: Numbers of cache hits, misses and 304 responses.
+        """
+        return dict(self._stats)
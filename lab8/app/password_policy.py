@@ -0,0 +1,314 @@
+"""
+Password policy rules and a batch audit engine for the Demon Slayer fan site.
+
+The complexity rules enforced at registration live here so the request path
+and offline audits apply exactly the same policy. Every rule's pattern is
+compiled once at import time, and a single combined pattern made of
+lookaheads accepts a compliant password in one regex pass; the individual
+rules are only evaluated for passwords that fail it, to find out why.
+
+``audit`` checks large password sets, such as lab4's ``passwords.csv``, bulk
+imports or candidate lists, against the policy and the common-password list.
+The input is split into chunks that are checked in parallel by a process
+pool, and the result is a per-rule failure histogram with the throughput.
+
+Functions:
+    failed_rules: Return the names of the policy rules a password breaks.
+    describe: Return a human-readable description of a rule.
+    audit: Check many passwords against the policy in parallel.
+    read_passwords: Stream passwords from a text or CSV file.
+
+Usage:
+    python password_policy.py ../../lab4/passwords.csv [--column PASSWORD] [--json]
+"""
+
+# Standard library imports
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import csv
+from itertools import islice
+import json
+import os
+import re
+import sys
+import time
+
+MIN_LENGTH = 12
+
+# Rule name, pattern the password must contain, and the criterion it checks
+RULES = [
+    ("lowercase", re.compile(r"[a-z]"), "lowercase letter"),
+    ("uppercase", re.compile(r"[A-Z]"), "uppercase letter"),
+    ("digit", re.compile(r"[0-9]"), "digit"),
+    ("special", re.compile(r"[_@$]"), "special character (_, @, $)"),
+]
+RULE_NAMES = ["length"] + [name for name, _, _ in RULES] + ["common"]
+
+COMPLIANT = re.compile(
+    "".join(f"(?=.*?{pattern.pattern})" for _, pattern, _ in RULES) + f".{{{MIN_LENGTH},}}",
+    re.DOTALL,
+)
+
+CHUNK_SIZE = 5000
+
+_blocklist = frozenset()  # common passwords handed to each audit process
+
+
+def failed_rules(password, first_only=False):
+    """
+    Return the names of the complexity rules a password breaks.
+
+    Args:
+        password (str): The password to check.
+        first_only (bool): Stop at the first broken rule.
+
+    Returns:
+        list: Names from ``RULE_NAMES`` in rule order; empty if the password
+            meets every complexity requirement.
+    """
+    if COMPLIANT.match(password):
+        return []
+    failures = []
+    if len(password) < MIN_LENGTH:
+        failures.append("length")
+        if first_only:
+            return failures
+    for name, pattern, _ in RULES:
+        if not pattern.search(password):
+            failures.append(name)
+            if first_only:
+                break
+    return failures
+
+
+def describe(rule):
+    """
+    Return a human-readable description of a rule.
+
+    Args:
+        rule (str): A name from ``RULE_NAMES``.
+
+    Returns:
+        str: The description used in log messages and reports.
+    """
+    if rule == "length":
+        return f"Length less than {MIN_LENGTH} characters"
+    if rule == "common":
+        return "common password"
+    return "missing " + next(criterion for name, _, criterion in RULES if name == rule)
+
+
+def _read_blocklist(path):
+    """
+    Read a common-password list.
+
+    Args:
+        path (str): Common-password file, one password per line, or None.
+
+    Returns:
+        frozenset: The common passwords, empty if ``path`` is None.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    if not path:
+        return frozenset()
+    with open(path, "r", encoding="utf-8") as file:
+        return frozenset(file.read().splitlines())
+
+
+def _set_blocklist(words):
+    """Install the common-password list in this process; runs once per pool process."""
+    global _blocklist  # pylint: disable=global-statement
+    _blocklist = words
+
+
+def _audit_chunk(passwords, keep_examples):
+    """
+    Audit one chunk of passwords in a pool process.
+
+    Args:
+        passwords (list): The passwords to check.
+        keep_examples (int): Number of failing passwords to return per rule.
+
+    Returns:
+        tuple: A ``Counter`` of failures per rule, the number of passwords
+            that passed, and a dict of example failures per rule.
+    """
+    histogram = Counter()
+    examples = {}
+    passed = 0
+    for password in passwords:
+        failures = failed_rules(password)
+        if password in _blocklist:
+            failures.append("common")
+        if not failures:
+            passed += 1
+            continue
+        histogram.update(failures)
+        for rule in failures if keep_examples else ():
+            bucket = examples.setdefault(rule, [])
+            if len(bucket) < keep_examples:
+                bucket.append(password)
+    return histogram, passed, examples
+
+
+def _chunks(passwords, size):
+    """Yield lists of up to ``size`` passwords."""
+    passwords = iter(passwords)
+    while True:
+        chunk = list(islice(passwords, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def audit(passwords, blocklist_path="CommonPassword.txt", workers=None,
+          chunk_size=CHUNK_SIZE, keep_examples=0):
+    """
+    Check many passwords against the policy and the common-password list.
+
+    Chunks of ``chunk_size`` passwords are checked in parallel by a pool of
+    ``workers`` processes. The common-password list is read here, before the
+    pool starts, and handed to each process once.
+
+    Args:
+        passwords (iterable): The passwords to audit.
+        blocklist_path (str): Common-password file, or None to skip that check.
+        workers (int): Number of processes. Defaults to the number of CPUs.
+        chunk_size (int): Passwords per task sent to a process.
+        keep_examples (int): Number of failing passwords to keep per rule.
+
+    Returns:
+        dict: The number of passwords checked, passed and failed, failures
+            per rule, example failures, elapsed seconds and passwords per second.
+
+    Raises:
+        OSError: If the common-password file cannot be read.
+    """
+    # A missing file must fail here, not in every pool process's initializer
+    blocklist = _read_blocklist(blocklist_path)
+    workers = workers or os.cpu_count() or 1
+    histogram = Counter({rule: 0 for rule in RULE_NAMES})
+    examples = {}
+    total = passed = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_set_blocklist,
+                             initargs=(blocklist,)) as executor:
+        chunks = _chunks(passwords, chunk_size)
+        pending = []
+        # Keep a bounded number of chunks in flight so the input is streamed
+        for chunk in chunks:
+            total += len(chunk)
+            pending.append(executor.submit(_audit_chunk, chunk, keep_examples))
+            if len(pending) >= workers * 2:
+                passed += _merge(pending.pop(0).result(), histogram, examples, keep_examples)
+        for future in pending:
+            passed += _merge(future.result(), histogram, examples, keep_examples)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "total": total,
+        "passed": passed,
+        "failed": total - passed,
+        "failures_by_rule": dict(histogram),
+        "examples": examples,
+        "seconds": round(elapsed, 3),
+        "passwords_per_second": round(total / elapsed) if elapsed else 0,
+    }
+
+
+def _merge(result, histogram, examples, keep_examples):
+    """Add one chunk's result to the running totals; return its pass count."""
+    chunk_histogram, chunk_passed, chunk_examples = result
+    histogram.update(chunk_histogram)
+    for rule, found in chunk_examples.items():
+        bucket = examples.setdefault(rule, [])
+        bucket.extend(found[:keep_examples - len(bucket)])
+    return chunk_passed
+
+
+def read_passwords(path, column=None):
+    """
+    Stream passwords from a text file or a CSV file with a header row.
+
+    Args:
+        path (str): Input file, or ``"-"`` for standard input.
+        column (str): CSV column holding the passwords. If None, the file is
+            read as plain text with one password per line.
+
+    Yields:
+        str: One password per line or row.
+    """
+    file = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", newline="")
+    try:
+        if column is None:
+            for line in file:
+                password = line.rstrip("\r\n")
+                if password:
+                    yield password
+        else:
+            for row in csv.DictReader(file):
+                yield row[column]
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+def print_report(report):
+    """Print an audit report as a per-rule histogram."""
+    total = report["total"] or 1
+    print(f"Audited {report['total']} passwords in {report['seconds']:.2f}s "
+          f"({report['passwords_per_second']} passwords/s)")
+    print(f"Passed: {report['passed']} ({report['passed'] / total:.1%})  "
+          f"Failed: {report['failed']} ({report['failed'] / total:.1%})\n")
+    width = max(report["failures_by_rule"].values(), default=0) or 1
+    for rule in RULE_NAMES:
+        count = report["failures_by_rule"].get(rule, 0)
+        bar = "#" * round(40 * count / width)
+        print(f"{rule:<10}{count:>10} {count / total:>7.1%}  {bar}")
+        for example in report["examples"].get(rule, []):
+            print(f"{'':<12}e.g. {example!r}")
+
+
+def main():
+    """Parse the command line, run the audit and print the report."""
+    parser = argparse.ArgumentParser(description="Audit passwords against the lab8 policy.")
+    parser.add_argument("file", help="passwords, one per line, or a CSV file; - for stdin")
+    parser.add_argument("--column", help="CSV column holding the passwords "
+                                         "(default: PASSWORD for .csv files)")
+    parser.add_argument("--blocklist", default="CommonPassword.txt",
+                        help="common-password list (default: CommonPassword.txt)")
+    parser.add_argument("--no-blocklist", action="store_true",
+                        help="skip the common-password check")
+    parser.add_argument("--workers", type=int, help="processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"passwords per task (default: {CHUNK_SIZE})")
+    parser.add_argument("--examples", type=int, default=0,
+                        help="failing passwords to show per rule (default: 0)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    column = args.column or ("PASSWORD" if args.file.endswith(".csv") else None)
+    try:
+        report = audit(
+            read_passwords(args.file, column),
+            blocklist_path=None if args.no_blocklist else args.blocklist,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            keep_examples=args.examples,
+        )
+    except (OSError, KeyError) as err:
+        print(f"Error: {err}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(report, indent=4))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
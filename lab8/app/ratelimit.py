@@ -0,0 +1,140 @@
+"""
+Sliding-window limiter for failed login attempts.
+
+A flood of bad logins would otherwise turn straight into SQLite lookups and
+full password hash checks. ``LoginRateLimiter`` counts recent failed attempts
+per client IP and per username and lets ``login`` reject a request before it
+touches the users database or the hashing pool. Attempts are stored in a small
+local SQLite file so every uwsgi worker process sees the same windows.
+
+Classes:
+    LoginRateLimiter: Shared sliding-window counter of failed logins.
+"""
+
+# Standard library imports
+import logging
+import os
+import threading
+import time
+
+# Local application imports
+import db
+
+
+class LoginRateLimiter:
+    """
+    Shared sliding-window counter of failed logins keyed by IP and username.
+
+    Each failed attempt is stored as a timestamped row. A new attempt is
+    allowed while the number of failures inside the window stays below the
+    limit for both its IP address and its username.
+
+    Attributes:
+        path (str): Path to the SQLite file holding the attempts.
+        window (float): Length of the sliding window in seconds.
+        ip_limit (int): Failed attempts allowed per IP inside the window.
+        user_limit (int): Failed attempts allowed per username inside the window.
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path, window=300, ip_limit=20, user_limit=10):
+        """
+        Configure the limiter; the attempts table is created on first use.
+
+        Args:
+            path (str): Path to the SQLite file holding the attempts.
+            window (float): Length of the sliding window in seconds.
+            ip_limit (int): Failed attempts allowed per IP inside the window.
+            user_limit (int): Failed attempts allowed per username inside the window.
+        """
+        self.path = path
+        self.window = window
+        self.ip_limit = ip_limit
+        self.user_limit = user_limit
+        self._local = threading.local()
+        self._stats = {"checked": 0, "rejected": 0, "failures_recorded": 0}
+
+    def _conn(self):
+        """
+        Return this thread's connection to the attempts store.
+
+        Returns:
+            sqlite3.Connection: The connection, with the table created.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = db.connect(self.path)
+            conn.isolation_level = None  # autocommit; every statement stands alone
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS login_failures ("
+                "key TEXT NOT NULL, ts REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS login_failures_key_ts "
+                "ON login_failures (key, ts)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def allow(self, ip, username):
+        """
+        Check whether a login attempt may proceed.
+
+        Args:
+            ip (str): The client's IP address.
+            username (str): The username being attempted.
+
+        Returns:
+            bool: True if both the IP and the username are under their limits,
+                False if the attempt should be rejected.
+        """
+        self._stats["checked"] += 1
+        since = time.time() - self.window
+        rows = self._conn().execute(
+            "SELECT key, COUNT(*) FROM login_failures "
+            "WHERE key IN (?, ?) AND ts > ? GROUP BY key",
+            (f"ip:{ip}", f"user:{username}", since),
+        ).fetchall()
+        counts = dict(rows)
+
+        if (counts.get(f"ip:{ip}", 0) >= self.ip_limit
+                or counts.get(f"user:{username}", 0) >= self.user_limit):
+            self._stats["rejected"] += 1
+            logging.warning(
+                "Login attempt rate limited for username: %s. IP: %s", username, ip
+            )
+            return False
+        return True
+
+    def record_failure(self, ip, username):
+        """
+        Record a failed login attempt for an IP address and a username.
+
+        Rows that have fallen out of the window are purged every
+        ``PURGE_EVERY`` recorded failures.
+
+        Args:
+            ip (str): The client's IP address.
+            username (str): The username that was attempted.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.executemany(
+            "INSERT INTO login_failures (key, ts) VALUES (?, ?)",
+            ((f"ip:{ip}", now), (f"user:{username}", now)),
+        )
+        self._stats["failures_recorded"] += 1
+        if self._stats["failures_recorded"] % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM login_failures WHERE ts <= ?", (now - self.window,))
+
+    def stats(self):
+        """
+        Return a snapshot of this process's limiter counters.
+
+        Returns:
+            dict: Numbers of checked attempts, rejected attempts and recorded
+                failures.
+        """
+        return dict(self._stats)
@@ -1,6 +1,7 @@
 #!/bin/sh
 
 # PRODUCTION
+#python3 assets.py
 #uwsgi --ini uwsgi.ini
 
 # DEVELOPMENT
@@ -0,0 +1,252 @@
+"""
+Shared session signing key and a server-side session store.
+
+Flask signs its session cookie with ``app.secret_key``. A key generated at
+import time is different in every process that imports the application and
+changes on every restart, which logs users out and sends them back through
+the expensive password check. ``load_secret_key`` reads a persistent key
+from the environment or from a file that the first process to start creates
+atomically, so every uwsgi worker signs and verifies cookies with the same
+key across restarts.
+
+``SQLiteSessionInterface`` optionally moves the session data itself into a
+local SQLite table shared by all workers. The cookie then only carries a
+short signed session id, rows expire after a time-to-live, and a row is only
+written when the session changes or its expiry needs extending. ``regenerate``
+gives a session a new id when the user's privileges change, such as at login,
+so an id planted in a victim's browser before they log in is never promoted to
+an authenticated session.
+
+Classes:
+    ServerSideSession: Session dict that remembers its id and whether it changed.
+    SQLiteSessionInterface: Flask session interface backed by SQLite.
+
+Functions:
+    load_secret_key: Return a persistent secret key shared by all workers.
+    regenerate: Give a server-side session a new id.
+"""
+
+# Standard library imports
+import logging
+import os
+import secrets
+import threading
+import time
+
+# Related third-party imports
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+from itsdangerous import BadSignature, Signer
+
+# Local application imports
+import db
+
+
+def load_secret_key(path):
+    """
+    Return a persistent secret key shared by all workers.
+
+    The ``SECRET_KEY`` environment variable wins if it is set. Otherwise the
+    key is read from ``path``; if the file does not exist yet it is created
+    with exclusive-create semantics, so when several workers start at once
+    exactly one of them writes the key and the others read it.
+
+    Args:
+        path (str): File holding the key.
+
+    Returns:
+        str: The secret key.
+    """
+    key = os.environ.get("SECRET_KEY")
+    if key:
+        return key
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        for _ in range(50):
+            with open(path, "r", encoding="utf-8") as file:
+                key = file.read().strip()
+            if key:
+                return key
+            time.sleep(0.01)  # another worker is still writing the key
+        raise RuntimeError(f"Secret key file {path} is empty")
+
+    key = secrets.token_hex(32)
+    with os.fdopen(fd, "w", encoding="utf-8") as file:
+        file.write(key)
+    logging.info("Generated a new session secret key in %s", path)
+    return key
+
+
+class ServerSideSession(SecureCookieSession):
+    """
+    Session dict that remembers its id and whether it changed.
+
+    Access and modification tracking come from Flask's own session class.
+
+    Attributes:
+        sid (str): The session id stored in the cookie.
+        new (bool): True if the session did not exist before this request.
+        expires (float): Unix time at which the stored row expires.
+        previous_sid (str): Stored id replaced by ``regenerate`` during this
+            request, whose row is deleted when the session is saved.
+    """
+
+    def __init__(self, initial=None, sid=None, new=False, expires=0.0):
+        super().__init__(initial)
+        self.sid = sid
+        self.new = new
+        self.expires = expires
+        self.previous_sid = None
+
+    def regenerate(self):
+        """Replace the session id, keeping the data, and mark the session modified."""
+        if not self.new and self.previous_sid is None:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(24)
+        self.modified = True
+
+
+def regenerate(session):
+    """
+    Give a server-side session a new id, e.g. when the user logs in or out.
+
+    The old row is deleted and a newly signed id is sent in the cookie when
+    the session is saved. Cookie sessions hold no server-side state and are
+    left as they are.
+
+    Args:
+        session: The current request's session.
+    """
+    if isinstance(session, ServerSideSession):
+        session.regenerate()
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """
+    Flask session interface that keeps session data in a shared SQLite table.
+
+    Attributes:
+        path (str): Path to the SQLite file holding the sessions.
+        ttl (int): Seconds a session lives without being used.
+    """
+
+    serializer = TaggedJSONSerializer()
+    PURGE_EVERY = 500
+
+    def __init__(self, path, ttl=24 * 60 * 60):
+        """
+        Args:
+            path (str): Path to the SQLite file holding the sessions.
+            ttl (int): Seconds a session lives without being used.
+        """
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self):
+        """
+        Return this thread's connection to the session store.
+
+        Returns:
+            sqlite3.Connection: The connection, with the table created.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = db.connect(self.path)
+            conn.isolation_level = None  # autocommit; every statement stands alone
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _signer(self, app):
+        """Return the signer used for session ids in cookies."""
+        return Signer(app.secret_key, salt="server-side-session")
+
+    def open_session(self, app, request):
+        """
+        Load the session named by the request's cookie, or start a new one.
+
+        Args:
+            app (flask.Flask): The application.
+            request (flask.Request): The current request.
+
+        Returns:
+            ServerSideSession: The session for this request.
+        """
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                row = self._conn().execute(
+                    "SELECT data, expires FROM sessions WHERE id = ? AND expires > ?",
+                    (sid, time.time()),
+                ).fetchone()
+                if row:
+                    return ServerSideSession(self.serializer.loads(row[0]), sid=sid,
+                                             expires=row[1])
+        return ServerSideSession(sid=secrets.token_urlsafe(24), new=True)
+
+    def save_session(self, app, session, response):
+        """
+        Store the session and set or clear the cookie.
+
+        A row is only written when the session changed or when less than half
+        of its time-to-live remains, so most requests cost a single read.
+
+        Args:
+            app (flask.Flask): The application.
+            session (ServerSideSession): The session to save.
+            response (flask.Response): The response being sent.
+        """
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if session.previous_sid:
+            self._conn().execute("DELETE FROM sessions WHERE id = ?", (session.previous_sid,))
+            session.previous_sid = None
+
+        if not session:
+            if session.modified and not session.new:
+                self._conn().execute("DELETE FROM sessions WHERE id = ?", (session.sid,))
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = time.time()
+        refresh = session.expires - now < self.ttl / 2
+        if not (session.modified or session.new or refresh):
+            return
+
+        expires = now + self.ttl
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)",
+            (session.sid, self.serializer.dumps(dict(session)), expires),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM sessions WHERE expires <= ?", (now,))
+
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode(),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
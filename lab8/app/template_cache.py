@@ -0,0 +1,168 @@
+"""
+Persistent Jinja bytecode cache for the Demon Slayer fan site.
+
+Jinja turns every template into Python source and compiles it the first time
+the template is rendered, and that work is lost whenever a process exits.
+``init_app`` gives the Flask Jinja environment a bytecode cache on disk
+(``instance/jinja_cache`` by default), so a restarted master or worker loads
+the compiled code of ``hashira.html``, ``overview.html`` and the other pages
+from a file instead of parsing the templates again. Cache entries are keyed by
+template name and path and checked against the template source, so an edited
+template is recompiled and its entry rewritten on first use.
+
+Every process counts its cache hits, misses and writes, which are exported as
+``template_cache_*`` gauges on /metrics. Running this module compiles every
+template into the cache ahead of a deploy.
+
+Entries are compiled for the synchronous Flask environment only; the ASGI
+mode's async templates generate different code and are not cached here.
+
+Classes:
+    CountingBytecodeCache: File system bytecode cache that counts hits and misses.
+
+Functions:
+    init_app: Attach a bytecode cache to the application's Jinja environment.
+    precompile: Compile every template of an environment into its cache.
+
+Usage:
+    python template_cache.py [--cache-dir instance/jinja_cache]
+"""
+
+# Standard library imports
+import argparse
+import os
+import threading
+import time
+
+# Related third-party imports
+from flask import Flask
+from jinja2 import FileSystemBytecodeCache
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIRNAME = "jinja_cache"
+CACHE_PATTERN = "flask-%s.cache"
+
+
+class CountingBytecodeCache(FileSystemBytecodeCache):
+    """
+    File system bytecode cache that counts hits, misses and writes.
+
+    Files are written to a temporary name and renamed into place, so workers
+    sharing the directory never read a partially written entry.
+
+    Attributes:
+        directory (str): Directory holding the cache files.
+    """
+
+    def __init__(self, directory):
+        """
+        Create the cache, creating its directory if needed.
+
+        Args:
+            directory (str): Directory holding the cache files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory, CACHE_PATTERN)
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "load_seconds_total": 0.0,
+        }
+
+    def load_bytecode(self, bucket):
+        """
+        Load a template's bytecode from disk and count the outcome.
+
+        A missing file and a stale entry, whose source checksum no longer
+        matches the template, both count as misses.
+
+        Args:
+            bucket (jinja2.bccache.Bucket): The template's cache bucket.
+        """
+        start = time.perf_counter()
+        super().load_bytecode(bucket)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats["hits" if bucket.code is not None else "misses"] += 1
+            self._stats["load_seconds_total"] += elapsed
+
+    def dump_bytecode(self, bucket):
+        """
+        Write a freshly compiled template's bytecode to disk.
+
+        Args:
+            bucket (jinja2.bccache.Bucket): The template's cache bucket.
+        """
+        super().dump_bytecode(bucket)
+        with self._lock:
+            self._stats["writes"] += 1
+
+    def stats(self):
+        """
+        Return the cache counters of the current process.
+
+        Returns:
+            dict: Hits, misses, writes and the total time spent loading entries.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+
+def init_app(app, directory=None):
+    """
+    Attach a bytecode cache to the application's Jinja environment.
+
+    Must be called before the first template is loaded, as templates already
+    compiled by then are never looked up in the cache.
+
+    Args:
+        app (flask.Flask): The application to configure.
+        directory (str): Cache directory. Defaults to ``jinja_cache`` in the
+            application's instance folder.
+
+    Returns:
+        CountingBytecodeCache: The cache now used by ``app.jinja_env``.
+    """
+    cache = CountingBytecodeCache(directory or os.path.join(app.instance_path, CACHE_DIRNAME))
+    app.jinja_env.bytecode_cache = cache
+    return cache
+
+
+def precompile(env):
+    """
+    Compile every template of an environment so its bytecode cache is filled.
+
+    Args:
+        env (jinja2.Environment): An environment with a bytecode cache.
+
+    Returns:
+        list: Names of the compiled templates.
+    """
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return names
+
+
+def main():
+    """Fill the bytecode cache with every template of the application."""
+    parser = argparse.ArgumentParser(description="Precompile the lab8 templates.")
+    parser.add_argument("--cache-dir", help="cache directory (default: instance/jinja_cache)")
+    args = parser.parse_args()
+
+    # A bare application has the same template folder and Jinja options as
+    # app.py, without opening databases or starting the hashing pool
+    app = Flask("app", root_path=APP_DIR)
+    cache = init_app(app, args.cache_dir)
+    start = time.perf_counter()
+    names = precompile(app.jinja_env)
+    elapsed = time.perf_counter() - start
+    stats = cache.stats()
+    print(f"Compiled {len(names)} templates into {cache.directory} in {elapsed * 1000:.1f} ms "
+          f"({stats['writes']} written, {stats['hits']} already up to date)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Request IDs and per-request timing spans for the Demon Slayer fan site.
+
+Every request gets an ID, taken from a valid ``X-Request-ID`` header sent by
+a proxy or generated otherwise, which is returned in the response's
+``X-Request-ID`` header and appended as ``[req <id>]`` to every log line
+written while the request is handled. Lines from different workers and
+threads can then be tied to the request that produced them.
+
+While the request runs, the time spent in each phase is added up in spans:
+``require_login``, SQLite statements (``db``), password hashing (``hash``)
+and template rendering (``render``). The last three are fed by the metrics
+registry, which already times them, so no call site changes. When the request
+ends, one compact line summarises it::
+
+    Request POST /login status=302 endpoint=login ms=412.31 spans=db:1.10x3,hash:405.20x1 sample=0.1 always=1
+
+Summaries are written at INFO level for a sampled share of requests
+(``sample_rate``) and always for slow requests and server errors, so slow
+requests can be diagnosed without DEBUG logging on the hot path. Each line
+carries the sample rate in effect and whether the request was always logged,
+so ``log_analyzer.py`` can scale sampled lines back to estimated totals.
+
+Classes:
+    Trace: Request ID and span durations of one request.
+
+Functions:
+    start: Begin tracing a request in the current context.
+    current: Return the trace of the request being handled.
+    span: Time the enclosed block as a span of the current request.
+    finish: Log the summary of a request and stop tracing it.
+    init_app: Trace every request of a Flask application.
+"""
+
+# Standard library imports
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import random
+import re
+import time
+from urllib.parse import quote
+import uuid
+
+# Related third-party imports
+from flask import request
+
+# Local application imports
+from metrics import registry
+
+REQUEST_ID_HEADER = "X-Request-ID"
+VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}$")
+
+# Metrics whose observations are also recorded as spans, and the span names
+SPAN_METRICS = {
+    "db_query_seconds": "db",
+    "password_hash_seconds": "hash",
+    "template_render_seconds": "render",
+}
+
+_current = ContextVar("lab8_trace", default=None)
+_settings = {"sample_rate": 1.0, "slow_seconds": 0.5}
+
+
+class Trace:
+    """
+    Request ID and span durations of one request.
+
+    Attributes:
+        request_id (str): The request's ID.
+        start (float): ``time.perf_counter()`` when the request began.
+        spans (dict): Total seconds and number of calls per span name.
+    """
+
+    __slots__ = ("request_id", "start", "spans")
+
+    def __init__(self, request_id):
+        """
+        Args:
+            request_id (str): The request's ID.
+        """
+        self.request_id = request_id
+        self.start = time.perf_counter()
+        self.spans = {}
+
+    def add(self, name, seconds):
+        """
+        Add one timed call to a span.
+
+        Args:
+            name (str): Span name, such as ``"db"``.
+            seconds (float): Duration of the call.
+        """
+        span_total = self.spans.get(name)
+        if span_total is None:
+            self.spans[name] = [seconds, 1]
+        else:
+            span_total[0] += seconds
+            span_total[1] += 1
+
+    def summary(self, method, path, endpoint, status, seconds, sample_rate=1.0, always=False):
+        """
+        Return the one-line summary of the request.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Request path.
+            endpoint (str): Matched endpoint, or None.
+            status (int): Response status code.
+            seconds (float): Total duration of the request.
+            sample_rate (float): Share of requests whose summary is logged.
+            always (bool): Whether the request is logged whatever the sample
+                rate, being slow or a server error.
+
+        Returns:
+            str: ``Request <method> <path> status=... endpoint=... ms=... spans=...
+            sample=... always=0|1``.
+        """
+        spans = ",".join(
+            f"{name}:{total * 1000:.2f}x{calls}" for name, (total, calls) in self.spans.items()
+        )
+        return (f"Request {method} {quote(path, safe='/')} status={status} "
+                f"endpoint={endpoint or 'none'} ms={seconds * 1000:.2f} spans={spans or '-'} "
+                f"sample={sample_rate:g} always={int(always)}")
+
+
+def _request_id(incoming):
+    """Return ``incoming`` if it is a valid request ID, or a new random ID."""
+    if incoming and VALID_REQUEST_ID.match(incoming):
+        return incoming
+    return uuid.uuid4().hex[:16]
+
+
+def start(incoming_id=None):
+    """
+    Begin tracing a request in the current context.
+
+    Args:
+        incoming_id (str): The ``X-Request-ID`` header sent by the client or
+            a proxy, reused if it is valid.
+
+    Returns:
+        Trace: The new trace.
+    """
+    trace = Trace(_request_id(incoming_id))
+    _current.set(trace)
+    return trace
+
+
+def current():
+    """
+    Return the trace of the request being handled.
+
+    Returns:
+        Trace: The current trace, or None outside a request.
+    """
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    """
+    Time the enclosed block as a span of the current request.
+
+    Args:
+        name (str): Span name.
+    """
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace = _current.get()
+        if trace is not None:
+            trace.add(name, time.perf_counter() - begin)
+
+
+def _record_metric(name, seconds, _labels):
+    """Metrics observer that adds traced metrics to the current request's spans."""
+    span_name = SPAN_METRICS.get(name)
+    if span_name is not None:
+        trace = _current.get()
+        if trace is not None:
+            trace.add(span_name, seconds)
+
+
+def finish(trace, method, path, endpoint, status):
+    """
+    Log the summary of a request if it is sampled, and stop tracing it.
+
+    Slow requests and server errors are always logged; others with the
+    configured sample rate.
+
+    Args:
+        trace (Trace): The request's trace.
+        method (str): HTTP method.
+        path (str): Request path.
+        endpoint (str): Matched endpoint, or None.
+        status (int): Response status code.
+    """
+    seconds = time.perf_counter() - trace.start
+    sample_rate = _settings["sample_rate"]
+    always = status >= 500 or seconds >= _settings["slow_seconds"]
+    if always or random.random() < sample_rate:  # nosec - sampling, not security
+        logging.info("%s", trace.summary(method, path, endpoint, status, seconds,
+                                         sample_rate, always))
+    _current.set(None)
+
+
+def _tag_records(factory):
+    """Wrap a log record factory so records carry the current request's ID."""
+
+    def make_record(*args, **kwargs):
+        record = factory(*args, **kwargs)
+        trace = _current.get()
+        record.request_tag = f" [req {trace.request_id}]" if trace is not None else ""
+        return record
+
+    return make_record
+
+
+def configure(sample_rate=1.0, slow_ms=500):
+    """
+    Set the sampling policy and start recording spans and request IDs.
+
+    Safe to call more than once; the metrics observer and the log record
+    factory are installed only the first time.
+
+    Args:
+        sample_rate (float): Share of requests, from 0 to 1, whose summary is
+            logged.
+        slow_ms (float): Requests taking at least this many milliseconds are
+            always logged.
+    """
+    _settings["sample_rate"] = sample_rate
+    _settings["slow_seconds"] = slow_ms / 1000
+    if not _settings.get("installed"):
+        registry.add_observer(_record_metric)
+        logging.setLogRecordFactory(_tag_records(logging.getLogRecordFactory()))
+        _settings["installed"] = True
+
+
+def init_app(app, sample_rate=1.0, slow_ms=500):
+    """
+    Trace every request of a Flask application.
+
+    Must be called before other ``before_request`` hooks are registered, so
+    that their work is traced.
+
+    Args:
+        app (flask.Flask): The application to trace.
+        sample_rate (float): Share of requests whose summary is logged.
+        slow_ms (float): Requests taking at least this many milliseconds are
+            always logged.
+    """
+    configure(sample_rate, slow_ms)
+
+    @app.before_request
+    def start_trace():
+        start(request.headers.get(REQUEST_ID_HEADER))
+
+    @app.after_request
+    def add_request_id(response):
+        trace = _current.get()
+        if trace is not None:
+            response.headers[REQUEST_ID_HEADER] = trace.request_id
+            request.environ["lab8.status"] = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_trace(_error=None):
+        trace = _current.get()
+        if trace is not None:
+            finish(trace, request.method, request.path, request.endpoint,
+                   request.environ.get("lab8.status", 500))
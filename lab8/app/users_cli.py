@@ -0,0 +1,442 @@
+"""
+Bulk import and export of user accounts for the Demon Slayer fan site.
+
+Registering accounts one ``/register`` request at a time hashes every
+password inline on a request thread and commits one row per transaction. This
+command-line tool streams accounts straight into and out of ``users.db``
+instead. Input is read lazily in batches; plaintext passwords in a batch are
+hashed in parallel by a process pool spread over every core, already-hashed
+passwords are stored as-is, and each batch is written with a single
+``executemany`` inside one transaction. The pool is only started once a batch
+has something to hash.
+
+Plaintext passwords must pass the same checks as ``/register``: the complexity
+rules of ``password_policy`` and the common-password list (and the breach
+index, when ``BREACH_INDEX`` is set). ``--skip-policy`` turns the checks off,
+e.g. to restore accounts exported from an older deployment.
+
+Both CSV (with a header row) and NDJSON (one JSON object per line) are
+supported. Each record has a ``username`` and either a ``password`` in
+plaintext or a Werkzeug ``password_hash``; ``last_password_update`` is
+optional. Exports always contain the hash, never a plaintext password.
+
+Functions:
+    read_records: Stream user records from a CSV or NDJSON file.
+    import_users: Load user records into the database.
+    export_users: Write every user in the database to a file.
+
+Usage:
+    python users_cli.py import accounts.csv [--on-conflict skip|replace|fail] [--skip-policy]
+    python users_cli.py export accounts.ndjson
+"""
+
+# Standard library imports
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+import csv
+from datetime import datetime
+from itertools import islice
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+# Related third-party imports
+from werkzeug.security import generate_password_hash
+
+# Local application imports
+from blocklist import PasswordBlocklist
+from breach_index import BreachIndex
+import db
+from hashing import normalize_method
+import migrations
+import password_policy
+
+BATCH_SIZE = 5000
+PROGRESS_EVERY = 10000
+
+INSERT_STATEMENTS = {
+    "fail": "INSERT INTO users (username, password, last_password_update) VALUES (?, ?, ?)",
+    "skip": "INSERT OR IGNORE INTO users (username, password, last_password_update) VALUES (?, ?, ?)",
+    "replace": (
+        "INSERT INTO users (username, password, last_password_update) VALUES (?, ?, ?) "
+        "ON CONFLICT(username) DO UPDATE SET password = excluded.password, "
+        "last_password_update = excluded.last_password_update"
+    ),
+}
+
+
+def _detect_format(path, fmt):
+    """Return ``fmt`` or, if it is None, the format implied by the file extension."""
+    if fmt:
+        return fmt
+    return "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def _open(path, mode):
+    """Open ``path`` as UTF-8 text, or standard input/output for ``"-"``."""
+    if path == "-":
+        return nullcontext(sys.stdin if "r" in mode else sys.stdout)
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def read_records(file, fmt):
+    """
+    Stream user records from an open CSV or NDJSON file.
+
+    Args:
+        file (io.TextIOBase): The input file.
+        fmt (str): ``"csv"`` or ``"ndjson"``.
+
+    Yields:
+        dict: One record per user.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _is_password_hash(value):
+    """Check whether ``value`` looks like a Werkzeug ``method$salt$hash`` string."""
+    parts = value.split("$")
+    if len(parts) != 3:
+        return False
+    try:
+        normalize_method(parts[0])
+    except ValueError:
+        return False
+    return True
+
+
+def _prepare(record, line_number):
+    """
+    Validate a record and split it into its stored fields.
+
+    Args:
+        record (dict): The raw record.
+        line_number (int): Position of the record in the input, for errors.
+
+    Returns:
+        tuple: Username, stored hash or None, plaintext password or None and
+            the last update time.
+
+    Raises:
+        ValueError: If the record has no username, no password, or a
+            malformed password hash.
+    """
+    username = (record.get("username") or "").strip()
+    pwhash = record.get("password_hash") or ""
+    password = record.get("password") or ""
+    if not username:
+        raise ValueError(f"Record {line_number}: missing username")
+    if pwhash:
+        if not _is_password_hash(pwhash):
+            raise ValueError(f"Record {line_number}: malformed password_hash for {username}")
+    elif not password:
+        raise ValueError(f"Record {line_number}: no password or password_hash for {username}")
+    updated = record.get("last_password_update") or datetime.now().isoformat(" ")
+    return username, pwhash or None, None if pwhash else password, updated
+
+
+def _check_policy(username, password, line_number, blocklists):
+    """
+    Apply the registration checks of ``/register`` to a plaintext password.
+
+    Args:
+        username (str): The record's username, for errors.
+        password (str): The plaintext password.
+        line_number (int): Position of the record in the input, for errors.
+        blocklists (list): Containers of passwords that may not be used.
+
+    Raises:
+        ValueError: If the password is common or does not meet the
+            complexity rules.
+    """
+    if any(password in blocklist for blocklist in blocklists):
+        raise ValueError(f"Record {line_number}: password for {username} is too common")
+    failures = password_policy.failed_rules(password, first_only=True)
+    if failures:
+        raise ValueError(f"Record {line_number}: password for {username} does not meet "
+                         f"the complexity requirements ({password_policy.describe(failures[0])})")
+
+
+def _dedupe(batch, on_conflict):
+    """
+    Keep one record per username within a batch.
+
+    Args:
+        batch (list): Prepared records, username first.
+        on_conflict (str): ``"skip"`` keeps the first record of a username,
+            ``"replace"`` the last, and ``"fail"`` rejects the batch.
+
+    Returns:
+        list: The records, one per username, in input order.
+
+    Raises:
+        ValueError: If ``on_conflict`` is ``"fail"`` and a username repeats.
+    """
+    unique = {}
+    for record in batch:
+        username = record[0]
+        if username in unique:
+            if on_conflict == "fail":
+                raise ValueError(f"Duplicate username {username} in the input")
+            if on_conflict == "skip":
+                continue
+        unique[username] = record
+    return list(unique.values())
+
+
+def _existing_usernames(conn, usernames, chunk=500):
+    """
+    Return which of ``usernames`` are already in the users table.
+
+    Skipped users are filtered out before hashing so re-running an import
+    does not hash their passwords again.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the users database.
+        usernames (list): Usernames to look up.
+        chunk (int): Usernames per query, below SQLite's parameter limit.
+
+    Returns:
+        set: The usernames that exist.
+    """
+    existing = set()
+    cur = conn.cursor()
+    for i in range(0, len(usernames), chunk):
+        part = usernames[i:i + chunk]
+        placeholders = ", ".join("?" * len(part))
+        cur.execute(f"SELECT username FROM users WHERE username IN ({placeholders})", part)
+        existing.update(row[0] for row in cur)
+    return existing
+
+
+def _hash_batch(executor, passwords, method, workers):
+    """
+    Hash a list of plaintext passwords across the pool's processes.
+
+    Args:
+        executor (concurrent.futures.ProcessPoolExecutor): The process pool.
+        passwords (list): Plaintext passwords.
+        method (str): Werkzeug hash method.
+        workers (int): Number of pool processes, used to size the chunks.
+
+    Returns:
+        list: The hashes, in the order of ``passwords``.
+    """
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(executor.map(_hash, passwords, [method] * len(passwords), chunksize=chunksize))
+
+
+def _hash(password, method):
+    """Hash one password with ``method``; runs in a pool process."""
+    return generate_password_hash(password, method=method)
+
+
+def _report(done, start, label):
+    """Print a progress line with the running throughput to standard error."""
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed else 0.0
+    print(f"{label} {done} users ({rate:.0f} users/s)", file=sys.stderr, flush=True)
+
+
+def import_users(conn, records, method="scrypt", on_conflict="skip",
+                 workers=None, batch_size=BATCH_SIZE, check_policy=True, blocklists=()):
+    """
+    Load user records into the users table.
+
+    Records are consumed in batches of ``batch_size``. A username repeated
+    within a batch is kept once, following ``on_conflict``. The plaintext
+    passwords of a batch are hashed in parallel, then the whole batch is
+    inserted with one ``executemany`` and committed as one transaction. With
+    ``"skip"``, users that already exist are dropped before their passwords
+    are hashed. The hashing processes are started by the first batch that has
+    plaintext passwords, so importing only hashes never starts them.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the users database.
+        records (iterable): User records as produced by ``read_records``.
+        method (str): Werkzeug hash method for plaintext passwords.
+        on_conflict (str): ``"skip"`` keeps existing users, ``"replace"``
+            overwrites their password, ``"fail"`` aborts the import.
+        workers (int): Number of hashing processes. Defaults to the number of CPUs.
+        batch_size (int): Records per batch and transaction.
+        check_policy (bool): Reject plaintext passwords that ``/register``
+            would refuse.
+        blocklists (list): Containers of common or breached passwords
+            checked when ``check_policy`` is set.
+
+    Returns:
+        dict: Numbers of records read, duplicate usernames dropped, rows
+            inserted or updated, passwords hashed and the elapsed time in
+            seconds.
+
+    Raises:
+        ValueError: If a record is invalid, a plaintext password fails the
+            policy, or ``on_conflict`` is ``"fail"`` and a username repeats.
+        sqlite3.IntegrityError: If ``on_conflict`` is ``"fail"`` and a
+            username already exists.
+    """
+    method = normalize_method(method)
+    workers = workers or os.cpu_count() or 1
+    statement = INSERT_STATEMENTS[on_conflict]
+    stats = {"read": 0, "duplicates": 0, "written": 0, "hashed": 0}
+    start = time.perf_counter()
+    next_report = PROGRESS_EVERY
+    records = iter(records)
+    executor = None
+
+    try:
+        while True:
+            batch = []
+            for i, record in enumerate(islice(records, batch_size)):
+                line_number = stats["read"] + i + 1
+                prepared = _prepare(record, line_number)
+                if check_policy and prepared[2] is not None:
+                    _check_policy(prepared[0], prepared[2], line_number, blocklists)
+                batch.append(prepared)
+            if not batch:
+                break
+            stats["read"] += len(batch)
+            unique = _dedupe(batch, on_conflict)
+            stats["duplicates"] += len(batch) - len(unique)
+            batch = unique
+            if on_conflict == "skip":
+                existing = _existing_usernames(conn, [record[0] for record in batch])
+                batch = [record for record in batch if record[0] not in existing]
+
+            plaintext = [password for _, pwhash, password, _ in batch if pwhash is None]
+            if plaintext and executor is None:
+                executor = ProcessPoolExecutor(max_workers=workers)
+            hashes = iter(_hash_batch(executor, plaintext, method, workers) if plaintext else [])
+            stats["hashed"] += len(plaintext)
+            rows = [(username, pwhash or next(hashes), updated)
+                    for username, pwhash, _, updated in batch]
+
+            cur = conn.cursor()
+            try:
+                cur.executemany(statement, rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            stats["written"] += cur.rowcount
+
+            if stats["read"] >= next_report:
+                _report(stats["read"], start, "Imported")
+                next_report += PROGRESS_EVERY
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def export_users(conn, file, fmt):
+    """
+    Write every user in the database to an open file.
+
+    Rows are streamed from the cursor, so memory use does not grow with the
+    number of users.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the users database.
+        file (io.TextIOBase): The output file.
+        fmt (str): ``"csv"`` or ``"ndjson"``.
+
+    Returns:
+        int: Number of users written.
+    """
+    fields = ("username", "password_hash", "last_password_update")
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(file)
+        writer.writerow(fields)
+
+    count = 0
+    start = time.perf_counter()
+    cur = conn.cursor()
+    cur.execute("SELECT username, password, last_password_update FROM users ORDER BY id")
+    for row in cur:
+        if writer:
+            writer.writerow(row)
+        else:
+            file.write(json.dumps(dict(zip(fields, row))) + "\n")
+        count += 1
+        if count % PROGRESS_EVERY == 0:
+            _report(count, start, "Exported")
+    return count
+
+
+def main():
+    """Parse the command line and run the import or export."""
+    parser = argparse.ArgumentParser(description="Bulk import or export users.db accounts.")
+    parser.add_argument("--db", default=os.environ.get("USERS_DB", "users.db"),
+                        help="users database (default: $USERS_DB or users.db)")
+    parser.add_argument("--format", choices=("csv", "ndjson"),
+                        help="file format (default: from the file extension)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="load users from a file")
+    importer.add_argument("file", help="input file, or - for standard input")
+    importer.add_argument("--on-conflict", choices=sorted(INSERT_STATEMENTS), default="skip",
+                          help="what to do with existing usernames (default: skip)")
+    importer.add_argument("--method", default=os.environ.get("PASSWORD_HASH_METHOD", "scrypt"),
+                          help="hash method for plaintext passwords "
+                               "(default: $PASSWORD_HASH_METHOD or scrypt)")
+    importer.add_argument("--workers", type=int, help="hashing processes (default: CPU count)")
+    importer.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                          help=f"records per transaction (default: {BATCH_SIZE})")
+    importer.add_argument("--blocklist", default="CommonPassword.txt",
+                          help="common-password list (default: CommonPassword.txt)")
+    importer.add_argument("--skip-policy", action="store_true",
+                          help="accept plaintext passwords that /register would refuse")
+
+    exporter = commands.add_parser("export", help="write users to a file")
+    exporter.add_argument("file", help="output file, or - for standard output")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    fmt = _detect_format(args.file, args.format)
+    conn = db.connect(args.db)
+    try:
+        migrations.migrate(conn)
+        if args.command == "import":
+            blocklists = []
+            if not args.skip_policy:
+                # Load the lists now so a missing file is reported before importing
+                blocklists.append(PasswordBlocklist(args.blocklist))
+                if os.environ.get("BREACH_INDEX"):
+                    blocklists.append(BreachIndex(os.environ["BREACH_INDEX"]))
+                for blocklist in blocklists:
+                    blocklist.refresh()
+            with _open(args.file, "r") as file:
+                stats = import_users(conn, read_records(file, fmt), method=args.method,
+                                     on_conflict=args.on_conflict, workers=args.workers,
+                                     batch_size=args.batch_size,
+                                     check_policy=not args.skip_policy, blocklists=blocklists)
+            rate = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+            print(f"Read {stats['read']} users ({stats['duplicates']} duplicates), "
+                  f"wrote {stats['written']}, hashed {stats['hashed']} passwords in {stats['seconds']:.1f}s "
+                  f"({rate:.0f} users/s)")
+        else:
+            with _open(args.file, "w") as file:
+                count = export_users(conn, file, fmt)
+            print(f"Exported {count} users", file=sys.stderr)
+    except (ValueError, OSError, sqlite3.Error) as err:
+        logging.error("%s", err)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Worker warm-up for the Demon Slayer fan site.
+
+The first requests served after a deploy or a worker respawn pay one-off
+costs: Jinja compiles every template it renders, the password blocklist is
+read from disk, SQLite connections are opened and the password hashing pool
+starts its processes. ``init_app`` moves that work to startup so the first
+user request is as fast as later ones.
+
+Work whose result survives ``fork`` (compiled templates, the loaded
+blocklist) runs as soon as the application is imported, which under uwsgi is
+once in the master before the workers are forked. Work that belongs to a
+single process (database connections and the hashing pool) runs in each
+worker right after the fork through uwsgi's post-fork hook, or immediately
+when the application is not running under uwsgi.
+
+Every step is timed twice, once cold and once warm, and the comparison is
+logged and exported through the metrics registry.
+
+Functions:
+    init_app: Warm up the application now and after every uwsgi fork.
+"""
+
+# Standard library imports
+import logging
+import os
+import time
+
+# Local application imports
+import db
+from metrics import registry
+
+try:
+    from uwsgidecorators import postfork
+except ImportError:  # not running under uwsgi
+    postfork = None
+
+WARMUP_PASSWORD = "Warm_up_passw0rd"
+
+_timings = {}
+
+
+def _timed(name, step):
+    """
+    Run a warm-up step twice and record its cold and warm durations.
+
+    Args:
+        name (str): Name of the step in logs and metrics.
+        step (callable): The step to run.
+    """
+    durations = []
+    for _ in range(2):
+        start = time.perf_counter()
+        step()
+        durations.append(time.perf_counter() - start)
+    _timings[f"{name}_cold_seconds"] = durations[0]
+    _timings[f"{name}_warm_seconds"] = durations[1]
+    logging.info(
+        "Warm-up %s in process %d: cold %.2f ms, warm %.2f ms",
+        name, os.getpid(), durations[0] * 1000, durations[1] * 1000
+    )
+
+
+def _compile_templates(app):
+    """Compile every template so rendering never has to parse one."""
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+
+def _query_users_db(app):
+    """Open this thread's users database connection and run a cheap query."""
+    with app.app_context():
+        cur = db.get_db().cursor()
+        cur.execute("SELECT COUNT(*) FROM users WHERE username = ?", ("",))
+        cur.fetchone()
+
+
+def _hash_once(hash_pool):
+    """Start the hashing pool's processes by hashing and checking a dummy password."""
+    pwhash = hash_pool.generate_password_hash(WARMUP_PASSWORD)
+    hash_pool.check_password_hash(pwhash, WARMUP_PASSWORD)
+
+
+def _warm_process(app, hash_pool, login_limiter):
+    """Run the per-process warm-up steps in the current process."""
+    _timed("users_db", lambda: _query_users_db(app))
+    if login_limiter is not None:
+        _timed("ratelimit_db", lambda: login_limiter.allow("warm-up", "warm-up"))
+    if hash_pool is not None:
+        _timed("password_hash", lambda: _hash_once(hash_pool))
+
+
+def init_app(app, blocklists=None, hash_pool=None, login_limiter=None):
+    """
+    Warm up the application now and in every worker after a uwsgi fork.
+
+    Args:
+        app (flask.Flask): The application.
+        blocklists (dict): Objects with a ``refresh(force)`` method, such as
+            ``PasswordBlocklist`` and ``BreachIndex``, keyed by the name used
+            in logs and metrics.
+        hash_pool (HashingPool): The password hashing pool to start.
+        login_limiter (LoginRateLimiter): The limiter whose store to open.
+    """
+    _timed("templates", lambda: _compile_templates(app))
+    for name, blocklist in (blocklists or {}).items():
+        _timed(name, lambda blocklist=blocklist: blocklist.refresh(force=True))
+
+    if postfork is not None:
+        postfork(lambda: _warm_process(app, hash_pool, login_limiter))
+    else:
+        _warm_process(app, hash_pool, login_limiter)
+
+    registry.register_collector("warmup", lambda: dict(_timings))
@@ -0,0 +1,626 @@
+"""
+Load-test and latency benchmark for the Demon Slayer fan site (lab8).
+
+This script starts the application against a temporary users database and
+drives a mixed workload of page views, logins, registrations and password
+updates from a configurable number of concurrent virtual users. Each virtual
+user registers its own account, logs in and then picks operations at random
+according to the workload mix until the run ends.
+
+Three targets are supported:
+    client: Requests go through the Flask test client in this process.
+    uwsgi:  A local uwsgi instance is started from the existing ``uwsgi.ini``
+            and requests are sent over HTTP.
+    asgi:   The async serving mode (``asgi_app.py``) is started under
+            hypercorn and requests are sent over HTTP.
+
+At the end the script prints requests per second, p50/p95/p99 latency and the
+share of failed and shed requests for every route and saves the results as
+JSON, optionally comparing them with an earlier run. The percentiles only cover
+requests that were served: a fast 503 or 429 would otherwise make an
+overloaded server look quicker.
+
+Usage:
+    python loadtest.py --target client --concurrency 8 --duration 10
+    python loadtest.py --target uwsgi --output run2.json --compare run1.json
+    python loadtest.py --target asgi --concurrency 256
+"""
+
+# Standard library imports
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+import json
+import os
+import random
+import secrets
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "app")
+PAGES = ["/", "/overview", "/hashira", "/demon"]
+DEFAULT_MIX = "pages=70,login=15,register=10,update=5"
+CONN_ERROR = "conn_error"  # status recorded when no HTTP response was received
+# Requests the application turned away on purpose: rate-limited or over capacity
+SHED_STATUSES = frozenset({"429", "503"})
+
+
+def percentile(sorted_values, pct):
+    """
+    Return the nearest-rank percentile of an already sorted list.
+
+    Args:
+        sorted_values (list): Values in ascending order.
+        pct (float): Percentile between 0 and 100.
+
+    Returns:
+        float: The percentile value, or 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_mix(spec):
+    """
+    Parse a workload mix such as ``"pages=70,login=30"``.
+
+    Args:
+        spec (str): Comma-separated ``operation=weight`` pairs.
+
+    Returns:
+        tuple: The operation names and their weights.
+
+    Raises:
+        ValueError: If an operation is unknown or a weight is not a number.
+    """
+    operations, weights = [], []
+    for part in spec.split(","):
+        name, weight = part.split("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation in mix: {name}")
+        operations.append(name)
+        weights.append(float(weight))
+    return operations, weights
+
+
+def new_password():
+    """Return a random password that satisfies the application's policy."""
+    return f"Bench_{secrets.token_hex(6)}Aa1"
+
+
+class TestClientSession:
+    """A virtual user that talks to the app through the Flask test client."""
+
+    def __init__(self, app):
+        """
+        Args:
+            app (flask.Flask): The application under test.
+        """
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        """
+        Send a request without following redirects.
+
+        Args:
+            method (str): ``"GET"`` or ``"POST"``.
+            path (str): The URL path.
+            data (dict): Form fields for a POST request.
+
+        Returns:
+            int: The response status code.
+        """
+        response = self.client.open(path, method=method, data=data)
+        return response.status_code
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as responses instead of following them."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class HttpSession:
+    """A virtual user that talks to a running server over HTTP with cookies."""
+
+    def __init__(self, base_url):
+        """
+        Args:
+            base_url (str): The server's base URL, such as ``http://127.0.0.1:8080``.
+        """
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(CookieJar()), _NoRedirect()
+        )
+
+    def request(self, method, path, data=None):
+        """
+        Send a request without following redirects.
+
+        Args:
+            method (str): ``"GET"`` or ``"POST"``.
+            path (str): The URL path.
+            data (dict): Form fields for a POST request.
+
+        Returns:
+            int: The response status code, or ``CONN_ERROR`` if the connection
+                failed, was reset or timed out.
+        """
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as err:
+            err.read()
+            return err.code
+        except (urllib.error.URLError, OSError):
+            # Refused, reset and timed-out connections are results under overload
+            return CONN_ERROR
+
+
+class VirtualUser:
+    """
+    One simulated visitor with its own account and session.
+
+    Attributes:
+        session: A ``TestClientSession`` or ``HttpSession``.
+        username (str): The account registered by this user.
+        password (str): The account's current password.
+    """
+
+    def __init__(self, session, recorder):
+        """
+        Args:
+            session: A ``TestClientSession`` or ``HttpSession``.
+            recorder (Recorder): Where request timings are stored.
+        """
+        self.session = session
+        self.recorder = recorder
+        self.username = f"bench_{secrets.token_hex(8)}"
+        self.password = new_password()
+
+    def timed(self, route, method, path, data=None):
+        """Send one request and record its latency under ``route``."""
+        start = time.perf_counter()
+        status = self.session.request(method, path, data)
+        self.recorder.record(route, time.perf_counter() - start, status)
+        return status
+
+    def setup(self, attempts=50):
+        """
+        Register this user's account and log in, retrying while the server is busy.
+
+        Args:
+            attempts (int): Maximum number of tries for each step.
+
+        Raises:
+            RuntimeError: If the account could not be registered or logged in.
+        """
+        steps = [
+            ("POST /register", "/register", {"username": self.username, "password": self.password}),
+            ("POST /login", "/login", {"username": self.username, "password": self.password}),
+        ]
+        for route, path, data in steps:
+            for _ in range(attempts):
+                if self.timed(route, "POST", path, data) == 302:
+                    break
+                time.sleep(0.1)
+            else:
+                raise RuntimeError(f"Virtual user setup failed at {route}")
+
+    def pages(self):
+        """View one of the content pages."""
+        path = random.choice(PAGES)
+        self.timed(f"GET {path}", "GET", path)
+
+    def login(self):
+        """Log in with the current password."""
+        self.timed("POST /login", "POST", "/login",
+                   {"username": self.username, "password": self.password})
+
+    def register(self):
+        """Register a throwaway account."""
+        self.timed("POST /register", "POST", "/register",
+                   {"username": f"bench_{secrets.token_hex(8)}", "password": new_password()})
+
+    def update(self):
+        """Change this user's password."""
+        password = new_password()
+        status = self.timed("POST /update_password", "POST", "/update_password",
+                            {"current_password": self.password, "new_password": password})
+        if status == 302:
+            self.password = password
+
+
+OPERATIONS = {
+    "pages": VirtualUser.pages,
+    "login": VirtualUser.login,
+    "register": VirtualUser.register,
+    "update": VirtualUser.update,
+}
+
+
+def _outcome(status):
+    """
+    Classify a recorded status.
+
+    Args:
+        status (str): Response status code, or ``CONN_ERROR``.
+
+    Returns:
+        str: "shed" for 429 and 503, "error" for other 5xx responses and
+            failed connections, "ok" otherwise.
+    """
+    if status in SHED_STATUSES:
+        return "shed"
+    if status == CONN_ERROR or status.startswith("5"):
+        return "error"
+    return "ok"
+
+
+class Recorder:
+    """Thread-safe collection of request latencies and status codes per route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+
+    def record(self, route, seconds, status):
+        """
+        Store one request's status, and its latency if it was served.
+
+        Args:
+            route (str): Method and path, such as ``"GET /overview"``.
+            seconds (float): Request latency.
+            status (int): Response status code, or ``CONN_ERROR``.
+        """
+        status = str(status)
+        with self._lock:
+            latencies = self.latencies.setdefault(route, [])
+            if _outcome(status) == "ok":
+                latencies.append(seconds)
+            codes = self.statuses.setdefault(route, {})
+            codes[status] = codes.get(status, 0) + 1
+
+    def summary(self, elapsed):
+        """
+        Summarise the recorded requests.
+
+        Args:
+            elapsed (float): Wall-clock length of the measured run in seconds.
+
+        Returns:
+            dict: Per-route and overall request counts, requests per second,
+                p50/p95/p99 latency in milliseconds of the served requests,
+                percentages of failed and shed requests and status code counts.
+        """
+        routes = {}
+        every = []
+        every_status = {}
+        for route, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            every.extend(values)
+            codes = self.statuses[route]
+            for status, count in codes.items():
+                every_status[status] = every_status.get(status, 0) + count
+            routes[route] = _stats(values, codes, elapsed)
+            routes[route]["statuses"] = codes
+        return {"routes": routes, "total": _stats(sorted(every), every_status, elapsed)}
+
+
+def _stats(sorted_values, statuses, elapsed):
+    """Return count, throughput, percentiles of sorted served timings and failure shares."""
+    requests = sum(statuses.values())
+    outcomes = {"ok": 0, "error": 0, "shed": 0}
+    for status, count in statuses.items():
+        outcomes[_outcome(status)] += count
+    return {
+        "requests": requests,
+        "rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(sorted_values, 50) * 1000, 3),
+        "p95_ms": round(percentile(sorted_values, 95) * 1000, 3),
+        "p99_ms": round(percentile(sorted_values, 99) * 1000, 3),
+        "error_pct": round(outcomes["error"] / requests * 100, 2) if requests else 0.0,
+        "shed_pct": round(outcomes["shed"] / requests * 100, 2) if requests else 0.0,
+    }
+
+
+def _free_port():
+    """Return a TCP port that is currently free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def prepare_environment(workdir):
+    """
+    Point the application at a temporary database, limiter store and log file.
+
+    The secret key, template bytecode cache, metrics snapshots and session
+    store go to ``workdir`` as well, so a run never writes into ``lab8/app``.
+
+    Args:
+        workdir (str): Temporary directory for the run's files.
+
+    Returns:
+        dict: The environment variables that were set.
+    """
+    env = {
+        "USERS_DB": os.path.join(workdir, "users.db"),
+        "RATELIMIT_DB": os.path.join(workdir, "ratelimit.db"),
+        "LOG_FILE": os.path.join(workdir, "app.log"),
+        "SECRET_KEY_FILE": os.path.join(workdir, "secret_key"),
+        "TEMPLATE_CACHE_DIR": os.path.join(workdir, "jinja_cache"),
+        "METRICS_DIR": os.path.join(workdir, "metrics"),
+        "SESSION_DB": os.path.join(workdir, "sessions.db"),
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+        # Every virtual user shares 127.0.0.1, so the per-IP login limit is lifted
+        "LOGIN_IP_LIMIT": os.environ.get("LOGIN_IP_LIMIT", "1000000"),
+    }
+    os.environ.update(env)
+    return env
+
+
+def load_app(warmup=True):
+    """
+    Import the application from ``lab8/app`` and create its database.
+
+    Call ``prepare_environment`` first: importing the application writes its
+    secret key, template cache and metrics to the configured paths.
+
+    Args:
+        warmup (bool): Warm the application up on import, as a server would.
+            Not needed when the import only creates the database for a
+            server started separately.
+
+    Returns:
+        flask.Flask: The application object.
+    """
+    os.chdir(APP_DIR)
+    sys.path.insert(0, APP_DIR)
+    # Only for this import; servers started later inherit the environment
+    previous = os.environ.get("WARMUP")
+    os.environ["WARMUP"] = "1" if warmup else "0"
+    try:
+        import app as app_module  # pylint: disable=import-outside-toplevel
+    finally:
+        if previous is None:
+            del os.environ["WARMUP"]
+        else:
+            os.environ["WARMUP"] = previous
+    app_module.init_db()
+    return app_module.app
+
+
+def start_uwsgi(workdir, port):
+    """
+    Start uwsgi from ``uwsgi.ini`` on the given port and wait until it answers.
+
+    Args:
+        workdir (str): Temporary directory for the uwsgi log.
+        port (int): Port for uwsgi's HTTP router.
+
+    Returns:
+        subprocess.Popen: The running uwsgi master process.
+
+    Raises:
+        RuntimeError: If uwsgi does not start accepting connections in time.
+    """
+    process = subprocess.Popen(
+        ["uwsgi", "--ini", "uwsgi.ini", "--http", f"127.0.0.1:{port}",
+         "--logto", os.path.join(workdir, "uwsgi.log")],
+        cwd=APP_DIR,
+        env=os.environ.copy(),
+    )
+    return _wait_until_ready(process, port, "uwsgi")
+
+
+def start_asgi(workdir, port):
+    """
+    Start the async serving mode under hypercorn and wait until it answers.
+
+    Hypercorn runs the app in its main process (``--workers 0``): its worker
+    processes are daemonic and could not start the password hashing pool.
+
+    Args:
+        workdir (str): Temporary directory for the server log.
+        port (int): Port to listen on.
+
+    Returns:
+        subprocess.Popen: The running hypercorn process.
+
+    Raises:
+        RuntimeError: If hypercorn does not start accepting connections in time.
+    """
+    with open(os.path.join(workdir, "hypercorn.log"), "wb") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "hypercorn", "--bind", f"127.0.0.1:{port}",
+             "--workers", "0", "--backlog", "1024", "asgi_app:app"],
+            cwd=APP_DIR,
+            env=os.environ.copy(),
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    return _wait_until_ready(process, port, "hypercorn")
+
+
+def _wait_until_ready(process, port, name, timeout=30):
+    """Return ``process`` once it answers HTTP on ``port``; stop it on timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/login", timeout=1):
+                return process
+        except (urllib.error.URLError, OSError):
+            # Refused, reset or still busy warming up: not ready yet
+            time.sleep(0.2)
+    # SIGTERM makes uwsgi reload; SIGINT shuts both servers down
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    raise RuntimeError(f"{name} did not start within {timeout} seconds")
+
+
+def run_load(make_session, concurrency, duration, operations, weights):
+    """
+    Drive the workload from ``concurrency`` virtual users for ``duration`` seconds.
+
+    Args:
+        make_session (callable): Returns a new session for a virtual user.
+        concurrency (int): Number of concurrent virtual users.
+        duration (float): Length of the measured run in seconds.
+        operations (list): Operation names to choose from.
+        weights (list): Relative weight of each operation.
+
+    Returns:
+        dict: The recorder's summary of the measured run.
+    """
+    setup_recorder = Recorder()
+    users = [VirtualUser(make_session(), setup_recorder) for _ in range(concurrency)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(VirtualUser.setup, users))
+
+    recorder = Recorder()
+    for user in users:
+        user.recorder = recorder
+    deadline = time.monotonic() + duration
+
+    def drive(user):
+        while time.monotonic() < deadline:
+            operation = random.choices(operations, weights)[0]
+            OPERATIONS[operation](user)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(drive, users))
+    return recorder.summary(time.perf_counter() - start)
+
+
+def print_report(results, baseline=None):
+    """
+    Print a per-route latency and failure table, with deltas against a baseline run.
+
+    Latencies are those of served requests; "errors" is the share of 5xx
+    responses and failed connections and "shed" that of 429 and 503 responses.
+
+    Args:
+        results (dict): Results of this run.
+        baseline (dict): Results of an earlier run to compare with, if any.
+    """
+    header = (f"{'route':<24}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}"
+              f"{'p99 ms':>10}{'errors':>9}{'shed':>9}")
+    print(header)
+    print("-" * len(header))
+    rows = dict(results["summary"]["routes"], TOTAL=results["summary"]["total"])
+    base_rows = {}
+    if baseline:
+        base_rows = dict(baseline["summary"]["routes"], TOTAL=baseline["summary"]["total"])
+    for route, row in rows.items():
+        print(f"{route:<24}{row['requests']:>10}{row['rps']:>10}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+              f"{row['error_pct']:>8.1f}%{row['shed_pct']:>8.1f}%")
+        base = base_rows.get(route)
+        if base:
+            print(f"{'  vs baseline':<24}{'':>10}"
+                  f"{_delta(row['rps'], base['rps']):>10}{_delta(row['p50_ms'], base['p50_ms']):>10}"
+                  f"{_delta(row['p95_ms'], base['p95_ms']):>10}{_delta(row['p99_ms'], base['p99_ms']):>10}"
+                  f"{_points(row, base, 'error_pct'):>9}{_points(row, base, 'shed_pct'):>9}")
+
+
+def _delta(value, base):
+    """Format the relative change from ``base`` to ``value`` as a percentage."""
+    if not base:
+        return "n/a"
+    return f"{(value - base) / base * 100:+.1f}%"
+
+
+def _points(row, base, key):
+    """Format the change of a percentage between two runs in percentage points."""
+    if key not in base:  # results saved before failures were reported
+        return "n/a"
+    return f"{row[key] - base[key]:+.1f}pp"
+
+
+def main():
+    """Parse arguments, run the benchmark and report the results."""
+    parser = argparse.ArgumentParser(description="Benchmark the lab8 Flask app.")
+    parser.add_argument("--target", choices=["client", "uwsgi", "asgi"], default="client")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--output", default="loadtest_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    operations, weights = parse_mix(args.mix)
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    workdir = tempfile.mkdtemp(prefix="lab8-bench-")
+    server = None
+    try:
+        prepare_environment(workdir)
+        app = load_app(warmup=args.target == "client")
+        if args.target == "client":
+            def make_session():
+                return TestClientSession(app)
+        else:
+            port = _free_port()
+            if args.target == "uwsgi":
+                server = start_uwsgi(workdir, port)
+            else:
+                server = start_asgi(workdir, port)
+
+            def make_session():
+                return HttpSession(f"http://127.0.0.1:{port}")
+
+        summary = run_load(make_session, args.concurrency, args.duration, operations, weights)
+    finally:
+        if server is not None:
+            # SIGTERM makes uwsgi reload; SIGINT shuts both servers down
+            server.send_signal(signal.SIGINT)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "target": args.target,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "mix": args.mix,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "summary": summary,
+    }
+    print_report(results, baseline)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=4)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
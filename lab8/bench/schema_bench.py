@@ -0,0 +1,151 @@
+"""
+Query-plan and timing benchmark for the users table indexes (lab8).
+
+This script fills a temporary users database with a large synthetic user
+table, then runs the password-age and lookup queries the application and its
+audit tools issue, first on the original schema (schema version 1, no
+secondary indexes) and then after applying every migration. For each query
+it prints SQLite's query plan and the median time over several runs, so the
+effect of each index is visible as a switch from ``SCAN users`` to
+``SEARCH users USING INDEX``.
+
+Usage:
+    python schema_bench.py --users 200000 --repeat 5
+    python schema_bench.py --output schema.json
+"""
+
+# Standard library imports
+import argparse
+from datetime import datetime, timedelta
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "app")
+sys.path.insert(0, APP_DIR)
+
+# Local application imports
+import db  # pylint: disable=wrong-import-position
+import migrations  # pylint: disable=wrong-import-position
+
+CUTOFF = (datetime(2024, 1, 1) - timedelta(days=90)).isoformat(" ")
+
+QUERIES = {
+    "stale_password_count": (
+        "SELECT COUNT(*) FROM users WHERE last_password_update < ?", (CUTOFF,)
+    ),
+    "oldest_passwords": (
+        "SELECT username, last_password_update FROM users "
+        "ORDER BY last_password_update LIMIT 50", ()
+    ),
+    "updated_in_range": (
+        "SELECT username FROM users WHERE last_password_update BETWEEN ? AND ?",
+        ("2023-06-01", "2023-06-02"),
+    ),
+    "username_exact": (
+        "SELECT password FROM users WHERE username = ?", ("user0123456",)
+    ),
+    "username_nocase": (
+        "SELECT password FROM users WHERE username = ? COLLATE NOCASE", ("USER0123456",)
+    ),
+}
+
+
+def populate(conn, count, batch_size=10000):
+    """
+    Insert ``count`` synthetic users with spread-out password update times.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the database.
+        count (int): Number of users.
+        batch_size (int): Rows per ``executemany`` call.
+    """
+    rng = random.Random(42)
+    start = datetime(2022, 1, 1)
+    cur = conn.cursor()
+    for first in range(0, count, batch_size):
+        rows = [
+            (f"user{i:07d}", f"scrypt:32768:8:1${i:016x}${'0' * 64}",
+             (start + timedelta(seconds=rng.randrange(2 * 365 * 24 * 3600))).isoformat(" "))
+            for i in range(first, min(first + batch_size, count))
+        ]
+        cur.executemany(
+            "INSERT INTO users (username, password, last_password_update) VALUES (?, ?, ?)",
+            rows
+        )
+    conn.commit()
+    cur.execute("ANALYZE")
+
+
+def measure(conn, repeat):
+    """
+    Time every query and capture its plan.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the database.
+        repeat (int): Number of timed runs per query.
+
+    Returns:
+        dict: Per query, the plan lines and the median time in milliseconds.
+    """
+    results = {}
+    cur = conn.cursor()
+    for name, (sql, params) in QUERIES.items():
+        cur.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        plan = [row[3] for row in cur.fetchall()]
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cur.execute(sql, params)
+            cur.fetchall()
+            durations.append(time.perf_counter() - start)
+        results[name] = {"plan": plan, "median_ms": statistics.median(durations) * 1000}
+    return results
+
+
+def print_report(before, after):
+    """Print query plans and median timings before and after the migrations."""
+    for name in QUERIES:
+        speedup = before[name]["median_ms"] / after[name]["median_ms"] if after[name]["median_ms"] else 0
+        print(f"\n{name}: {before[name]['median_ms']:.3f} ms -> "
+              f"{after[name]['median_ms']:.3f} ms ({speedup:.1f}x)")
+        print(f"    before: {'; '.join(before[name]['plan'])}")
+        print(f"    after:  {'; '.join(after[name]['plan'])}")
+
+
+def main():
+    """Build the synthetic table, run the queries before and after migrating."""
+    parser = argparse.ArgumentParser(description="Benchmark users table indexes.")
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="save the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="lab8-schema-") as workdir:
+        conn = db.connect(os.path.join(workdir, "users.db"))
+        migrations.migrate(conn, migrations.MIGRATIONS[:1])
+
+        start = time.perf_counter()
+        populate(conn, args.users)
+        print(f"Inserted {args.users} users in {time.perf_counter() - start:.1f}s")
+        before = measure(conn, args.repeat)
+
+        start = time.perf_counter()
+        applied = migrations.migrate(conn)
+        print(f"Applied migrations {applied} in {time.perf_counter() - start:.1f}s")
+        after = measure(conn, args.repeat)
+        conn.close()
+
+    print_report(before, after)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"users": args.users, "before": before, "after": after}, file, indent=4)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Side-by-side benchmark of the uwsgi and ASGI serving modes (lab8).
+
+For each requested connection count this script runs ``loadtest.py`` once
+against the uwsgi deployment from ``uwsgi.ini`` and once against the async
+serving mode under hypercorn, with the same workload mix and duration, and
+prints throughput, latency percentiles and the share of error responses
+(429/5xx and failed connections) next to each other. Every run gets a fresh
+temporary database, so the two modes start from the same state.
+
+Usage:
+    python serve_compare.py --concurrency 16,64,256 --duration 20
+    python serve_compare.py --mix pages=90,login=10 --output compare.json
+"""
+
+# Standard library imports
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+TARGETS = ["uwsgi", "asgi"]
+CONN_ERROR = "conn_error"  # status loadtest.py records for failed connections
+
+
+def run_target(target, concurrency, args):
+    """
+    Run one load test in a subprocess and return its results.
+
+    Args:
+        target (str): ``"uwsgi"`` or ``"asgi"``.
+        concurrency (int): Number of concurrent virtual users.
+        args (argparse.Namespace): Duration and workload mix.
+
+    Returns:
+        dict: The results written by ``loadtest.py``.
+
+    Raises:
+        subprocess.CalledProcessError: If the load test fails.
+    """
+    with tempfile.TemporaryDirectory(prefix="lab8-compare-") as workdir:
+        output = os.path.join(workdir, "results.json")
+        subprocess.run(
+            [sys.executable, os.path.join(BENCH_DIR, "loadtest.py"),
+             "--target", target, "--concurrency", str(concurrency),
+             "--duration", str(args.duration), "--mix", args.mix,
+             "--output", output],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        with open(output, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+
+def error_rate(summary):
+    """
+    Return the share of responses that were rejections or server errors.
+
+    Args:
+        summary (dict): The ``summary`` section of a load-test result.
+
+    Returns:
+        float: Fraction of requests answered with 429 or 5xx or that got no
+            response at all.
+    """
+    errors = total = 0
+    for route in summary["routes"].values():
+        for status, count in route["statuses"].items():
+            total += count
+            if status in ("429", CONN_ERROR) or status.startswith("5"):
+                errors += count
+    return errors / total if total else 0.0
+
+
+def main():
+    """Run both serving modes at every connection count and compare them."""
+    parser = argparse.ArgumentParser(description="Compare uwsgi and ASGI serving of lab8.")
+    parser.add_argument("--concurrency", default="16,64,256",
+                        help="comma-separated connection counts (default: 16,64,256)")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--mix", default="pages=80,login=10,register=5,update=5")
+    parser.add_argument("--output", help="save all results as JSON")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    results = {}
+    header = f"{'conns':>6}  {'mode':<6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}"
+    print(header)
+    print("-" * len(header))
+    for concurrency in levels:
+        for target in TARGETS:
+            try:
+                result = run_target(target, concurrency, args)
+            except subprocess.CalledProcessError as err:
+                # A server that could not start must not hide the other results
+                print(f"{concurrency:>6}  {target:<6}  load test failed "
+                      f"(exit status {err.returncode})", flush=True)
+                continue
+            results.setdefault(str(concurrency), {})[target] = result
+            total = result["summary"]["total"]
+            print(f"{concurrency:>6}  {target:<6}{total['rps']:>10}{total['p50_ms']:>10}"
+                  f"{total['p95_ms']:>10}{total['p99_ms']:>10}"
+                  f"{error_rate(result['summary']):>9.1%}", flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()